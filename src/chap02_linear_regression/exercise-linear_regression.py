@@ -1,9 +1,10 @@
 #!/usr/bin/env python
 # coding: utf-8
 import numpy as np # 导入NumPy库。NumPy（Numerical Python）是 Python 中最基础、最强大的科学计算库之一
-import matplotlib.pyplot as plt
-
+import itertools # 分块读取大文件
+import time # 比较各优化方法的耗时
 import matplotlib.pyplot as plt # 导入Matplotlib的pyplot模块并命名为plt
+import optimizers # 小批量SGD / 动量 / Adam 等迭代优化器
 # 用于创建各种静态、交互式和动画可视化图表
 
 # 下面这段代码从文件中读取数据，然后把数据拆分成特征和标签，最后以 NumPy 数组的形式返回
@@ -13,6 +14,8 @@ def load_data(filename):
         filename: 数据文件的路径
     Returns:
         tuple: 包含特征和标签的numpy数组 (xs, ys)
+               第一列为 x，其余各列为目标值；只有一列目标值时 ys 形状为 (N,)，
+               有多列时（多目标回归）ys 形状为 (N, T)
     """
     xys = []# 用于存储每行的数据，每行数据是一个列表
     with open(filename, "r") as f:  # 以只读模式打开文件进行读取
@@ -22,13 +25,30 @@ def load_data(filename):
             # map(float, ...) 将分割后的字符串转换为浮点数
             line_data = list(map(float, line.strip().split()))
             xys.append(line_data)
-    # 使用zip(*xys)转置数据，将数据拆分为特征和标签
-    # 假设每行数据的最后一个元素是标签，其余是特征
-    # zip(*xys) 将 xys 列表的行和列进行转置
-    xs, ys = zip(*xys)# xs 是特征列表，ys 是标签列表
-    # 将特征和标签列表转换为 NumPy 数组
+    # 转换为 NumPy 数组后按列拆分特征和标签
+    # 假设每行数据的第一个元素是特征，其余是标签
     # NumPy 数组便于后续的数学运算和数据处理
-    return np.asarray(xs), np.asarray(ys) # 将Python列表转换为NumPy数组并返回
+    data = np.asarray(xys)
+    xs, ys = data[:, 0], data[:, 1:] # xs 是特征，ys 是标签
+    return xs, (ys[:, 0] if ys.shape[1] == 1 else ys)
+
+
+def iter_data_chunks(filename, chunk_size=100000):
+    """分块读取数据文件，每次只把 chunk_size 行载入内存。
+    Args:
+        filename: 数据文件的路径
+        chunk_size: 每块的行数
+    Yields:
+        tuple: 当前块的 (xs, ys)，ys 的形状规则与 load_data 相同
+    """
+    with open(filename, "r") as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                break
+            block = np.loadtxt(lines, ndmin=2)
+            ys = block[:, 1:]
+            yield block[:, 0], (ys[:, 0] if ys.shape[1] == 1 else ys)
 
 
 # ## 恒等基函数（Identity Basis Function）的实现 填空顺序 2
@@ -46,11 +66,8 @@ def multinomial_basis(x, feature_num=10):
     """多项式基函数：将输入x映射为多项式特征
     feature_num: 多项式的最高次数
     返回 shape (N, feature_num)"""
-    x = np.expand_dims(x, axis=1)  # shape(N, 1)
-    # 生成各次幂特征：x^1, x^2, ..., x^feature_num，将其拼接
-    ret = [x**i for i in range(1, feature_num + 1)]
-    ret = np.concatenate(ret, axis=1)
-    return ret
+    # 各次幂 x^1, x^2, ..., x^feature_num 由 BasisTransform 逐列累乘写入预分配的数组
+    return BasisTransform("multinomial", feature_num, bias=False).transform(x)
 
 
 
@@ -59,12 +76,118 @@ def gaussian_basis(x, feature_num=10):
     高斯基函数：将输入x映射为一组高斯分布特征
     用于提升模型对非线性关系的拟合能力
     """
-    # 定义中心在区间 [0, 25] 内均匀分布
-    centers = np.linspace(0, 25, feature_num)
-    # 每个高斯函数的标准差（带宽）
-    sigma = 25 / feature_num
-    # 计算每个输入 x 对所有中心的响应，输出 shape (N, feature_num)
-    return np.exp(-0.5 * ((x[:, np.newaxis] - centers) / sigma) ** 2)
+    # 中心在区间 [0, 25] 内均匀分布，标准差（带宽）为 25 / feature_num，输出 shape (N, feature_num)
+    return BasisTransform("gaussian", feature_num, bias=False).transform(x)
+
+
+class BasisTransform:
+    """
+    基函数特征变换（可选地融合偏置列）
+
+    构造时一次性算好高斯基的中心和带宽倒数，transform 把特征直接写入预分配（或调用者给定）的
+    输出数组：偏置列填1，多项式的各次幂由前一列乘以 x 逐列累乘得到，高斯基在输出数组上原地计算。
+    predict 分块计算 phi @ w，只复用一块大小的缓冲区，不会为整个预测集构造完整的特征矩阵。
+    """
+
+    def __init__(self, kind="identity", feature_num=10, low=0.0, high=25.0, bias=True):
+        """
+        参数:
+        kind: 'identity'、'multinomial'、'gaussian'，或任意把 (N,) 映射为 (N, F) 的基函数
+        feature_num (int): 多项式最高次数 / 高斯基个数（kind='identity' 时忽略）
+        low, high (float): 高斯基中心均匀分布的区间
+        bias (bool): 是否在第0列放置偏置项1
+        """
+        if isinstance(kind, str) and kind not in ("identity", "multinomial", "gaussian"):
+            raise ValueError(
+                f"不支持的基函数: {kind}，支持的选项有 'identity', 'multinomial', 'gaussian' 或可调用对象"
+            )
+        self.kind = kind
+        self.feature_num = 1 if kind == "identity" else feature_num
+        self.bias = bias
+        if kind == "gaussian":
+            self.centers = np.linspace(low, high, feature_num)
+            self.inv_sigma = feature_num / (high - low)
+        # 可调用基函数的输出维数在第一次变换时确定
+        self.n_output_features = None if callable(kind) else self.feature_num + int(bias)
+
+    @classmethod
+    def from_basis_func(cls, basis_func):
+        """把 identity_basis / multinomial_basis / gaussian_basis（默认参数）转换为等价的变换对象"""
+        if basis_func is None or basis_func is identity_basis:
+            return cls("identity")
+        if isinstance(basis_func, cls):
+            return basis_func
+        if basis_func is multinomial_basis:
+            return cls("multinomial")
+        if basis_func is gaussian_basis:
+            return cls("gaussian")
+        return cls(basis_func)
+
+    def transform(self, x, out=None):
+        """
+        计算设计矩阵
+
+        参数:
+        x (np.ndarray): 输入，形状为 (N,)
+        out (np.ndarray, 可选): 形状为 (N, n_output_features) 的输出缓冲区
+
+        返回:
+        np.ndarray: 设计矩阵，形状为 (N, n_output_features)
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if callable(self.kind):
+            feats = np.asarray(self.kind(x), dtype=np.float64).reshape(len(x), -1)
+            self.feature_num = feats.shape[1]
+            self.n_output_features = self.feature_num + int(self.bias)
+        if out is None:
+            out = np.empty((len(x), self.n_output_features))
+        if self.bias:
+            out[:, 0] = 1.0
+        phi = out[:, int(self.bias):]
+        if callable(self.kind):
+            phi[...] = feats
+        elif self.kind == "identity":
+            phi[:, 0] = x
+        elif self.kind == "multinomial":
+            # x^k = x^(k-1) * x，逐列累乘
+            phi[:, 0] = x
+            for k in range(1, self.feature_num):
+                np.multiply(phi[:, k - 1], x, out=phi[:, k])
+        else:
+            # exp(-0.5 * ((x - c) / sigma)^2)，全部在输出数组上原地完成
+            np.subtract(x[:, None], self.centers, out=phi)
+            phi *= self.inv_sigma
+            np.square(phi, out=phi)
+            phi *= -0.5
+            np.exp(phi, out=phi)
+        return out
+
+    __call__ = transform
+
+    def predict(self, x, w, chunk_size=65536):
+        """
+        分块计算 phi(x) @ w
+
+        参数:
+        x (np.ndarray): 输入，形状为 (N,)
+        w (np.ndarray): 权重，形状为 (n_output_features,) 或 (n_output_features, n_targets)
+        chunk_size (int): 每块样本数，决定特征缓冲区的大小
+
+        返回:
+        np.ndarray: 预测值，形状为 (N,) 或 (N, n_targets)
+        """
+        x = np.asarray(x, dtype=np.float64)
+        n = len(x)
+        y = np.empty((n,) + np.shape(w)[1:])
+        buf = None  # 第一块的特征数组作为之后各块的缓冲区
+        for start in range(0, n, chunk_size):
+            xc = x[start:start + chunk_size]
+            if buf is None:
+                phi = buf = self.transform(xc)
+            else:
+                phi = self.transform(xc, out=buf[:len(xc)])
+            np.matmul(phi, w, out=y[start:start + len(xc)])
+        return y
 
 
 # 返回一个训练好的模型 填空顺序 1 用最小二乘法进行模型优化
@@ -110,8 +233,12 @@ def least_squares(phi, y, alpha=0.0, solver="pinv"):
     if solver == "pinv":
         # 使用 numpy 的伪逆函数，基于 SVD 分解
         # 对病态矩阵具有良好的数值稳定性
-        A = phi.T @ phi + alpha * np.eye(n_features)
-        w = np.linalg.pinv(A) @ phi.T @ y
+        if alpha == 0:
+            # 无正则化时直接对 phi 求伪逆，避免 phi^T phi 使条件数平方
+            w = np.linalg.pinv(phi) @ y
+        else:
+            A = phi.T @ phi + alpha * np.eye(n_features)
+            w = np.linalg.pinv(A) @ (phi.T @ y)
 
     elif solver == "cholesky":
         # 使用 Cholesky 分解求解正规方程
@@ -128,18 +255,17 @@ def least_squares(phi, y, alpha=0.0, solver="pinv"):
         except np.linalg.LinAlgError:
             # 处理非正定矩阵的情况，回退到 pinv
             print("警告: Cholesky 分解失败，矩阵可能非正定，回退到伪逆求解")
-            w = np.linalg.pinv(A) @ phi.T @ y
+            w = np.linalg.pinv(A) @ (phi.T @ y)
 
     elif solver == "svd":
         # 直接使用 SVD 分解求解
         # 对病态矩阵最稳定，但计算成本较高
         U, s, Vt = np.linalg.svd(phi, full_matrices = False)
-        # 计算正则化的 SVD 解
+        # 计算正则化的 SVD 解：w = V diag(s / (s^2 + alpha)) U^T y
+        # 对角矩阵只作为向量逐行缩放，不构造 (n_features, n_samples) 的稠密矩阵
         s_reg = s / (s**2 + alpha)
-        # 构建对角矩阵
-        S_reg = np.zeros((n_features, n_samples))
-        np.fill_diagonal(S_reg, s_reg)
-        w = Vt.T @ S_reg @ U.T @ y
+        Uty = U.T @ y
+        w = Vt.T @ (s_reg.reshape((-1,) + (1,) * (Uty.ndim - 1)) * Uty)
 
     else:
          # 如果 solver 不是支持的选项，抛出 ValueError
@@ -150,131 +276,332 @@ def least_squares(phi, y, alpha=0.0, solver="pinv"):
     return w
 
 
-def gradient_descent(phi, y, lr = 0.01, epochs = 1000):
-    """实现批量梯度下降算法优化线性回归权重
+class RidgePath:
+    """
+    岭回归正则化路径：只做一次 SVD，复用于任意多个 alpha
+
+    phi = U diag(s) V^T 分解之后，对每个 alpha 的解只是把 U^T y 按
+    s / (s^2 + alpha) 缩放再乘以 V，所有 alpha 一次向量化完成；
+    GCV 的残差平方和有闭式解 RSS = ||y||^2 - ||U^T y||^2 + Σ_r (1 - f_r)^2 (U^T y)_r^2，
+    不需要任何与样本数相关的中间数组；LOO 需要帽子矩阵对角线 h = (U∘U) f 和逐样本残差，
+    按 alpha 分块计算，临时数组不超过 block_size 个元素。两者都不必逐个 alpha 重新分解。
+    """
+
+    block_size = 1 << 22  # loo 中每块残差数组 (n_samples, n_alphas_chunk, n_targets) 的最大元素数
+
+    def __init__(self, phi, y, rcond=1e-15):
+        """
+        参数:
+        phi (np.ndarray): 设计矩阵，形状为 (n_samples, n_features)
+        y (np.ndarray): 目标值，形状为 (n_samples,) 或 (n_samples, n_targets)
+        rcond (float): 相对阈值，小于 rcond * 最大奇异值的奇异值视为0（与 np.linalg.pinv 一致）
+        """
+        phi = np.asarray(phi, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if phi.shape[0] != y.shape[0]:
+            raise ValueError(
+                f"设计矩阵 phi 的样本数 ({phi.shape[0]}) 与目标值 y 的样本数 ({y.shape[0]}) 不匹配"
+            )
+        U, s, Vt = np.linalg.svd(phi, full_matrices=False)
+        keep = s > rcond * s.max()
+        self.U, self.s, self.Vt = U[:, keep], s[keep], Vt[keep]
+        self.y = y
+        self.Uty = self.U.T @ y  # (r,) 或 (r, n_targets)
+        self.n_samples = phi.shape[0]
+        # 闭式 GCV 所需的量：每个目标的 (U^T y)^2 和 y 在 U 列空间之外部分的平方和
+        Uty2 = self.Uty.reshape(len(self.s), -1) ** 2
+        self._Uty_sq = Uty2  # (r, n_targets)
+        self._rss_perp = np.maximum(np.sum(y.reshape(self.n_samples, -1) ** 2, axis=0) - Uty2.sum(axis=0), 0)
+
+    def _filter(self, alphas):
+        """滤波因子 s^2 / (s^2 + alpha)，形状为 (n_alphas, r)"""
+        alphas = np.atleast_1d(np.asarray(alphas, dtype=np.float64))
+        s2 = self.s ** 2
+        return s2 / (s2 + alphas[:, None])
+
+    def coef(self, alphas):
+        """
+        一次计算所有 alpha 对应的权重
+
+        返回:
+        np.ndarray: 形状为 (n_alphas, n_features) 或 (n_alphas, n_features, n_targets)
+        """
+        shrink = self._filter(alphas) / self.s  # s / (s^2 + alpha)
+        if self.Uty.ndim == 1:
+            return (shrink * self.Uty) @ self.Vt
+        return np.einsum("ar,rt,rd->adt", shrink, self.Uty, self.Vt)
+
+    def rss(self, alphas):
+        """
+        各 alpha 下训练集残差平方和（闭式计算，代价 O(n_alphas * r * n_targets)）
+
+        返回:
+        np.ndarray: 形状为 (n_alphas,) 或 (n_alphas, n_targets)
+        """
+        f = self._filter(alphas)
+        rss = self._rss_perp + (1.0 - f) ** 2 @ self._Uty_sq  # (n_alphas, n_targets)
+        return rss[:, 0] if self.Uty.ndim == 1 else rss
+
+    def gcv(self, alphas):
+        """
+        广义交叉验证误差 GCV(alpha) = n * RSS / (n - tr H)^2，返回形状为 (n_alphas,)（多目标时取平均）
+        """
+        f = self._filter(alphas)
+        rss = self.rss(alphas).reshape(len(f), -1).mean(axis=1)
+        dof = self.n_samples - f.sum(axis=1)  # tr H = Σ_r f_r
+        return self.n_samples * rss / dof ** 2
+
+    def loo(self, alphas):
+        """
+        留一交叉验证均方误差 mean((e_i / (1 - h_ii))^2)，返回形状为 (n_alphas,)（多目标时取平均）
+        """
+        f = self._filter(alphas)
+        y = self.y.reshape(self.n_samples, -1)
+        Uty = self.Uty.reshape(len(self.s), -1)
+        n_targets = y.shape[1]
+        # 先按 alpha 分块；单个 alpha 的残差 (n_samples, n_targets) 仍然超过 block_size 时再按样本分块
+        step = max(1, self.block_size // (self.n_samples * n_targets))
+        rows = max(1, self.block_size // (step * n_targets))
+        sq_sum = np.zeros(len(f))
+        for start in range(0, len(f), step):
+            fc = f[start:start + step]
+            fUty = fc[:, :, None] * Uty  # (n_chunk, r, n_targets)
+            for r0 in range(0, self.n_samples, rows):
+                U = self.U[r0:r0 + rows]
+                h = (U ** 2) @ fc.T  # 帽子矩阵对角线，形状为 (n_rows, n_chunk)
+                # 残差 y - U diag(f) U^T y，形状为 (n_rows, n_chunk, n_targets)，全部原地计算
+                resid = np.tensordot(U, fUty, axes=(1, 1))
+                np.subtract(y[r0:r0 + rows, None, :], resid, out=resid)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    resid /= (1.0 - h)[:, :, None]
+                np.square(resid, out=resid)
+                sq_sum[start:start + step] += resid.sum(axis=(0, 2))
+        return sq_sum / (self.n_samples * n_targets)
+
+    def best_alpha(self, alphas, criterion="gcv"):
+        """
+        在 alphas 中选择交叉验证误差最小的正则化参数
+
+        返回:
+        tuple: (最优 alpha, 对应权重, 所有 alpha 的得分)
+        """
+        if criterion == "gcv":
+            scores = self.gcv(alphas)
+        elif criterion == "loo":
+            scores = self.loo(alphas)
+        else:
+            raise ValueError(f"不支持的评价准则: {criterion}，支持的选项有 'gcv', 'loo'")
+        alphas = np.atleast_1d(alphas)
+        best = int(np.nanargmin(scores))
+        return alphas[best], self.coef(alphas[best:best + 1])[0], scores
+
+
+class StreamingLeastSquares:
+    """
+    分块累积的（带正则化的）最小二乘求解器
+
+    数据按块依次传入 partial_fit，只保存与特征数有关的统计量，内存占用为 O(D^2)，
+    与样本数无关，可以对上亿行数据做回归；任何时候都可以调用 solve 得到当前的解。
+
+    method='normal'：累积正规方程 phi^T phi 和 phi^T y，最后用 Cholesky 分解求解，速度最快；
+    method='qr'：流式QR分解，只保存 phi 的 D×D 上三角因子 R、D×T 的 Q^T y 和每个目标的残差平方和；
+                 每来一块数据就把 [R; phi_chunk] 重新分解，并把新的 Q^T 作用到 [Q^T y; y_chunk] 上，
+                 投影之外的部分累加到残差里。避免了构造 phi^T phi 使条件数平方的问题，
+                 适合病态的设计矩阵（例如高次多项式基）；所有目标共享同一个 R，QR 的宽度只有 D。
+    """
+
+    def __init__(self, n_features, method="normal"):
+        """
+        参数:
+        n_features (int): 特征数（设计矩阵的列数）
+        method (str): 'normal' 或 'qr'
+        """
+        if method not in ("normal", "qr"):
+            raise ValueError(f"不支持的累积方式: {method}，支持的选项有 'normal', 'qr'")
+        self.n_features = n_features
+        self.method = method
+        self.n_samples = 0
+        self.n_targets = None  # None 表示 y 为一维
+        self.AtA = None  # 'normal': phi^T phi (D, D)
+        self.Aty = None  # 'normal': phi^T y (D,) 或 (D, T)
+        self.yty = None  # 'normal': 每个目标的 y^T y，用于计算残差平方和
+        self.R = None    # 'qr': phi 的上三角因子 (D, D)（累积的样本数少于 D 时为 (n_samples, D)）
+        self.Qty = None  # 'qr': Q^T y，行数与 R 相同，(·, T)
+        self.rss = None  # 'qr': 每个目标的残差平方和 (T,)
+
+    def partial_fit(self, phi, y):
+        """累积一块数据
+
+        参数:
+        phi (np.ndarray): 数据块的设计矩阵，形状为 (n_chunk, n_features)
+        y (np.ndarray): 数据块的目标值，形状为 (n_chunk,) 或 (n_chunk, n_targets)
+        """
+        phi = np.asarray(phi, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if phi.shape[1] != self.n_features or phi.shape[0] != y.shape[0]:
+            raise ValueError(
+                f"数据块形状不匹配: phi {phi.shape}, y {y.shape}, 特征数应为 {self.n_features}"
+            )
+        if self.n_samples == 0:
+            self.n_targets = None if y.ndim == 1 else y.shape[1]
+        y2 = y.reshape(len(y), -1)
+
+        if self.method == "normal":
+            if self.AtA is None:
+                self.AtA = np.zeros((self.n_features, self.n_features))
+                self.Aty = np.zeros((self.n_features, y2.shape[1]))
+                self.yty = np.zeros(y2.shape[1])
+            self.AtA += phi.T @ phi
+            self.Aty += phi.T @ y2
+            self.yty += np.sum(y2 * y2, axis=0)
+        else:
+            if self.R is None:
+                A, B = phi, y2
+                self.rss = np.zeros(y2.shape[1])
+            else:
+                A, B = np.vstack([self.R, phi]), np.vstack([self.Qty, y2])
+            # Q 只在本块内使用（行数为 D + n_chunk），不保存
+            Q, self.R = np.linalg.qr(A, mode="reduced")
+            self.Qty = Q.T @ B
+            # B 在 Q 列空间之外的部分就是新增的残差
+            resid = B - Q @ self.Qty
+            self.rss += np.sum(resid * resid, axis=0)
+        self.n_samples += len(y)
+        return self
+
+    def solve(self, alpha=0.0):
+        """由当前累积的统计量求解权重（不改变累积状态，可以随时调用）
+
+        参数:
+        alpha (float): L2 正则化参数
+
+        返回:
+        np.ndarray: 权重，形状为 (n_features,) 或 (n_features, n_targets)
+        """
+        if self.n_samples == 0:
+            raise ValueError("还没有累积任何数据，请先调用 partial_fit")
+        D = self.n_features
+        if self.method == "normal":
+            A = self.AtA + alpha * np.eye(D)
+            try:
+                L = np.linalg.cholesky(A)
+                w = np.linalg.solve(L.T, np.linalg.solve(L, self.Aty))
+            except np.linalg.LinAlgError:
+                print("警告: Cholesky 分解失败，矩阵可能非正定，回退到伪逆求解")
+                w = np.linalg.pinv(A) @ self.Aty
+        else:
+            R11, R12 = self.R, self.Qty
+            if alpha > 0:
+                # 正则化等价于在数据末尾追加 sqrt(alpha) * I 行（目标为0），再做一次 D 维的小规模QR
+                Q, R11 = np.linalg.qr(np.vstack([R11, np.sqrt(alpha) * np.eye(D)]), mode="reduced")
+                R12 = Q[:len(R12)].T @ R12
+            # 解上三角方程 R_11 w = Q^T y
+            # 累积的样本数少于特征数时 R_11 只有 n_samples 行（不是方阵），与秩亏一样取最小范数解
+            if R11.shape[0] < D or np.any(np.abs(np.diag(R11)) < 1e-12 * max(1.0, np.abs(R11).max())):
+                w = np.linalg.lstsq(R11, R12, rcond=None)[0]
+            else:
+                w = np.linalg.solve(R11, R12)
+        return w[:, 0] if self.n_targets is None else w
+
+    def residual_sum_of_squares(self):
+        """未正则化最小二乘解的残差平方和 ||phi w - y||^2（按目标分别计算）"""
+        if self.method == "qr":
+            rss = self.rss
+        else:
+            # ||phi w - y||^2 = y^T y - w^T (2 phi^T y - phi^T phi w)
+            w = self.solve().reshape(self.n_features, -1)
+            rss = self.yty - np.sum(w * (2 * self.Aty - self.AtA @ w), axis=0)
+        return float(rss[0]) if self.n_targets is None else rss
+
+
+def least_squares_stream(chunks, basis_func=None, alpha=0.0, method="normal"):
+    """对分块到来的数据做最小二乘拟合，内存占用与样本数无关。
+
+    参数:
+    chunks: 可迭代对象，每个元素为一块 (x, y)，例如 iter_data_chunks(filename)
+    basis_func: 基函数或 BasisTransform，默认恒等基；设计矩阵会自动在前面拼接偏置列
+    alpha (float): L2 正则化参数
+    method (str): 'normal'（正规方程 + Cholesky）或 'qr'（流式QR，数值更稳定）
+
+    返回:
+    tuple: (w, acc)，权重以及累积器（可继续 partial_fit 后重新 solve）
+    """
+    transform = BasisTransform.from_basis_func(basis_func)
+    acc = None
+    for x, y in chunks:
+        phi = transform(x)
+        if acc is None:
+            acc = StreamingLeastSquares(phi.shape[1], method=method)
+        acc.partial_fit(phi, y)
+    if acc is None:
+        raise ValueError("数据为空")
+    return acc.solve(alpha), acc
+
+
+def gradient_descent(phi, y, lr = 0.01, epochs = 1000, return_history = False, **kwargs):
+    """实现（小批量）梯度下降算法优化线性回归权重
     参数:
         phi: 设计矩阵（特征矩阵），形状为 (n_samples, n_features)
-        y: 目标值向量，形状为 (n_samples,)
+        y: 目标值，形状为 (n_samples,) 或 (n_samples, n_targets)；多目标时每步一次矩阵乘法同时更新所有目标
         lr: 学习率（步长），控制参数更新幅度，默认0.01
         epochs: 训练轮数，默认1000
+        return_history: 是否同时返回每轮的损失和耗时
+        **kwargs: 传给 optimizers.fit 的其他参数，例如
+            optimizer='sgd' / 'momentum' / 'nesterov' / 'adam'，batch_size（默认全批量），
+            lr_schedule，line_search，tol（提前停止容差），alpha（L2 正则化），random_state
     返回:
-        w: 优化后的权重向量，形状为 (n_features,)
+        w: 优化后的权重，形状为 (n_features,) 或 (n_features, n_targets)
+        history: return_history=True 时返回，见 optimizers.fit
     数学原理:
         最小化损失函数 J(w) = 1/m * ||φw - y||²
         梯度计算: ∇J(w) = 2/m * φ.T @ (φw - y)
         参数更新: w := w - α * ∇J(w)
+    默认参数（全批量、固定学习率、无提前停止）与原来的批量梯度下降完全相同。
     """
-    # 初始化权重向量（全零开始）
-    # 形状与特征数量相同，即每个特征对应一个权重
-    w = np.zeros(phi.shape[1])
-    
-    # 迭代优化循环
-    for epoch in range(epochs):
-        # 1. 前向传播：计算当前权重下的预测值
-        # 矩阵乘法 φw，结果形状 (n_samples,)
-        y_pred = phi @ w
-        
-        # 2. 计算误差：预测值与真实值的差
-        # 形状 (n_samples,)
-        error = y - y_pred
-        
-        # 3. 计算梯度（损失函数对权重的导数）
-        # 梯度公式推导：
-        #   J(w) = 1/m * ∑(φw - y)²
-        #   ∇J(w) = 2/m * φ.T @ (φw - y)
-        # 其中：
-        # φ.T @ error 计算每个特征上的误差总和
-        # -2/len(y) 是损失函数导数的系数
-        # 最终形状 (n_features,)
-        gradient = -2 * phi.T @ error / len(y)
-        
-        # 4. 参数更新：沿负梯度方向调整权重
-        # 学习率控制更新步长
-        # 公式: w_new = w_old - lr * ∇J(w)
-        w -= lr * gradient
-    
+    w, history = optimizers.fit(phi, y, lr=lr, epochs=epochs, **kwargs)
+    if return_history:
+        return w, history
     return w
 
 
-def main(x_train, y_train, use_gradient_descent=False, basis_func=None):
+def main(x_train, y_train, use_gradient_descent=False, basis_func=None, solver="pinv", alpha=0.0):
     """训练模型，并返回从x到y的映射。
-    basis_func: 可选，基函数（如identity_basis, multinomial_basis, gaussian_basis），默认恒等基
+    y_train: 形状为 (N,)，或 (N, T) 表示用同一组基函数同时拟合 T 个目标（共享一次分解，返回权重矩阵）
+    basis_func: 可选，基函数（如identity_basis, multinomial_basis, gaussian_basis）或 BasisTransform，默认恒等基
+    solver: 最小二乘求解器，'pinv'、'cholesky' 或 'svd'，见 least_squares
+    alpha: L2 正则化参数
     """
-    # 支持自定义基函数
-    if basis_func is None:
-        basis_func = identity_basis
-
-    # 生成偏置项和特征矩阵
-    phi0 = np.expand_dims(np.ones_like(x_train), axis=1)
-    # 构造偏置项1
-    phi1 = basis_func(x_train)
-    phi = np.concatenate([phi0, phi1], axis=1) # 将偏置项和特征矩阵拼接成完整的特征矩阵
+    # 支持自定义基函数；偏置列和基函数特征由 BasisTransform 一次写入设计矩阵
+    transform = BasisTransform.from_basis_func(basis_func)
+    phi = transform(x_train)
     # 最小二乘法求解权重
-    w_lsq = np.dot(np.linalg.pinv(phi), y_train)
+    w_lsq = least_squares(phi, y_train, alpha=alpha, solver=solver)
 
     w_gd = None
     if use_gradient_descent:
 # 直接调用已实现的gradient_descent函数
         w_gd = gradient_descent(phi, y_train, lr=0.01, epochs=1000)
 
-    def f(x):
-        phi0 = np.expand_dims(np.ones_like(x), axis=1)
-        phi1 = basis_func(x)
-        phi = np.concatenate([phi0, phi1], axis=1)
-        if use_gradient_descent and w_gd is not None:
-            return np.dot(phi, w_gd)
-        else:
-            return np.dot(phi, w_lsq)
-    return f, w_lsq, w_gd
-
-
-def evaluate(ys, ys_pred):
-    """评估模型。"""
-    # 计算预测值与真实值的标准差
-    std = np.sqrt(np.mean(np.abs(ys - ys_pred) ** 2))
-    return std
-
-
-def plot_results(x_train, y_train, x_test, y_test, y_test_pred):
-    """绘制训练集、测试集和预测结果"""
-    plt.plot(x_train, y_train, "ro", markersize=3)
-    plt.plot(x_test, y_test, "k")
-    plt.plot(x_test, y_test_pred, "k")
-    plt.xlabel("x")
-    plt.ylabel("y")
-    plt.title("Linear Regression")
-    plt.legend(["train", "test", "pred"])
-    plt.show()
-
-
-# 程序主入口（建议不要改动以下函数的接口）
-if __name__ == "__main__":
-    # 定义训练和测试数据文件路径
-    train_file = "train.txt"  # 训练集文件
-    test_file = "test.txt"  # 测试集文件
-    # 载入数据
-    x_train, y_train = load_data(
-        train_file
-    )  # 从文件加载训练数据，返回特征矩阵x_train和标签向量y_train
-    x_test, y_test = load_data(
-        test_file
-    )  # 从文件加载测试数据，返回特征矩阵x_test和标签向量y_test
-    print(x_train.shape)  # x_train.shape 返回训练集特征矩阵的维度信息
-    print(x_test.shape)  # x_test.shape 返回测试集特征矩阵的维度信息
-
-    # 使用线性回归训练模型，返回一个函数 f() 使得 y = f(x)
-    # f: 预测函数 y = f(x)
-    # w_lsq: 通过最小二乘法得到的权重向量
-    # w_gd: 通过梯度下降法得到的权重向量
-    f, w_lsq, w_gd = main(x_train, y_train)
+    w = w_gd if use_gradient_descent and w_gd is not None else w_lsq
 
+    def f(x):
+        # 分块计算 phi @ w，预测集很大时也不会构造完整的特征矩阵
+        return transform.predict(x, w)
     return f, w_lsq, w_gd
 
 
-
-def evaluate(ys, ys_pred):
-    """评估模型。"""
+def evaluate(ys, ys_pred, per_target=False):
+    """评估模型。
+    ys, ys_pred: 形状为 (N,) 或 (N, T)，两者形状必须相同
+    per_target: 多目标时是否分别返回每个目标的标准差（形状为 (T,)），默认返回所有目标合在一起的标准差
+    """
+    ys, ys_pred = np.asarray(ys), np.asarray(ys_pred)
+    # (N,) 与 (N, 1) 相减会被广播成 (N, N)，这里直接报错
+    if ys.shape != ys_pred.shape:
+        raise ValueError(f"真实值形状 {ys.shape} 与预测值形状 {ys_pred.shape} 不一致")
     # 计算预测值与真实值的标准差
+    if per_target:
+        return np.sqrt(np.mean(np.abs(ys - ys_pred) ** 2, axis=0))
     std = np.sqrt(np.mean(np.abs(ys - ys_pred) ** 2))
     return std
 
@@ -322,5 +649,40 @@ if __name__ == "__main__":
     std = evaluate(y_test, y_test_pred)
     print("预测值与真实值的标准差：{:.1f}".format(std))
 
+    # 高斯基函数的岭回归路径：一次 SVD 评估所有 alpha 的 GCV / LOO 误差
+    phi_train = BasisTransform("gaussian").transform(x_train)
+    path = RidgePath(phi_train, y_train)
+    alphas = np.logspace(-6, 3, 50)
+    best_gcv, _, _ = path.best_alpha(alphas, criterion="gcv")
+    best_loo, _, _ = path.best_alpha(alphas, criterion="loo")
+    print("高斯基函数岭回归：GCV 选择 alpha={:.2e}，LOO 选择 alpha={:.2e}".format(best_gcv, best_loo))
+
+    # 迭代优化器与闭式解的时间-精度对比（高斯基函数，训练集均方误差）
+    t0 = time.perf_counter()
+    loss_lsq = evaluate(y_train, phi_train @ least_squares(phi_train, y_train)) ** 2
+    print("闭式解: {:.4f}s, 损失 {:.4f}".format(time.perf_counter() - t0, loss_lsq))
+    for name, params in [("sgd", dict(lr=0.1)),
+                         ("sgd", dict(lr=1.0, line_search=True)),
+                         ("momentum", dict(lr=0.05, batch_size=32)),
+                         ("nesterov", dict(lr=0.05, batch_size=32)),
+                         ("adam", dict(lr=0.1, batch_size=32))]:
+        _, history = gradient_descent(phi_train, y_train, epochs=2000, optimizer=name, tol=1e-4,
+                                      random_state=0, return_history=True, **params)
+        print("{:>8s}{}: {:4d} 轮, {:.3f}s, 损失 {:.4f}".format(
+            name, "+线搜索" if params.get("line_search") else "", history["n_epochs"],
+            history["time"][-1], history["loss"][-1]))
+
+    # 多目标回归：同一组基函数同时拟合 T 条相关曲线（例如每个传感器的标定曲线），共享一次分解
+    rng = np.random.default_rng(0)
+    n_targets = 1000
+    Y_train = y_train[:, None] * rng.uniform(0.5, 2.0, n_targets) + rng.uniform(-3, 3, n_targets)
+    f_multi, W, _ = main(x_train, Y_train, basis_func=gaussian_basis, solver="svd")
+    rmse = evaluate(Y_train, f_multi(x_train), per_target=True)
+    print("多目标回归：权重形状 {}，各目标训练集标准差 {:.2f} ~ {:.2f}".format(W.shape, rmse.min(), rmse.max()))
+
+    # 分块流式求解：只保存 phi^T phi 和 phi^T y，可以处理无法一次载入内存的大文件
+    w_stream, _ = least_squares_stream(iter_data_chunks(train_file, chunk_size=64))
+    print("流式最小二乘与一次性求解的最大权重差：{:.2e}".format(np.max(np.abs(w_stream - w_lsq))))
+
     # 使用封装的绘图函数
     plot_results(x_train, y_train, x_test, y_test, y_test_pred)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# coding: utf-8
+# 线性回归的迭代优化器：小批量随机梯度下降、动量、Nesterov 动量、Adam，
+# 以及学习率调度、回溯线搜索和基于容差的提前停止。
+# 损失函数与 exercise-linear_regression.py 中的 gradient_descent 一致：
+#     J(w) = 1/m * ||φw - y||² + alpha * ||w||²
+import time # 记录每轮耗时
+
+import numpy as np # 导入NumPy库，用于高效的数值计算和数组操作
+
+
+def iter_minibatches(n_samples, batch_size=None, shuffle=True, rng=None):
+    """按小批量生成样本索引。
+    Args:
+        n_samples: 样本数
+        batch_size: 每批样本数，None 表示全批量
+        shuffle: 每轮是否打乱样本顺序
+        rng: np.random.Generator，打乱顺序用的随机数生成器
+    Yields:
+        np.ndarray 或 slice: 当前批次的样本索引
+    """
+    if batch_size is None or batch_size >= n_samples:
+        yield slice(None)  # 全批量时直接用切片，避免复制整个设计矩阵
+        return
+    if shuffle:
+        order = (rng if rng is not None else np.random.default_rng()).permutation(n_samples)
+        for start in range(0, n_samples, batch_size):
+            yield order[start:start + batch_size]
+    else:
+        for start in range(0, n_samples, batch_size):
+            yield slice(start, start + batch_size)
+
+
+def loss_and_grad(phi, y, w, alpha=0.0):
+    """均方误差损失及其梯度。
+    Returns:
+        tuple: (loss, grad)，grad 的形状与 w 相同
+    """
+    error = phi @ w - y
+    m = len(y)
+    loss = np.sum(error ** 2) / m + alpha * np.sum(w ** 2)
+    grad = 2 * (phi.T @ error) / m + 2 * alpha * w
+    return loss, grad
+
+
+# ---------------------------------------------------------------- 学习率调度
+# 调度函数接收轮数（从0开始），返回学习率的缩放系数
+
+def constant_schedule():
+    return lambda epoch: 1.0
+
+
+def exponential_decay(rate=0.99):
+    """lr_t = lr * rate^t"""
+    return lambda epoch: rate ** epoch
+
+
+def inverse_time_decay(rate=0.01):
+    """lr_t = lr / (1 + rate * t)"""
+    return lambda epoch: 1.0 / (1.0 + rate * epoch)
+
+
+def step_decay(drop=0.5, every=100):
+    """每 every 轮学习率乘以 drop"""
+    return lambda epoch: drop ** (epoch // every)
+
+
+SCHEDULES = {
+    "constant": constant_schedule,
+    "exponential": exponential_decay,
+    "inverse_time": inverse_time_decay,
+    "step": step_decay,
+}
+
+
+# ---------------------------------------------------------------- 优化器
+# 每个优化器的 step(w, grad, lr) 原地更新 w
+
+class SGD:
+    """
+    随机梯度下降，可选（Nesterov）动量
+
+    momentum=0 时为普通 SGD：w -= lr * g
+    动量：v = momentum * v - lr * g；w += v
+    Nesterov：在同样的速度更新下，w += momentum * v - lr * g（等价于在前瞻点处求梯度）
+    """
+
+    def __init__(self, momentum=0.0, nesterov=False):
+        if nesterov and momentum <= 0:
+            raise ValueError("Nesterov 动量要求 momentum > 0")
+        self.momentum = momentum
+        self.nesterov = nesterov
+        self.velocity = None
+
+    def step(self, w, grad, lr):
+        if self.momentum == 0:
+            w -= lr * grad
+            return
+        if self.velocity is None:
+            self.velocity = np.zeros_like(w)
+        v = self.velocity
+        v *= self.momentum
+        v -= lr * grad
+        if self.nesterov:
+            w += self.momentum * v - lr * grad
+        else:
+            w += v
+
+
+class Adam:
+    """
+    Adam：一阶、二阶矩的指数滑动平均并做偏差修正
+    w -= lr * m_hat / (sqrt(v_hat) + eps)
+    """
+
+    def __init__(self, beta1=0.9, beta2=0.999, eps=1e-8):
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+        self.m = None
+        self.v = None
+        self.t = 0
+
+    def step(self, w, grad, lr):
+        if self.m is None:
+            self.m = np.zeros_like(w)
+            self.v = np.zeros_like(w)
+        self.t += 1
+        self.m *= self.beta1
+        self.m += (1 - self.beta1) * grad
+        self.v *= self.beta2
+        self.v += (1 - self.beta2) * grad ** 2
+        # 偏差修正合并进步长
+        step = lr * np.sqrt(1 - self.beta2 ** self.t) / (1 - self.beta1 ** self.t)
+        w -= step * self.m / (np.sqrt(self.v) + self.eps)
+
+
+def make_optimizer(name, momentum=0.9, **kwargs):
+    """按名称构造优化器：'sgd'、'momentum'、'nesterov'、'adam'"""
+    if name == "sgd":
+        return SGD()
+    if name == "momentum":
+        return SGD(momentum=momentum)
+    if name == "nesterov":
+        return SGD(momentum=momentum, nesterov=True)
+    if name == "adam":
+        return Adam(**kwargs)
+    raise ValueError(f"不支持的优化器: {name}，支持的选项有 'sgd', 'momentum', 'nesterov', 'adam'")
+
+
+def backtracking_line_search(phi, y, w, loss, grad, lr, alpha=0.0, shrink=0.5, c=1e-4, max_steps=50):
+    """回溯线搜索（Armijo 条件）：从 lr 开始不断缩小步长，直到损失充分下降。
+    Returns:
+        tuple: (步长, 新的 w, 新的损失)
+    """
+    g2 = np.sum(grad ** 2)
+    for _ in range(max_steps):
+        w_new = w - lr * grad
+        error = phi @ w_new - y
+        new_loss = np.sum(error ** 2) / len(y) + alpha * np.sum(w_new ** 2)
+        if new_loss <= loss - c * lr * g2:
+            return lr, w_new, new_loss
+        lr *= shrink
+    return lr, w_new, new_loss
+
+
+def fit(phi, y, optimizer="sgd", lr=0.01, epochs=1000, batch_size=None, alpha=0.0,
+        lr_schedule=None, line_search=False, tol=None, n_iter_no_change=5,
+        w0=None, random_state=None, verbose=False):
+    """用迭代优化器最小化 J(w) = 1/m * ||φw - y||² + alpha * ||w||²。
+
+    参数:
+    phi (np.ndarray): 设计矩阵，形状为 (n_samples, n_features)
+    y (np.ndarray): 目标值，形状为 (n_samples,) 或 (n_samples, n_targets)
+    optimizer: 'sgd'、'momentum'、'nesterov'、'adam'，或带 step(w, grad, lr) 方法的对象
+    lr (float): 初始学习率；line_search=True 时为每步线搜索的初始步长
+    epochs (int): 最大轮数
+    batch_size (int): 小批量大小，None 表示全批量
+    alpha (float): L2 正则化参数
+    lr_schedule: None、SCHEDULES 中的名称，或函数 epoch -> 学习率缩放系数
+    line_search (bool): 是否在每个批次上做回溯线搜索（只支持 optimizer='sgd'）
+    tol (float): 提前停止的容差；连续 n_iter_no_change 轮的损失下降都小于 tol * 当前损失时停止，
+                 None 表示跑满 epochs 轮
+    n_iter_no_change (int): 提前停止需要的连续轮数
+    w0 (np.ndarray): 初始权重，默认全零
+    random_state: 打乱小批量顺序的随机种子
+    verbose (bool): 是否打印每轮损失和耗时
+
+    返回:
+    tuple: (w, history)，history 为 dict，包含每轮的
+           'loss'（该轮各批次损失按样本数加权的平均值，对全批量即为更新前的损失）、
+           'epoch_time'（该轮耗时，秒）、'time'（累计耗时，秒）、'lr'，以及 'n_epochs' 和 'converged'
+    """
+    phi = np.asarray(phi, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n_samples = len(y)
+    rng = np.random.default_rng(random_state)
+    opt = make_optimizer(optimizer) if isinstance(optimizer, str) else optimizer
+    if line_search and not (isinstance(opt, SGD) and opt.momentum == 0):
+        raise ValueError("线搜索只支持不带动量的 SGD")
+    if lr_schedule is None:
+        schedule = constant_schedule()
+    elif isinstance(lr_schedule, str):
+        if lr_schedule not in SCHEDULES:
+            raise ValueError(f"不支持的学习率调度: {lr_schedule}，支持的选项有 {list(SCHEDULES)}")
+        schedule = SCHEDULES[lr_schedule]()
+    else:
+        schedule = lr_schedule
+
+    w = np.zeros((phi.shape[1],) + y.shape[1:]) if w0 is None else np.array(w0, dtype=np.float64)
+    history = {"loss": [], "epoch_time": [], "time": [], "lr": [], "n_epochs": 0, "converged": False}
+    start = time.perf_counter()
+    no_change = 0
+    for epoch in range(epochs):
+        t0 = time.perf_counter()
+        lr_epoch = lr * schedule(epoch)
+        total = 0.0
+        for idx in iter_minibatches(n_samples, batch_size, shuffle=True, rng=rng):
+            phi_b, y_b = phi[idx], y[idx]
+            loss, grad = loss_and_grad(phi_b, y_b, w, alpha)
+            total += loss * len(y_b)
+            if line_search:
+                _, w, _ = backtracking_line_search(phi_b, y_b, w, loss, grad, lr_epoch, alpha)
+            else:
+                opt.step(w, grad, lr_epoch)
+        epoch_loss = total / n_samples
+        if not np.isfinite(epoch_loss):
+            raise FloatingPointError(f"第 {epoch} 轮损失发散（{epoch_loss}），请减小学习率")
+
+        now = time.perf_counter()
+        history["loss"].append(epoch_loss)
+        history["epoch_time"].append(now - t0)
+        history["time"].append(now - start)
+        history["lr"].append(lr_epoch)
+        history["n_epochs"] = epoch + 1
+        if verbose:
+            print(f"epoch {epoch:4d}  loss {epoch_loss:.6f}  lr {lr_epoch:.3g}  time {now - t0:.4f}s")
+
+        if tol is not None and epoch > 0:
+            prev = history["loss"][-2]
+            no_change = no_change + 1 if prev - epoch_loss < tol * abs(epoch_loss) else 0
+            if no_change >= n_iter_no_change:
+                history["converged"] = True
+                break
+    return w, history
@@ -1,21 +1,92 @@
+import collections
+import itertools
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import os
+import warnings
 
-def load_data(fname):
-    """载入数据。"""
+def _cache_path(fname):
+    """数据文件对应的二进制缓存路径，文件名中包含源文件的大小和修改时间，源文件变化后自动失效"""
+    st = os.stat(fname)
+    directory, base = os.path.split(os.path.abspath(fname))
+    return os.path.join(directory, f'.{base}.{st.st_size}-{st.st_mtime_ns}.npy')
+
+
+def load_data(fname, cache=True, mmap=False):
+    """载入数据，返回 (样本数, 特征数 + 1) 的数组，最后一列为标签。
+    
+    整个文件一次性解析（支持任意列数），解析结果保存为同目录下的隐藏 .npy 缓存，
+    缓存以源文件的大小和修改时间为键，再次载入同一文件时直接读取缓存。
+    
+    参数:
+        fname: 数据文件路径（第一行为表头）
+        cache: 是否读写二进制缓存
+        mmap: 是否以只读内存映射方式打开缓存（适合很大的数据文件）
+    """
     # 检查文件是否存在，确保数据加载的可靠性
     if not os.path.exists(fname): 
         raise FileNotFoundError(f"数据文件未找到: {fname}\n请确认文件路径是否正确，当前工作目录为: {os.getcwd()}") # 如果文件不存在，抛出异常
-    with open(fname, 'r') as f: # 打开文件
-        data = [] # 初始化一个空列表，用于存储数据
-        line = f.readline()  # 跳过表头行
-        for line in f:
-            line = line.strip().split()  # 去除空白并按空格分割
-            x1 = float(line[0])  # 特征1：例如坐标x
-            x2 = float(line[1])  # 特征2：例如坐标y
-            t = int(line[2])     # 标签：0或1
-            data.append([x1, x2, t])
-        return np.array(data)  # 返回numpy数组，便于矩阵运算
+    if not cache:
+        return np.loadtxt(fname, skiprows=1, ndmin=2)  # 跳过表头行，整体解析
+
+    path = _cache_path(fname)
+    if os.path.exists(path):
+        return np.load(path, mmap_mode='r' if mmap else None)
+
+    data = np.loadtxt(fname, skiprows=1, ndmin=2)
+    prefix = os.path.basename(path).rsplit('.', 2)[0] + '.'
+    directory = os.path.dirname(path)
+    try:
+        # 先写临时文件再改名，避免其他进程读到写了一半的缓存
+        tmp = path + f'.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            np.save(f, data)
+        os.replace(tmp, path)
+        # 删除源文件旧版本留下的缓存
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name.endswith('.npy') and os.path.join(directory, name) != path:
+                os.remove(os.path.join(directory, name))
+    except OSError:
+        pass  # 目录不可写时只是不缓存
+    if mmap:
+        return np.load(path, mmap_mode='r') if os.path.exists(path) else data
+    return data  # 返回numpy数组，便于矩阵运算
+
+
+def iter_chunks(fname, chunk_size=1024, epochs=1, shuffle_buffer=0, seed=None):
+    """按块读取数据文件，每次返回最多 chunk_size 行的数组（最后一列为标签）。
+    
+    文件不会整体读入内存，适合流式训练超出内存的大文件；epochs > 1 时重复读取文件。
+    数据文件通常按类别排好序，随机梯度类方法需要打乱顺序：shuffle_buffer > 0 时
+    维护一个最多 shuffle_buffer 行的缓冲区，每次从中随机取出 chunk_size 行，
+    内存占用只与缓冲区大小有关。
+    """
+    if not os.path.exists(fname):
+        raise FileNotFoundError(f"数据文件未找到: {fname}\n请确认文件路径是否正确，当前工作目录为: {os.getcwd()}")
+    rng = np.random.default_rng(seed)
+    buffer = None
+    for _ in range(epochs):
+        with open(fname, 'r') as f:
+            f.readline()  # 跳过表头行
+            while True:
+                lines = list(itertools.islice(f, chunk_size))
+                if not lines:
+                    break
+                chunk = np.loadtxt(lines, ndmin=2)  # 整块一次解析
+                if shuffle_buffer <= 0:
+                    yield chunk
+                    continue
+                buffer = chunk if buffer is None else np.concatenate([buffer, chunk])
+                while len(buffer) >= max(shuffle_buffer, chunk_size):
+                    pick = rng.choice(len(buffer), chunk_size, replace=False)
+                    yield buffer[pick]
+                    buffer = np.delete(buffer, pick, axis=0)
+    # 把缓冲区中剩余的数据打乱后输出
+    if buffer is not None and len(buffer):
+        buffer = buffer[rng.permutation(len(buffer))]
+        for start in range(0, len(buffer), chunk_size):
+            yield buffer[start:start + chunk_size]
+
 
 def eval_acc(label, pred):
     """计算准确率。
@@ -29,19 +100,156 @@ def eval_acc(label, pred):
     """
     return np.sum(label == pred) / len(pred)  # 正确预测的样本比例
 
+def linear_kernel(X1, X2):
+    """线性核：K(x, z) = x·z"""
+    return np.dot(X1, X2.T)
+
+
+def poly_kernel(X1, X2, gamma=1.0, degree=3, coef0=1.0):
+    """多项式核：K(x, z) = (gamma * x·z + coef0)^degree"""
+    return (gamma * np.dot(X1, X2.T) + coef0) ** degree
+
+
+def rbf_kernel(X1, X2, gamma=1.0):
+    """高斯核：K(x, z) = exp(-gamma * ||x - z||^2)"""
+    sq = (np.sum(X1 ** 2, axis=1)[:, None] + np.sum(X2 ** 2, axis=1)[None, :]
+          - 2 * np.dot(X1, X2.T))
+    return np.exp(-gamma * np.maximum(sq, 0))  # 浮点误差可能产生很小的负距离
+
+
+class KernelCache:
+    """核矩阵的行缓存（LRU）。
+    
+    SMO每次迭代只需要工作集中两个样本对应的核矩阵行，
+    因此按需计算整行并缓存，容量按MB计，超出后淘汰最久未使用的行，
+    避免为大数据集一次性构造 m x m 的核矩阵。
+    """
+
+    def __init__(self, X, kernel, cache_size=100, diag=None):
+        """
+        参数:
+            X: 训练样本 (m, n)
+            kernel: 核函数 kernel(X1, X2) -> (len(X1), len(X2))
+            cache_size: 缓存大小（MB）
+            diag: 核矩阵对角线 K(x_i, x_i)，形状 (m,)；为None时按块调用 kernel 计算
+        """
+        self.X = X
+        self.kernel = kernel
+        row_bytes = len(X) * np.dtype(np.float64).itemsize
+        self.max_rows = max(2, int(cache_size * 1024 * 1024 // row_bytes))  # 至少容纳工作集的两行
+        self._rows = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # 核矩阵对角线 K(x_i, x_i) 单独预先计算；没有给出时每次取一个对角块，避免逐样本调用核函数
+        if diag is None:
+            block = 256
+            diag = np.concatenate([np.diag(kernel(X[s:s + block], X[s:s + block]))
+                                   for s in range(0, len(X), block)]) if len(X) else np.zeros(0)
+        self.diag = diag
+
+    def row(self, i):
+        """返回核矩阵第i行 K(x_i, X)"""
+        row = self._rows.get(i)
+        if row is not None:
+            self._rows.move_to_end(i)  # 标记为最近使用
+            self.hits += 1
+            return row
+        self.misses += 1
+        row = self.kernel(self.X[i:i + 1], self.X)[0]
+        self._rows[i] = row
+        if len(self._rows) > self.max_rows:
+            self._rows.popitem(last=False)  # 淘汰最久未使用的行
+        return row
+
+
 class SVM:
-    """SVM模型：基于最大间隔分类的监督学习算法。"""
+    """SVM模型：基于最大间隔分类的监督学习算法。
+    
+    kernel=None 时在原始问题上用梯度下降训练线性SVM；
+    kernel 为 'linear' / 'poly' / 'rbf' 时用SMO算法求解对偶问题，支持非线性分类。
+    """
 #支持向量机（Support Vector Machine, SVM） 是一种经典的监督学习算法，主要用于分类（也可用于回归和异常检测）。
-    def __init__(self):
+    def __init__(self, kernel=None, C=1.0, gamma=None, degree=3, coef0=1.0, tol=1e-3, cache_size=100,
+                 max_iter=None):
+        """
+        参数:
+            kernel: None（原始问题梯度下降）或 'linear' / 'poly' / 'rbf'（对偶问题SMO）
+            C: 软间隔惩罚系数（SMO）
+            gamma: 多项式核/高斯核的系数，默认 1 / (特征数 * 特征方差)
+            degree: 多项式核的次数
+            coef0: 多项式核的常数项
+            tol: SMO的KKT违反容忍度
+            cache_size: SMO核矩阵行缓存大小（MB）
+            max_iter: 最大迭代次数，默认梯度下降1000次、SMO为 max(10000000, 100 * 样本数)（与libsvm相同）；
+                      SMO达到上限仍未收敛时给出 RuntimeWarning
+        """
         # 超参数设置
         self.learning_rate = 0.01  # 控制梯度下降步长
         self.reg_lambda = 0.01     # L2正则化系数，平衡间隔最大化与分类误差
-        self.max_iter = 1000       # 最大训练迭代次数
+        self.max_iter = max_iter   # 最大训练迭代次数
         self.w = None              # 权重向量，决定分类超平面的方向
         self.b = None              # 偏置项，决定分类超平面的位置
 
+        # 对偶问题（SMO）相关参数
+        self.kernel = kernel
+        self.C = C
+        self.gamma = gamma
+        self.degree = degree
+        self.coef0 = coef0
+        self.tol = tol
+        self.cache_size = cache_size
+        self.gamma_ = None           # 训练时实际使用的核系数
+        self.support = None          # 支持向量在训练集中的下标
+        self.support_vectors = None  # 支持向量 x_i（alpha_i > 0）
+        self.dual_coef = None        # 支持向量对应的 alpha_i * y_i
+        self.n_iter = 0              # 实际迭代次数（流式训练时为已处理的小批量数）
+        self.pegasos_t = 0           # Pegasos的步数t，决定步长 1/(lambda*t)，与 n_iter 分开计数
+        self.converged = None        # SMO是否在 max_iter 之内满足KKT条件
+
+        self.neg_label = None  # 负类的原始标签（数据可能用0或-1表示负类），在 train / 第一次 partial_fit 时确定
+
+    def _split_labels(self, y):
+        """记录负类的原始标签，并把标签转换为{-1, 1}，符合SVM理论要求"""
+        self.neg_label = 0 if np.any(y == 0) else -1
+        return np.where(y == 1, 1, -1)
+
+    @staticmethod
+    def default_gamma(X):
+        """默认核系数 1 / (特征数 * 特征方差)"""
+        X_var = X.var()
+        return 1.0 / (X.shape[1] * X_var if X_var > 0 else 1.0)
+
+    def kernel_matrix(self, X1, X2):
+        """按超参数计算核矩阵 K(X1, X2)（训练后使用确定下来的 gamma_）"""
+        if self.kernel == 'linear':
+            return linear_kernel(X1, X2)
+        if self.kernel == 'poly':
+            return poly_kernel(X1, X2, self.gamma_, self.degree, self.coef0)
+        if self.kernel == 'rbf':
+            return rbf_kernel(X1, X2, self.gamma_)
+        raise ValueError(f"未知的核函数: {self.kernel}")
+
+    def kernel_diag(self, X):
+        """核矩阵对角线 K(x_i, x_i)，向量化计算，不构造核矩阵"""
+        if self.kernel == 'linear':
+            return np.einsum('ij,ij->i', X, X)
+        if self.kernel == 'poly':
+            return (self.gamma_ * np.einsum('ij,ij->i', X, X) + self.coef0) ** self.degree
+        if self.kernel == 'rbf':
+            return np.ones(len(X))  # ||x - x||^2 = 0
+        raise ValueError(f"未知的核函数: {self.kernel}")
+
     def train(self, data_train):
-        """训练SVM模型（基于hinge loss + L2正则化）
+        """训练SVM模型，data_train 的最后一列为标签，其余列为特征"""
+        X = data_train[:, :-1]                   # 提取特征矩阵
+        y = self._split_labels(data_train[:, -1])  # 提取标签并转换为{-1, 1}
+        if self.kernel is None:
+            self._train_gd(X, y)
+        else:
+            self._train_smo(X, y)
+
+    def _train_gd(self, X, y):
+        """训练线性SVM模型（基于hinge loss + L2正则化）
         
         算法核心：
         1. 寻找能最大化间隔的超平面 wx + b = 0
@@ -49,16 +257,14 @@ class SVM:
         3. 使用hinge loss处理分类错误和边界样本
         4. 添加L2正则化防止过拟合
         """
-        X = data_train[:, :2]         # 提取特征矩阵
-        y = data_train[:, 2]          # 提取标签
-        y = np.where(y == 0, -1, 1)   # 将标签转换为{-1, 1}，符合SVM理论要求
         m, n = X.shape                # m:样本数，n:特征数
+        max_iter = self.max_iter if self.max_iter is not None else 1000
 
         # 初始化模型参数
         self.w = np.zeros(n)  # 权重向量初始化为0
         self.b = 0            # 偏置项初始化为0
 
-        for epoch in range(self.max_iter):
+        for epoch in range(max_iter):
             # 计算函数间隔：y(wx+b)，衡量样本到超平面的距离和方向
             margin = y * (np.dot(X, self.w) + self.b)
             
@@ -70,11 +276,12 @@ class SVM:
             # 移除continue语句，确保即使所有样本都满足间隔条件
             # 也会更新权重以优化正则化项
 
-            # 计算梯度：正则化项梯度 + 误分类样本梯度
+            # 计算梯度：正则化项梯度 + 误分类样本梯度（hinge loss对全部m个样本取平均，
+            # 没有违反间隔的样本时该项为0）
             # L2正则化：减小权重，防止过拟合
             # hinge loss梯度：只对误分类和边界样本计算梯度
-            dw = (2 * self.reg_lambda * self.w) - np.mean(y[idx].reshape(-1, 1) * X[idx], axis=0)
-            db = -np.mean(y[idx])
+            dw = (2 * self.reg_lambda * self.w) - np.dot(y[idx], X[idx]) / m
+            db = -np.sum(y[idx]) / m
 
             # 梯度下降更新参数
             self.w -= self.learning_rate * dw # 权重更新：w = w - η*dw/dw
@@ -84,6 +291,194 @@ class SVM:
             # - 对误分类样本，向正确方向调整超平面
             # - 对间隔内样本，微调超平面使其远离
             # - 正则化项约束权重大小，使间隔更平滑
+        self.n_iter = max_iter
+        # 之后调用 partial_fit 时从梯度下降的结果热启动：把它看作已经执行了m步的Pegasos，
+        # 第一步的步长为 1/(lambda*(m+1))，而不是会完全覆盖w的 1/lambda
+        self.pegasos_t = m
+
+    def _train_smo(self, X, y):
+        """用SMO算法求解对偶问题
+        
+            min_a  1/2 a^T Q a - e^T a,   Q_ij = y_i y_j K(x_i, x_j)
+            s.t.   0 <= a_i <= C,  y^T a = 0
+        
+        每次迭代按二阶信息选择违反KKT条件最严重的一对变量 (i, j)（Fan, Chen & Lin 2005 的WSS2），
+        解析求解这两个变量的子问题并增量更新梯度 G = Q a - e。
+        只用到核矩阵的第i、j两行，由 KernelCache 按需计算并缓存。
+        """
+        m, n = X.shape
+        self.gamma_ = self.gamma if self.gamma is not None else self.default_gamma(X)
+        cache = KernelCache(X, self.kernel_matrix, self.cache_size, diag=self.kernel_diag(X))
+        # 未缩放的特征会使SMO需要很多次迭代，默认上限取得足够大（同libsvm），达到上限时给出警告
+        max_iter = self.max_iter if self.max_iter is not None else max(10000000, 100 * m)
+        C, tau = self.C, 1e-12
+
+        alpha = np.zeros(m)
+        G = -np.ones(m)  # 梯度 Q a - e，a=0 时为 -1
+        self.n_iter = 0
+        self.converged = False
+        while self.n_iter < max_iter:
+            # 可以沿 y_t 方向增大/减小的变量集合
+            up = ((y == 1) & (alpha < C)) | ((y == -1) & (alpha > 0))
+            low = ((y == 1) & (alpha > 0)) | ((y == -1) & (alpha < C))
+            yG = -y * G
+
+            # 第一个变量：I_up 中 -y_t G_t 最大者
+            i = int(np.argmax(np.where(up, yG, -np.inf)))
+            G_max = yG[i]
+            G_min = np.min(yG[low]) if low.any() else np.inf
+            if G_max - G_min < self.tol:
+                self.converged = True
+                break  # 满足KKT条件，已收敛
+
+            # 第二个变量：在 I_low 中选使目标函数下降最多的（二阶近似 -b^2 / a）
+            K_i = cache.row(i)
+            b = G_max - yG
+            a = K_i[i] + cache.diag - 2 * K_i
+            a = np.where(a > 0, a, tau)
+            gain = np.where(low & (yG < G_max), -b * b / a, np.inf)
+            j = int(np.argmin(gain))
+            K_j = cache.row(j)
+
+            # 解析求解两个变量的子问题，并裁剪到 [0, C]，保持 y^T a 不变
+            old_ai, old_aj = alpha[i], alpha[j]
+            total = y[i] * old_ai + y[j] * old_aj
+            ai = np.clip(old_ai + y[i] * b[j] / a[j], 0, C)
+            aj = np.clip(y[j] * (total - y[i] * ai), 0, C)
+            ai = y[i] * (total - y[j] * aj)
+            alpha[i], alpha[j] = ai, aj
+
+            # 增量更新梯度：G += Q[:, i] * da_i + Q[:, j] * da_j
+            G += y * (y[i] * (ai - old_ai) * K_i + y[j] * (aj - old_aj) * K_j)
+            self.n_iter += 1
+
+        if not self.converged:
+            warnings.warn(f"SMO达到最大迭代次数 {max_iter} 仍未收敛（KKT违反量超过 tol={self.tol}），"
+                          f"可以增大 max_iter 或先对特征做标准化", RuntimeWarning)
+
+        # 偏置：自由支持向量（0 < a < C）上 y_i G_i 的平均值；没有自由支持向量时取上下界中点
+        yG = y * G
+        at_upper = alpha >= C
+        at_lower = alpha <= 0
+        free = ~(at_upper | at_lower)
+        if free.any():
+            rho = np.mean(yG[free])
+        else:
+            ub_mask = (at_upper & (y == -1)) | (at_lower & (y == 1))
+            lb_mask = (at_upper & (y == 1)) | (at_lower & (y == -1))
+            ub = np.min(yG[ub_mask]) if ub_mask.any() else np.inf
+            lb = np.max(yG[lb_mask]) if lb_mask.any() else -np.inf
+            rho = (ub + lb) / 2
+
+        # 只保留支持向量，预测时只需与它们计算核函数
+        sv = alpha > 0
+        self.support = np.flatnonzero(sv)  # 支持向量在训练集中的下标
+        self.support_vectors = X[sv]
+        self.dual_coef = alpha[sv] * y[sv]
+        self.b = -rho
+        self.cache_hits, self.cache_misses = cache.hits, cache.misses
+        # 线性核可以直接还原出权重向量
+        self.w = np.dot(self.dual_coef, self.support_vectors) if self.kernel == 'linear' else None
+
+    def partial_fit(self, X, y, neg_label=None):
+        """用一个小批量做一步Pegasos随机次梯度更新（线性SVM，可以反复调用做增量训练）
+        
+        目标函数为 lambda/2 ||w||^2 + mean(hinge)，第t步步长为 1/(lambda*t)：
+            w <- (1 - 1/t) w + 1/(lambda*t*|B|) * sum_{i in B, y_i(wx_i+b)<1} y_i x_i
+        然后投影到半径为 1/sqrt(lambda) 的球内。偏置b作为常数特征对应的权重一起更新。
+        步数t单独记录在 pegasos_t 中；先用 train() 训练（kernel=None）再调用时，
+        从梯度下降得到的w、b继续更新，t从训练样本数m开始计数。只支持 kernel=None 的模型。
+        
+        负类标签（0或-1）只在第一次调用时确定：传入 neg_label，或者根据第一个小批量推断
+        （含0时为0，否则为-1），之后的小批量必须使用同一约定。第一个小批量可能只含正类时，
+        应显式传入 neg_label。
+
+        参数:
+            X: 小批量特征 (k, n)
+            y: 小批量标签（1为正类，0或-1为负类）
+            neg_label: 负类标签 0 或 -1，默认沿用已确定的约定，尚未确定时从 y 推断
+        """
+        if self.kernel is not None:
+            raise ValueError("partial_fit 只支持线性SVM（kernel=None），核SVM请用 train 重新训练")
+        if neg_label is not None:
+            if neg_label not in (0, -1):
+                raise ValueError(f"neg_label 只能是 0 或 -1，得到 {neg_label}")
+            if self.neg_label is not None and self.w is not None and neg_label != self.neg_label:
+                raise ValueError(f"neg_label={neg_label} 与已确定的负类标签 {self.neg_label} 不一致")
+            self.neg_label = neg_label
+        elif self.neg_label is None or self.w is None:
+            self.neg_label = 0 if np.any(y == 0) else -1
+        if not np.all((y == 1) | (y == self.neg_label)):
+            raise ValueError(f"标签只能是 1 或 {self.neg_label}（负类标签在第一次调用时确定，"
+                             f"可以通过 neg_label 参数指定）")
+        y = np.where(y == 1, 1, -1)
+        if self.w is None:
+            self.w = np.zeros(X.shape[1])
+            self.b = 0.0
+            self.pegasos_t = 0
+        self.n_iter += 1
+        self.pegasos_t += 1
+        lam = self.reg_lambda
+        eta = 1.0 / (lam * self.pegasos_t)
+
+        # 只在当前小批量上计算间隔，不需要遍历整个训练集
+        idx = np.where(y * (np.dot(X, self.w) + self.b) < 1)[0]
+        scale = 1.0 - eta * lam
+        self.w = scale * self.w + eta / len(y) * np.dot(y[idx], X[idx])
+        self.b = scale * self.b + eta / len(y) * np.sum(y[idx])
+
+        # 投影：最优解满足 ||w|| <= 1/sqrt(lambda)
+        norm = np.sqrt(np.dot(self.w, self.w) + self.b ** 2)
+        radius = 1.0 / np.sqrt(lam)
+        if norm > radius:
+            self.w *= radius / norm
+            self.b *= radius / norm
+        return self
+
+    def objective(self, X, y):
+        """Pegasos的原始目标函数值 lambda/2 ||w||^2 + mean(hinge)"""
+        y = np.where(y == 1, 1, -1)
+        hinge = np.maximum(0, 1 - y * (np.dot(X, self.w) + self.b))
+        return 0.5 * self.reg_lambda * np.dot(self.w, self.w) + np.mean(hinge)
+
+    def train_stream(self, batches, val_data=None, eval_every=10, patience=20, tol=1e-4, neg_label=None):
+        """流式（小批量）训练：依次用 batches 中的每个小批量调用 partial_fit
+        
+        参数:
+            batches: 小批量数据的可迭代对象，每个元素是最后一列为标签的数组（例如 iter_chunks 的返回值）
+            val_data: 验证集（同样最后一列为标签），用于提前停止；为None时不提前停止
+            eval_every: 每处理多少个小批量在验证集上评估一次目标函数
+            patience: 验证集目标函数连续多少次评估没有下降超过 tol 就停止
+            tol: 判定目标函数下降的相对阈值
+            neg_label: 负类标签 0 或 -1，默认从第一个小批量推断（见 partial_fit）
+        返回:
+            每次评估的验证集目标函数值列表
+        """
+        # 从零开始训练（不使用之前 train / partial_fit 得到的参数）
+        self.w = None
+        self.n_iter = 0
+        history = []
+        best, bad_rounds = np.inf, 0
+        for batch in batches:
+            self.partial_fit(batch[:, :-1], batch[:, -1], neg_label)
+            if val_data is None or self.n_iter % eval_every:
+                continue
+            obj = self.objective(val_data[:, :-1], val_data[:, -1])
+            history.append(obj)
+            if obj < best - tol * abs(best if np.isfinite(best) else obj):
+                best, bad_rounds = obj, 0
+            else:
+                bad_rounds += 1
+                if bad_rounds >= patience:
+                    break  # 验证集目标函数不再下降，提前停止
+        return history
+
+    def decision_function(self, x):
+        """决策函数值（样本到超平面的有符号函数距离）"""
+        if self.w is not None:
+            return np.dot(x, self.w) + self.b
+        # 核SVM：f(x) = sum_i alpha_i y_i K(x_i, x) + b，只对支持向量求和
+        return np.dot(self.kernel_matrix(x, self.support_vectors), self.dual_coef) + self.b
 
     def predict(self, x):
         """预测标签。
@@ -91,40 +486,175 @@ class SVM:
         预测逻辑：
         1. 计算样本到超平面的有符号距离 wx + b
         2. 距离为正 -> 预测为正类(1)
-        3. 距离为负 -> 预测为负类(0)
+        3. 距离为负 -> 预测为负类(训练数据中的负类标签，0或-1)
+        """
+        score = self.decision_function(x)             # 计算决策函数值
+        return np.where(score >= 0, 1, self.neg_label)  # 转换回原始标签格式
+
+def _fit_binary(task):
+    """训练一个二分类SVM（模块级函数，便于在进程池中pickle传递）"""
+    params, X, y = task
+    svm = SVM(**params)
+    svm.train(np.column_stack([X, y]))
+    return svm
+
+
+class MulticlassSVM:
+    """多分类SVM：把多分类问题拆成若干个二分类SVM。
+    
+    strategy='ovr'（一对其余）为每个类别训练一个"该类 vs 其他类"的分类器，预测取得分最大的类别；
+    strategy='ovo'（一对一）为每两个类别训练一个分类器，预测时投票。
+    各个二分类器相互独立，在进程池中并行训练。训练完成后所有分类器的参数拼成一个矩阵：
+    线性模型拼成权重矩阵 W (K, n)，核模型把各自的支持向量合并、对偶系数拼成 (S, K) 的矩阵，
+    预测 N 个样本只需一次矩阵乘法得到全部 K 个分类器的得分。
+    """
+
+    def __init__(self, strategy='ovr', n_jobs=None, **svm_params):
         """
-        score = np.dot(x, self.w) + self.b     # 计算决策函数值
-        return np.where(score >= 0, 1, 0)      # 转换回{0, 1}标签格式
+        参数:
+            strategy: 'ovr' 或 'ovo'
+            n_jobs: 并行训练的进程数，默认为CPU核数，1表示在当前进程中依次训练
+            svm_params: 传给每个二分类 SVM 的参数（kernel、C、gamma 等）
+        """
+        if strategy not in ('ovr', 'ovo'):
+            raise ValueError(f"未知的多分类策略: {strategy}")
+        self.strategy = strategy
+        self.n_jobs = n_jobs
+        self.svm_params = svm_params
+        self.classes = None     # 所有类别标签
+        self.estimators = []    # 二分类SVM列表
+        self.pairs = None       # ovo 时每个分类器对应的 (正类下标, 负类下标)
+        self.W = None           # 线性模型的权重矩阵 (K, n)
+        self.B = None           # 各分类器的偏置 (K,)
+        self.support_vectors = None  # 核模型：所有分类器支持向量的并集 (S, n)
+        self.dual_coef = None        # 核模型：对偶系数矩阵 (S, K)
+
+    def _fit_all(self, tasks):
+        """训练全部二分类器，n_jobs != 1 时使用进程池"""
+        if self.n_jobs == 1 or len(tasks) == 1:
+            return [_fit_binary(task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as pool:
+            return list(pool.map(_fit_binary, tasks))
+
+    def train(self, data_train):
+        """训练多分类模型，data_train 的最后一列为类别标签"""
+        X = np.asarray(data_train[:, :-1])
+        t = np.asarray(data_train[:, -1])
+        self.classes = np.unique(t)
+        params = dict(self.svm_params)
+        if params.get('kernel') in ('poly', 'rbf') and params.get('gamma') is None:
+            # 所有分类器使用同一个核系数，才能合并支持向量一起计算核矩阵
+            params['gamma'] = SVM.default_gamma(X)
+
+        tasks, subsets = [], []
+        if self.strategy == 'ovr':
+            for c in self.classes:
+                tasks.append((params, X, np.where(t == c, 1, -1)))
+                subsets.append(np.arange(len(X)))
+            self.pairs = None
+        else:
+            self.pairs = [(i, j) for i in range(len(self.classes)) for j in range(i + 1, len(self.classes))]
+            for i, j in self.pairs:
+                idx = np.flatnonzero((t == self.classes[i]) | (t == self.classes[j]))
+                tasks.append((params, X[idx], np.where(t[idx] == self.classes[i], 1, -1)))
+                subsets.append(idx)
+        self.estimators = self._fit_all(tasks)
+        self._stack(X, subsets)
+
+    def _stack(self, X, subsets):
+        """把所有二分类器的参数拼成矩阵，供批量预测使用"""
+        self.B = np.array([svm.b for svm in self.estimators], dtype=np.float64)
+        if all(svm.w is not None for svm in self.estimators):
+            self.W = np.stack([svm.w for svm in self.estimators])
+            self.support_vectors = self.dual_coef = None
+            return
+        # 核模型：支持向量都是训练样本，按训练集下标合并
+        global_sv = [idx[svm.support] for svm, idx in zip(self.estimators, subsets)]
+        union = np.unique(np.concatenate(global_sv))
+        self.support_vectors = X[union]
+        self.dual_coef = np.zeros((len(union), len(self.estimators)))
+        for k, (svm, sv) in enumerate(zip(self.estimators, global_sv)):
+            self.dual_coef[np.searchsorted(union, sv), k] = svm.dual_coef
+        self.W = None
+
+    def decision_function(self, x):
+        """所有二分类器的得分 (N, K)，一次矩阵乘法计算"""
+        if self.W is not None:
+            return np.dot(x, self.W.T) + self.B
+        K = self.estimators[0].kernel_matrix(x, self.support_vectors)  # 合并后的支持向量只计算一次核函数
+        return np.dot(K, self.dual_coef) + self.B
+
+    def predict(self, x):
+        """预测类别标签"""
+        scores = self.decision_function(x)
+        if self.strategy == 'ovr':
+            return self.classes[np.argmax(scores, axis=1)]
+        # ovo：得分为正投给正类，否则投给负类，票数最多的类别获胜
+        n_classes = len(self.classes)
+        pos = np.zeros((len(self.pairs), n_classes))
+        neg = np.zeros((len(self.pairs), n_classes))
+        for k, (i, j) in enumerate(self.pairs):
+            pos[k, i] = 1
+            neg[k, j] = 1
+        wins = scores >= 0
+        votes = np.dot(wins, pos) + np.dot(~wins, neg)
+        return self.classes[np.argmax(votes, axis=1)]
+
 
 if __name__ == '__main__':
     # 数据加载部分以及数据路径配置
     base_dir = os.path.dirname(os.path.abspath(__file__))             # 获取当前脚本的绝对路径
-    train_file = os.path.join(base_dir, 'data', 'train_linear.txt')   # 拼接训练数据文件路径
-    test_file = os.path.join(base_dir, 'data', 'test_linear.txt')     # 拼接测试数据文件路径
-
-    # 加载训练数据
-    data_train = load_data(train_file)
-    # 加载测试数据
-    data_test = load_data(test_file)
-
-    # 模型训练
-    svm = SVM()            # 初始化SVM模型
-    svm.train(data_train)  # 训练模型寻找最优超平面
-
-    # 训练集评估
-    x_train = data_train[:, :2]  # 训练特征
-    t_train = data_train[:, 2]   # 训练标签
-    t_train_pred = svm.predict(x_train)  # 预测训练集标签
-
-    # 测试集评估
-    x_test = data_test[:, :2]    # 测试特征
-    t_test = data_test[:, 2]     # 测试标签
-    t_test_pred = svm.predict(x_test)  # 预测测试集标签
-
-    # 计算并打印准确率
-    acc_train = eval_acc(t_train, t_train_pred)  # 训练集准确率
-    acc_test = eval_acc(t_test, t_test_pred)     # 测试集准确率
-    
-    print("train accuracy: {:.1f}%".format(acc_train * 100))  # 输出训练集准确率
-    print("test accuracy: {:.1f}%".format(acc_test * 100))  # 输出测试集准确率
 
+    # 线性数据用原始问题梯度下降，非线性数据用高斯核SMO
+    for name, model in [('linear', SVM()), ('kernel', SVM(kernel='rbf', C=1.0))]:
+        train_file = os.path.join(base_dir, 'data', f'train_{name}.txt')   # 拼接训练数据文件路径
+        test_file = os.path.join(base_dir, 'data', f'test_{name}.txt')     # 拼接测试数据文件路径
+
+        # 加载训练数据
+        data_train = load_data(train_file)
+        # 加载测试数据
+        data_test = load_data(test_file)
+
+        # 模型训练
+        svm = model            # 初始化SVM模型
+        svm.train(data_train)  # 训练模型寻找最优超平面
+
+        # 训练集评估
+        x_train = data_train[:, :-1]  # 训练特征
+        t_train = data_train[:, -1]   # 训练标签
+        t_train_pred = svm.predict(x_train)  # 预测训练集标签
+
+        # 测试集评估
+        x_test = data_test[:, :-1]    # 测试特征
+        t_test = data_test[:, -1]     # 测试标签
+        t_test_pred = svm.predict(x_test)  # 预测测试集标签
+
+        # 计算并打印准确率
+        acc_train = eval_acc(t_train, t_train_pred)  # 训练集准确率
+        acc_test = eval_acc(t_test, t_test_pred)     # 测试集准确率
+
+        print(f"[{name}]")
+        print("train accuracy: {:.1f}%".format(acc_train * 100))  # 输出训练集准确率
+        print("test accuracy: {:.1f}%".format(acc_test * 100))  # 输出测试集准确率
+
+    # 流式Pegasos：按小批量读取线性数据文件，用测试集目标函数提前停止
+    train_file = os.path.join(base_dir, 'data', 'train_linear.txt')
+    data_test = load_data(os.path.join(base_dir, 'data', 'test_linear.txt'))
+    svm = SVM()
+    batches = iter_chunks(train_file, chunk_size=16, epochs=100, shuffle_buffer=256, seed=0)
+    svm.train_stream(batches, val_data=data_test)
+    acc_test = eval_acc(data_test[:, -1], svm.predict(data_test[:, :-1]))
+    print("[linear, pegasos]")
+    print("test accuracy: {:.1f}% ({} mini-batches)".format(acc_test * 100, svm.n_iter))
+
+    # 三分类：一对其余 / 一对一，每个二分类器在进程池中并行训练
+    data_train = load_data(os.path.join(base_dir, 'data', 'train_multi.txt'))
+    data_test = load_data(os.path.join(base_dir, 'data', 'test_multi.txt'))
+    for strategy in ('ovr', 'ovo'):
+        model = MulticlassSVM(strategy=strategy, kernel='rbf', C=1.0)
+        model.train(data_train)
+        acc_train = eval_acc(data_train[:, -1], model.predict(data_train[:, :-1]))
+        acc_test = eval_acc(data_test[:, -1], model.predict(data_test[:, :-1]))
+        print(f"[multi, {strategy}]")
+        print("train accuracy: {:.1f}%".format(acc_train * 100))
+        print("test accuracy: {:.1f}%".format(acc_test * 100))
@@ -4,6 +4,8 @@ import numpy as np
 import matplotlib.pyplot as plt 
 #添加类型提示支持
 from typing import Tuple, List 
+# 多次随机初始化在进程池中并行运行；分块打分可以在线程池中并行（NumPy矩阵运算会释放GIL）
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # 生成混合高斯分布数据
 def generate_data(n_samples=1000):
@@ -105,34 +107,282 @@ def logsumexp(log_p, axis=1, keepdims=False):
     safe_log_p = np.where(np.isneginf(log_p), -np.inf, log_p - max_val)     # 安全调整对数概率
     sum_exp = np.sum(np.exp(safe_log_p), axis = axis, keepdims = keepdims)  # 计算调整后的指数和
     
-    # 计算最终结果
-    result = max_val + np.log(sum_exp)
+    # 计算最终结果（keepdims=False 时 sum_exp 已去掉该维度，max_val 也要去掉，否则会广播成二维）
+    result = (max_val if keepdims else max_val.squeeze(axis=axis)) + np.log(sum_exp)
     
     # 处理全-inf输入的特殊case
     if np.any(np.isneginf(log_p)) and not np.any(np.isfinite(log_p)):       # 判断是否所有有效值都是-inf
         result = max_val.copy() if keepdims else max_val.squeeze(axis=axis) # 根据keepdims参数的值返回max_val的适当形式
     return result                                                           # 返回处理后的结果，保持与正常情况相同的接口
 
+def iter_chunks(X, chunk_size=10000, n_epochs=1, shuffle=False, random_state=None):
+    """把大数组（可以是 np.load(..., mmap_mode='r') 得到的内存映射）按块依次返回
+    
+    每次只把一个数据块读入内存，配合 GaussianMixtureModel.partial_fit 做在线EM。
+    
+    参数:
+        X: 数据 (n_samples, n_features)
+        chunk_size: 每块样本数
+        n_epochs: 遍历数据的轮数
+        shuffle: 每轮是否随机打乱数据块的顺序（块内顺序不变，保持顺序读取）
+        random_state: 随机种子
+    """
+    rng = np.random.default_rng(random_state)
+    starts = np.arange(0, len(X), chunk_size)
+    for _ in range(n_epochs):
+        for start in (rng.permutation(starts) if shuffle else starts):
+            yield np.asarray(X[start:start + chunk_size], dtype=np.float64)
+
+
+# 支持的协方差类型及各自的参数形状（K: 成分数, D: 特征维度）
+#   full:      每个成分一个完整协方差矩阵 (K, D, D)
+#   tied:      所有成分共享一个协方差矩阵 (D, D)
+#   diag:      每个成分一个对角协方差，只保存对角线 (K, D)
+#   spherical: 每个成分一个各向同性方差 (K,)
+COVARIANCE_TYPES = ('full', 'tied', 'diag', 'spherical')
+
+
+def _compute_precision_cholesky(covariances, covariance_type):
+    """一次性计算所有成分精度矩阵的Cholesky因子
+    
+    对 full/tied 类型，先批量Cholesky分解 Σ = L L^T，再求下三角矩阵的逆，
+    精度因子 P = L^{-T} 满足 Σ^{-1} = P P^T；对 diag/spherical 类型，P 就是 1/σ。
+    之后计算二次型只需要把中心化数据右乘 P，不再需要对协方差求逆。
+    """
+    if covariance_type in ('full', 'tied'):
+        try:
+            chol = np.linalg.cholesky(covariances)  # 支持 (..., D, D) 批量分解
+        except np.linalg.LinAlgError:
+            raise ValueError("协方差矩阵不是正定的，请增大 reg_covar 或减少成分数量")
+        eye = np.eye(covariances.shape[-1])
+        return np.swapaxes(np.linalg.solve(chol, np.broadcast_to(eye, chol.shape)), -1, -2)
+    if np.any(covariances <= 0):
+        raise ValueError("方差必须为正，请增大 reg_covar 或减少成分数量")
+    return 1.0 / np.sqrt(covariances)
+
+
+def _log_det_cholesky(prec_chol, covariance_type, n_features):
+    """精度因子的对数行列式 log|P| = -0.5 * log|Σ|"""
+    if covariance_type == 'full':
+        return np.sum(np.log(np.diagonal(prec_chol, axis1=1, axis2=2)), axis=1)
+    if covariance_type == 'tied':
+        return np.sum(np.log(np.diag(prec_chol)))
+    if covariance_type == 'diag':
+        return np.sum(np.log(prec_chol), axis=1)
+    return n_features * np.log(prec_chol)
+
+
+def _estimate_log_gaussian_prob(X, means, prec_chol, covariance_type):
+    """所有样本在所有成分下的对数高斯密度，形状为(n_samples, n_components)
+    
+    log N(x|μ,Σ) = -0.5 * (D*log(2π) + ||(x-μ)^T P||^2) + log|P|
+    """
+    n_features = X.shape[1]
+    log_det = _log_det_cholesky(prec_chol, covariance_type, n_features)
+    if covariance_type == 'full':
+        # 对K个成分同时做三角变换：y_k = X P_k - μ_k P_k，一次批量矩阵乘法得到(K, n, D)
+        y = X @ prec_chol - (means[:, None, :] @ prec_chol)
+        mahalanobis = np.einsum('kne,kne->nk', y, y)
+    elif covariance_type == 'tied':
+        y = (X @ prec_chol)[None, :, :] - (means @ prec_chol)[:, None, :]
+        mahalanobis = np.einsum('kne,kne->nk', y, y)
+    elif covariance_type == 'diag':
+        precisions = prec_chol ** 2  # (K, D)
+        mahalanobis = ((X ** 2) @ precisions.T - 2 * X @ (means * precisions).T
+                       + np.sum(means ** 2 * precisions, axis=1))
+    else:
+        precisions = prec_chol ** 2  # (K,)
+        mahalanobis = (np.sum(X ** 2, axis=1)[:, None] - 2 * X @ means.T
+                       + np.sum(means ** 2, axis=1)) * precisions
+    return -0.5 * (n_features * np.log(2 * np.pi) + mahalanobis) + log_det
+
+
+def _estimate_gaussian_parameters(X, resp, reg_covar, covariance_type):
+    """M步：由责任度一次性估计所有成分的参数
+    
+    返回:
+        Nk: 每个成分的有效样本数 (K,)
+        means: 均值 (K, D)
+        covariances: 协方差，形状由 covariance_type 决定
+    """
+    n_features = X.shape[1]
+    Nk = resp.sum(axis=0) + 10 * np.finfo(resp.dtype).eps  # 防止空成分除零
+    means = resp.T @ X / Nk[:, None]
+    if covariance_type == 'full':
+        # 所有成分的加权协方差一次算出：(K, D, n) @ (K, n, D) -> (K, D, D)
+        diff = X[None, :, :] - means[:, None, :]  # (K, n, D)
+        covariances = np.einsum('nk,knd->kdn', resp, diff) @ diff / Nk[:, None, None]
+        covariances += reg_covar * np.eye(n_features)
+    elif covariance_type == 'tied':
+        covariances = (X.T @ X - (Nk * means.T) @ means) / Nk.sum()
+        covariances += reg_covar * np.eye(n_features)
+    else:
+        # E[x^2] - μ^2，不需要构造 (K, n, D) 的中心化数据
+        covariances = resp.T @ (X ** 2) / Nk[:, None] - means ** 2 + reg_covar
+        if covariance_type == 'spherical':
+            covariances = covariances.mean(axis=1)
+    return Nk, means, covariances
+
+
+def _kmeans_plusplus(X, n_clusters, rng, n_local_trials=None):
+    """k-means++ 初始化：依次选取彼此远离的样本点作为初始中心
+    
+    每一步按到最近中心的平方距离 D(x)^2 成比例抽取 n_local_trials 个候选点（贪心k-means++），
+    选择使总距离下降最多的一个。所有样本到最近中心的距离作为一个向量维护，
+    每加入一个中心只需一次矩阵运算更新，不需要逐点循环。
+    
+    参数:
+        X: 数据 (n_samples, n_features)
+        n_clusters: 中心数
+        rng: np.random.Generator
+        n_local_trials: 每步候选点数，默认 2 + log(n_clusters)
+    返回:
+        centers: (n_clusters, n_features)
+    """
+    n_samples, n_features = X.shape
+    if n_local_trials is None:
+        n_local_trials = 2 + int(np.log(n_clusters))
+    sq_norms = np.sum(X ** 2, axis=1)
+
+    def sq_dist(C):
+        # 候选中心到所有样本的平方距离 (len(C), n_samples)
+        return np.maximum(np.sum(C ** 2, axis=1)[:, None] - 2 * C @ X.T + sq_norms[None, :], 0)
+
+    centers = np.empty((n_clusters, n_features))
+    centers[0] = X[rng.integers(n_samples)]
+    closest = sq_dist(centers[:1])[0]  # 每个样本到最近中心的平方距离
+    for c in range(1, n_clusters):
+        total = closest.sum()
+        if total <= 0:  # 剩余样本都与已有中心重合，随机补齐
+            centers[c] = X[rng.integers(n_samples)]
+            continue
+        candidates = np.searchsorted(np.cumsum(closest), rng.random(n_local_trials) * total)
+        candidates = np.minimum(candidates, n_samples - 1)
+        cand_closest = np.minimum(closest[None, :], sq_dist(X[candidates]))  # (n_local_trials, n_samples)
+        best = np.argmin(cand_closest.sum(axis=1))
+        centers[c] = X[candidates[best]]
+        closest = cand_closest[best]
+    return centers
+
+
+# 进程池中每个工作进程持有一份训练数据，只在创建进程时传递一次
+_WORKER_X = None
+
+
+def _init_restart_worker(X):
+    global _WORKER_X
+    _WORKER_X = X
+
+
+def _fit_restart(model, seed):
+    """在工作进程中用给定随机种子完成一次EM（模块级函数，便于pickle）"""
+    model.rng = np.random.default_rng(seed)
+    return model._fit_single(_WORKER_X)
+
+
 # 高斯混合模型类
 class GaussianMixtureModel:
     """高斯混合模型(GMM)实现
     
+    E步和M步都对所有成分做批量运算：每次M步后对全部协方差一次性做Cholesky分解并缓存精度因子，
+    E步用这些三角因子同时计算所有成分的对数密度，M步用一次einsum更新所有协方差。
+    
     参数:
         n_components: int, 高斯分布数量 (默认=3)
         max_iter: int, EM算法最大迭代次数 (默认=100)
         tol: float, 收敛阈值 (默认=1e-6)
         random_state: int, 随机种子 (可选)
+        covariance_type: str, 协方差类型 'full' / 'tied' / 'diag' / 'spherical' (默认='full')
+        reg_covar: float, 加到协方差对角线上的正则项，防止协方差矩阵奇异 (默认=1e-6)
+        step_decay: float, 在线EM步长 (t + step_offset)^(-step_decay) 的衰减指数，取值 (0.5, 1] (默认=0.6)
+        step_offset: float, 在线EM步长的偏移量，越大前期步长越小 (默认=1.0)
+        init_params: str, 初始化方式 'kmeans++'（k-means++选取初始均值）或 'random'（随机样本点） (默认='kmeans++')
+        n_init: int, 独立初始化的次数，保留最终对数似然最大的结果 (默认=1)
+        n_jobs: int, 多次初始化并行使用的进程数，默认为CPU核数，1表示在当前进程中依次运行 (可选)
+        chunk_size: int, predict / predict_proba / score_samples 每块处理的样本数，限制临时数组的内存 (默认=10000)
+        n_threads: int, 分块打分使用的线程数，1表示不使用线程池 (默认=1)
     """
-    def __init__(self, n_components = 3, max_iter = 100, tol = 1e-6, random_state = None):
+    def __init__(self, n_components = 3, max_iter = 100, tol = 1e-6, random_state = None,
+                 covariance_type = 'full', reg_covar = 1e-6, step_decay = 0.6, step_offset = 1.0,
+                 init_params = 'kmeans++', n_init = 1, n_jobs = None, chunk_size = 10000, n_threads = 1):
+        if init_params not in ('kmeans++', 'random'):
+            raise ValueError(f"init_params 必须是 'kmeans++' 或 'random'，得到 {init_params!r}")
+        if covariance_type not in COVARIANCE_TYPES:
+            raise ValueError(f"covariance_type 必须是 {COVARIANCE_TYPES} 之一，得到 {covariance_type!r}")
         # 初始化模型参数
         self.n_components = n_components  # 高斯分布数量
         self.max_iter = max_iter          # EM算法最大迭代次数
         self.tol = tol                    # 收敛阈值
+        self.covariance_type = covariance_type  # 协方差类型
+        self.reg_covar = reg_covar        # 协方差正则项
+        self.step_decay = step_decay      # 在线EM步长衰减指数
+        self.step_offset = step_offset    # 在线EM步长偏移量
+        self.init_params = init_params    # 初始化方式
+        self.n_init = n_init              # 独立初始化次数
+        self.n_jobs = n_jobs              # 并行进程数
+        self.chunk_size = chunk_size      # 分块打分的块大小
+        self.n_threads = n_threads        # 分块打分的线程数
         self.log_likelihoods = []         #存储每轮迭代的对数似然值
 
+        # 在线EM的状态：按样本数平均的充分统计量 (Σγ, Σγx, Σγxx^T) / n
+        self._stats = None
+        self._shift = None                # 统计量中的 x 减去该平移量，减小二阶矩相减时的舍入误差
+        self.n_updates = 0                # 已处理的数据块数
+        self.n_samples_seen = 0           # 已处理的样本数
+        self.running_log_likelihood = None  # 已处理样本的平均对数似然（按模型更新前的参数计算）
+        self.chunk_log_likelihoods = []   # 每个数据块的平均对数似然
+
         # 初始化随机数生成器
         self.rng = np.random.default_rng(random_state)
 
+    def _initial_covariances(self, n_features):
+        """单位协方差，形状与 covariance_type 对应"""
+        if self.covariance_type == 'full':
+            return np.tile(np.eye(n_features), (self.n_components, 1, 1))
+        if self.covariance_type == 'tied':
+            return np.eye(n_features)
+        if self.covariance_type == 'diag':
+            return np.ones((self.n_components, n_features))
+        return np.ones(self.n_components)
+
+    def _set_parameters(self, pi, mu, sigma):
+        """更新模型参数并重新计算缓存的精度Cholesky因子"""
+        self.pi = pi
+        self.mu = mu
+        self.sigma = sigma
+        self.prec_chol = _compute_precision_cholesky(sigma, self.covariance_type)
+
+    def _e_step(self, X):
+        """E步：返回每个样本的对数边缘似然 (n,) 和对数责任度 (n, K)"""
+        log_prob = _estimate_log_gaussian_prob(X, self.mu, self.prec_chol, self.covariance_type)
+        log_prob = log_prob + np.log(self.pi)  # 对数概率 = log(混合权重) + log(高斯概率密度)
+        # 使用logsumexp计算归一化因子，确保数值稳定性
+        log_prob_sum = logsumexp(log_prob, axis=1, keepdims=True)
+        return log_prob_sum[:, 0], log_prob - log_prob_sum
+
+    def _m_step(self, X, gamma):
+        """M步：基于后验概率更新模型参数"""
+        Nk, mu, sigma = _estimate_gaussian_parameters(X, gamma, self.reg_covar, self.covariance_type)
+        self._set_parameters(Nk / Nk.sum(), mu, sigma)
+
+    def _initialize(self, X):
+        """初始化模型参数（混合权重π、均值μ、协方差矩阵Σ）
+        
+        kmeans++：用k-means++选出初始中心，把每个样本分给最近的中心，由这一硬划分做一次M步；
+        random：混合系数均匀分布，随机选择样本点作为初始均值，协方差为单位矩阵。
+        """
+        n_samples, n_features = X.shape
+        if self.init_params == 'random':
+            self._set_parameters(np.ones(self.n_components) / self.n_components,
+                                 X[self.rng.choice(n_samples, self.n_components, replace=False)],
+                                 self._initial_covariances(n_features))
+            return
+        centers = _kmeans_plusplus(X, self.n_components, self.rng)
+        sq_dist = np.sum(X ** 2, axis=1)[:, None] - 2 * X @ centers.T + np.sum(centers ** 2, axis=1)
+        resp = np.zeros((n_samples, self.n_components))
+        resp[np.arange(n_samples), np.argmin(sq_dist, axis=1)] = 1
+        self._m_step(X, resp)
+
     def fit(self, X):
         """使用EM算法训练模型
 
@@ -141,133 +391,244 @@ class GaussianMixtureModel:
         2. 重复以下步骤直到收敛：
            - E步：计算每个样本属于各高斯成分的后验概率（责任度）
            - M步：基于后验概率更新模型参数
+        n_init > 1 时用不同的随机种子独立运行 n_init 次（在进程池中并行），保留最终对数似然最大的一次。
         """
-        X = np.asarray(X) # 将输入数据 X 转换为 NumPy 数组格式，确保后续操作的兼容性
-        n_samples, n_features = X.shape # 获取数据的样本数量和特征维度
-        
-        # 初始化混合系数（均匀分布）
-        self.pi = np.ones(self.n_components) / self.n_components
-        
-        # 随机选择样本点作为初始均值
-        self.mu = X[np.random.choice(n_samples, self.n_components, replace=False)]
-        
-        # 初始化协方差矩阵为单位矩阵
-        self.sigma = np.array([np.eye(n_features) for _ in range(self.n_components)])
+        X = np.asarray(X, dtype=np.float64) # 将输入数据 X 转换为 NumPy 数组格式，确保后续操作的兼容性
+        if self.n_init <= 1:
+            return self._fit_single(X)
+
+        seeds = self.rng.integers(2 ** 32, size=self.n_init)
+        if self.n_jobs == 1:
+            models = []
+            for seed in seeds:
+                self.rng = np.random.default_rng(seed)
+                models.append(self._fit_single(X).__dict__.copy())
+        else:
+            # 数据通过进程初始化函数只传给每个工作进程一次，任务本身只传模型超参数和种子
+            with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_restart_worker,
+                                     initargs=(X,)) as pool:
+                models = [m.__dict__ for m in pool.map(_fit_restart, [self] * self.n_init, seeds)]
+        self.init_log_likelihoods = [m['log_likelihoods'][-1] for m in models]  # 每次初始化的最终对数似然
+        best = models[int(np.argmax(self.init_log_likelihoods))]
+        rng, init_log_likelihoods = self.rng, self.init_log_likelihoods
+        self.__dict__.update(best)
+        self.rng, self.init_log_likelihoods = rng, init_log_likelihoods
+        return self
 
+    def _fit_single(self, X):
+        """从一次初始化出发运行EM直到收敛"""
+        self._initialize(X)
+
+        self.log_likelihoods = []
         log_likelihood = -np.inf  # 初始化对数似然值为负无穷
-        
+        self.converged_ = False
+
         # EM算法主循环：交替执行E步(期望)和M步(最大化)
         for iter in range(self.max_iter):
-            # E步：计算后验概率（每个样本属于各个高斯成分的概率）
-            log_prob = np.zeros((n_samples, self.n_components)) # 初始化对数概率矩阵
-            
-            # 对每个高斯成分，计算样本的对数概率密度
-            for k in range(self.n_components):
-                # 对数概率 = log(混合权重) + log(高斯概率密度)
-                log_prob[:, k] = np.log(self.pi[k]) + self._log_gaussian(X, self.mu[k], self.sigma[k]) # 计算第k个高斯混合成分的对数概率密度，并存储在log_prob的第k列
-            
-            # 使用logsumexp计算归一化因子，确保数值稳定性
-            log_prob_sum = logsumexp(log_prob, axis=1, keepdims=True)
-            
-            # 计算后验概率（responsibility）：gamma_{ik} = P(z_i=k|x_i)
-            gamma = np.exp(log_prob - log_prob_sum)
-
-            # M步：更新模型参数（基于后验概率）
-            Nk = np.sum(gamma, axis=0) # 每个高斯成分的"有效样本数"
-            
-            # 更新混合权重
-            self.pi = Nk / n_samples
-            
-            # 初始化新均值和新协方差矩阵
-            new_mu = np.zeros_like(self.mu)# 创建一个与 self.mu 形状相同且全为零的数组，作为新的均值向量
-            new_sigma = np.zeros_like(self.sigma)# 创建一个与 self.sigma 形状相同且全为零的数组，作为新的协方差矩阵
-
-            # 对每个高斯成分更新参数
-            for k in range(self.n_components):
-                # 更新均值：加权平均
-                new_mu[k] = np.sum(gamma[:, k, None] * X, axis=0) / Nk[k]
-
-                # 更新协方差矩阵
-                X_centered = X - new_mu[k]  # 中心化数据
-                weighted_X = gamma[:, k, None] * X_centered  # 加权中心化数据
-                
-                # 使用einsum高效计算协方差矩阵
-                # 等价于: new_sigma_k = (X_centered.T @ diag(gamma[:,k]) @ X_centered) / Nk[k]
-                new_sigma_k = np.einsum('ni,nj->ij', X_centered, weighted_X) / Nk[k]
-                
-                # 正则化：添加小的对角矩阵，防止协方差矩阵奇异
-                eps = 1e-6  # 正则化系数
-                new_sigma_k += np.eye(n_features) * eps  # 添加单位矩阵的eps倍
-                
-                new_sigma[k] = new_sigma_k  # 存储更新后的协方差矩阵
+            # E步：计算后验概率 gamma_{ik} = P(z_i=k|x_i)
+            log_prob_sum, log_gamma = self._e_step(X)
+            gamma = np.exp(log_gamma)
 
             # 计算对数似然（模型对数据的拟合程度）
             current_log_likelihood = np.sum(log_prob_sum)  # 所有样本的对数似然之和
             self.log_likelihoods.append(current_log_likelihood)  # 记录当前对数似然
-            
+
             # 检查收敛条件：如果对数似然变化小于阈值，则停止迭代
             if iter > 0 and abs(current_log_likelihood - log_likelihood) < self.tol:
+                self.converged_ = True
                 break
-                
             log_likelihood = current_log_likelihood   # 更新记录的上一次迭代的对数似然值
-            
-            # 更新模型参数
-            self.mu = new_mu
-            self.sigma = new_sigma
-        
+
+            # M步：更新模型参数
+            self._m_step(X, gamma)
+        self.n_iter_ = iter + 1
+
         # 最终聚类结果：每个样本分配到概率最大的高斯成分
         self.labels_ = np.argmax(gamma, axis=1)
         # 基于软聚类结果确定最终的硬聚类标签
+
+        # 之后调用 partial_fit 时从批量训练的结果继续在线更新，而不是重新初始化
+        self._shift = X.mean(axis=0)
+        self._statistics_from_parameters()
+        self.n_updates = 0
+        self.n_samples_seen = len(X)
+        self.running_log_likelihood = float(self.log_likelihoods[-1] / len(X))
+        self.chunk_log_likelihoods = []
         return self
 
-    def _log_gaussian(self, X, mu, sigma):
-        """计算多维高斯分布的对数概率密度
+    def _sufficient_statistics(self, X, gamma):
+        """数据块的平均充分统计量 (Σγ, Σγx, Σγxx^T) / n，其中 x 已减去 self._shift
+        
+        diag / spherical 只需要 Σγx^2 (K, D)；tied 的二阶统计量 Σxx^T 与责任度无关 (D, D)。
+        """
+        n = len(X)
+        s0 = gamma.sum(axis=0) / n
+        s1 = gamma.T @ X / n
+        if self.covariance_type == 'full':
+            s2 = np.einsum('nk,nd->kdn', gamma, X) @ X / n  # (K, D, D)
+        elif self.covariance_type == 'tied':
+            s2 = X.T @ X / n
+        else:
+            s2 = gamma.T @ (X ** 2) / n
+        return s0, s1, s2
+
+    def _statistics_from_parameters(self):
+        """由当前模型参数反推平均充分统计量（_parameters_from_statistics 的逆运算），用于在线EM的热启动"""
+        pi = self.pi
+        mu = self.mu - self._shift
+        n_features = mu.shape[1]
+        s0 = pi.copy()
+        s1 = pi[:, None] * mu
+        if self.covariance_type == 'full':
+            cov = self.sigma - self.reg_covar * np.eye(n_features) + mu[:, :, None] * mu[:, None, :]
+            s2 = pi[:, None, None] * cov
+        elif self.covariance_type == 'tied':
+            s2 = self.sigma - self.reg_covar * np.eye(n_features) + (pi * mu.T) @ mu
+        else:
+            var = self.sigma if self.covariance_type == 'diag' else self.sigma[:, None]
+            s2 = pi[:, None] * (var - self.reg_covar + mu ** 2)
+        self._stats = (s0, s1, s2)
+
+    def _parameters_from_statistics(self):
+        """由充分统计量计算模型参数：π = s0, μ = s1 / s0, Σ = s2 / s0 - μμ^T"""
+        s0, s1, s2 = self._stats
+        Nk = s0 + 10 * np.finfo(np.float64).eps  # 防止空成分除零
+        mu = s1 / Nk[:, None]
+        n_features = mu.shape[1]
+        if self.covariance_type == 'full':
+            sigma = s2 / Nk[:, None, None] - mu[:, :, None] * mu[:, None, :]
+            sigma += self.reg_covar * np.eye(n_features)
+        elif self.covariance_type == 'tied':
+            sigma = s2 - (Nk * mu.T) @ mu + self.reg_covar * np.eye(n_features)
+        else:
+            sigma = np.maximum(s2 / Nk[:, None] - mu ** 2, 0) + self.reg_covar
+            if self.covariance_type == 'spherical':
+                sigma = sigma.mean(axis=1)
+        self._set_parameters(Nk / Nk.sum(), mu + self._shift, sigma)
+
+    def partial_fit(self, X):
+        """在线（小批量）EM：用一个数据块更新模型
+        
+        E步只在当前数据块上计算责任度，得到该块的平均充分统计量 ŝ，
+        然后按步长 η_t = (t + step_offset)^(-step_decay) 更新累计统计量
+            s <- (1 - η_t) * s + η_t * ŝ
+        再由 s 重新计算模型参数。内存占用只与数据块大小有关。
+        第一次调用时用该数据块初始化模型（按 init_params，第一步的步长取1）；
+        如果之前已经用 fit 做过批量训练，则从批量训练的参数热启动，
+        批量数据视为按当前数据块大小已经处理过的若干块，步长从相应位置继续衰减。
         
         参数:
-            X: 输入数据点/样本集，形状为(n_samples, n_features)
-            mu: 高斯分布的均值向量，形状为(n_features,)
-            sigma: 高斯分布的协方差矩阵，形状为(n_features, n_features)
-            
+            X: 数据块 (n_chunk, n_features)
         返回:
-            log_prob: 每个样本的对数概率密度，形状为(n_samples,)
+            该数据块在更新前参数下的平均对数似然
         """
-        # 获取特征维度数（协方差矩阵的维度）
-        n_features = mu.shape[0]
-
-        # 数据归一化：将数据减去均值，得到中心化数据
-        # 高斯分布公式中的(x-μ)项
-        X_centered = X - mu  # 形状保持(n_samples, n_features)
-
-        # 计算协方差矩阵的行列式符号和对数值
-        # sign: 行列式的符号（正负）
-        # logdet: 行列式的自然对数值
-        sign, logdet = np.linalg.slogdet(sigma)  # 数值稳定的行列式计算方法
-
-        # 处理协方差矩阵可能奇异（不可逆）的情况
-        if sign <= 0:  # 行列式非正（理论上协方差矩阵应是正定的）
-            # 添加一个小的对角扰动项（单位矩阵乘以1e-6）
-            # 确保矩阵可逆且正定，提高数值稳定性
-            sigma += np.eye(n_features) * 1e-6  # 正则化处理
-            
-            # 重新计算调整后的协方差矩阵的行列式
-            sign, logdet = np.linalg.slogdet(sigma)
-
-            # 计算协方差矩阵的逆
-            inv = np.linalg.inv(sigma)
-            
-            # 计算二次型：(x-μ)^T·Σ^(-1)·(x-μ)
-            # 使用einsum高效计算多个样本的二次型
-            exponent = -0.5 * np.einsum('...i,...i->...', X_centered @ inv, X_centered)
-
-            # 返回对数概率密度
-            # 公式：log_p(x) = -0.5*D*log(2π) - 0.5*log|Σ| - 0.5*(x-μ)^T·Σ^(-1)·(x-μ)
-            return -0.5 * n_features * np.log(2 * np.pi) - 0.5 * logdet + exponent
+        X = np.asarray(X, dtype=np.float64)
+        if self._stats is None:
+            self._shift = X.mean(axis=0)
+            self._initialize(X)
+            self.n_updates = 0
+            self.n_samples_seen = 0
+            self.running_log_likelihood = None
+            self.chunk_log_likelihoods = []
+        elif self.n_updates == 0:
+            # fit 之后的第一次在线更新：把批量训练用过的样本折算成同样大小的数据块数
+            self.n_updates = int(np.ceil(self.n_samples_seen / len(X)))
+
+        # E步：当前参数下的责任度和对数似然
+        log_prob_sum, log_gamma = self._e_step(X)
+        chunk_ll = float(np.mean(log_prob_sum))
+        total = self.n_samples_seen + len(X)
+        if self.running_log_likelihood is None:
+            self.running_log_likelihood = chunk_ll
+        else:
+            self.running_log_likelihood += (chunk_ll - self.running_log_likelihood) * len(X) / total
+        self.n_samples_seen = total
+        self.chunk_log_likelihoods.append(chunk_ll)
+
+        # 随机近似更新充分统计量
+        stats = self._sufficient_statistics(X - self._shift, np.exp(log_gamma))
+        if self._stats is None:
+            self._stats = stats
         else:
-            # 处理非奇异协方差矩阵
-            inv = np.linalg.inv(sigma) #计算协方差矩阵的逆
-            exponent = -0.5 * np.einsum('...i,...i->...', X_centered @ inv, X_centered) #计算指数部分（二次型）
-            return -0.5 * n_features * np.log(2 * np.pi) - 0.5 * logdet + exponent #组合对数概率密度
+            eta = (self.n_updates + self.step_offset) ** (-self.step_decay)
+            self._stats = tuple((1 - eta) * old + eta * new for old, new in zip(self._stats, stats))
+        self.n_updates += 1
+
+        # M步：由累计统计量更新参数
+        self._parameters_from_statistics()
+        return chunk_ll
+
+    def fit_stream(self, chunks):
+        """依次用迭代器中的每个数据块调用 partial_fit（例如 iter_chunks 的返回值）"""
+        for X in chunks:
+            self.partial_fit(X)
+        return self
+
+    def _score_chunks(self, X, func):
+        """把 X 按 chunk_size 分块，对每块调用 func 后拼接结果；n_threads > 1 时各块在线程池中并行计算"""
+        if not hasattr(self, 'prec_chol'):
+            raise ValueError("请先调用fit方法训练模型")
+        X = np.asarray(X, dtype=np.float64)
+        chunks = [X[start:start + self.chunk_size] for start in range(0, len(X), self.chunk_size)]
+        if self.n_threads > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=self.n_threads) as pool:
+                results = list(pool.map(func, chunks))
+        else:
+            results = [func(chunk) for chunk in chunks]
+        return np.concatenate(results) if results else func(X)
+
+    def _weighted_log_prob(self, X):
+        """log π_k + log N(x|μ_k,Σ_k)，使用缓存的精度Cholesky因子"""
+        return _estimate_log_gaussian_prob(X, self.mu, self.prec_chol, self.covariance_type) + np.log(self.pi)
+
+    def score_samples(self, X):
+        """每个样本的对数概率密度 log p(x)，形状为(n_samples,)"""
+        return self._score_chunks(X, lambda chunk: logsumexp(self._weighted_log_prob(chunk), axis=1))
+
+    def score(self, X):
+        """所有样本的平均对数似然"""
+        return float(np.mean(self.score_samples(X)))
+
+    def predict_proba(self, X):
+        """每个样本属于各成分的后验概率，形状为(n_samples, n_components)"""
+        return self._score_chunks(X, lambda chunk: np.exp(self._e_step(chunk)[1]))
+
+    def predict(self, X):
+        """每个样本最可能所属的成分"""
+        return self._score_chunks(X, lambda chunk: np.argmax(self._weighted_log_prob(chunk), axis=1))
+
+    def sample(self, n_samples=1):
+        """从模型中采样
+        
+        先按混合权重确定每个成分的样本数，再对每个成分用协方差的Cholesky因子变换标准正态样本：
+        x = μ_k + L_k z，Σ_k = L_k L_k^T。
         
+        返回:
+            Tuple: (X, y)
+                X: 样本 (n_samples, n_features)
+                y: 每个样本所属的成分 (n_samples,)
+        """
+        if not hasattr(self, 'prec_chol'):
+            raise ValueError("请先调用fit方法训练模型")
+        n_features = self.mu.shape[1]
+        counts = self.rng.multinomial(n_samples, self.pi)
+        y = np.repeat(np.arange(self.n_components), counts)
+        Z = self.rng.standard_normal((n_samples, n_features))
+        if self.covariance_type == 'full':
+            chol = np.linalg.cholesky(self.sigma)  # 所有成分一次分解
+        elif self.covariance_type == 'tied':
+            chol = np.broadcast_to(np.linalg.cholesky(self.sigma), (self.n_components, n_features, n_features))
+        X = np.empty((n_samples, n_features))
+        start = 0
+        for k, count in enumerate(counts):
+            z = Z[start:start + count]
+            if self.covariance_type in ('full', 'tied'):
+                X[start:start + count] = self.mu[k] + z @ chol[k].T
+            else:
+                X[start:start + count] = self.mu[k] + z * np.sqrt(self.sigma[k])
+            start += count
+        return X, y
+
     def plot_convergence(self):
         """可视化对数似然的收敛过程"""
         # 检查是否有对数似然值记录
@@ -298,9 +659,14 @@ if __name__ == "__main__":
     print(f"生成数据形状: {X.shape}, 标签形状: {y_true.shape}")
     
     # 训练GMM模型
-    gmm = GaussianMixtureModel(n_components=3)
+    gmm = GaussianMixtureModel(n_components=3, n_init=4)  # k-means++初始化，4次独立初始化并行运行
     gmm.fit(X)
     y_pred = gmm.labels_
+
+    # 在线EM：按数据块流式训练，内存占用只与块大小有关
+    online = GaussianMixtureModel(n_components=3, random_state=0)
+    online.fit_stream(iter_chunks(X, chunk_size=100, n_epochs=5, shuffle=True, random_state=0))
+    print(f"在线EM: {online.n_updates} 个数据块, 平均对数似然 {online.running_log_likelihood:.4f}")
      #
      
     # 可视化结果
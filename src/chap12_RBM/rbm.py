@@ -66,6 +66,9 @@ class RBM:
         self.b_h = np.zeros(n_hidden)   # 初始化隐藏层偏置向量
 
         self.b_v = np.zeros(n_observe)  # 初始化可见层偏置向量
+
+        # 单个观测样本的原始形状（例如 MNIST 为 (28, 28)），训练时根据数据更新，采样结果按此形状返回
+        self.observe_shape = (n_observe,)
         # pass
     
     def _sigmoid(self, x):
@@ -93,116 +96,322 @@ class RBM:
         # 通过np.random.binomial进行伯努利采样，n=1表示单次试验，probs表示成功的概率
         return np.random.binomial(1, probs)  # 生成伯努利随机变量，以概率probs返回1，否则返回0
     
-    def train(self, data):
+    @staticmethod
+    def _sigmoid_inplace(x):
+        """原地计算Sigmoid，x 既是输入也是输出，不分配新数组"""
+        with np.errstate(over='ignore'):  # exp溢出得到inf，1/(1+inf)=0，结果正确
+            np.negative(x, out=x)
+            np.exp(x, out=x)
+        x += 1
+        np.reciprocal(x, out=x)
+        return x
+
+    @staticmethod
+    def _sample_binary_inplace(probs, rand, out, rng):
+        """用预分配的随机数缓冲区做伯努利采样：out = (rand < probs)"""
+        rng.random(out=rand, dtype=np.float32)
+        np.less(rand, probs, out=out)
+        return out
+
+    def train(self, data, learning_rate=0.1, epochs=10, batch_size=100, k=1, persistent=False,
+              n_particles=None, momentum=0.0, weight_decay=0.0, random_state=None, verbose=False):
         """
-        使用 k=1 的 Contrastive Divergence (CD-1) 算法训练 RBM
+        使用 Contrastive Divergence (CD-k) 或 Persistent CD (PCD) 算法训练 RBM
 
-        CD-1 算法流程：
+        CD-k 算法流程：
         1. 从训练数据初始化可见层 v₀
-        2. 正向传播：v₀ → h₀（计算隐藏层激活概率并采样）
-        3. 反向传播：h₀ → v₁（重构可见层）
-        4. 再次正向传播：v₁ → h₁（计算重构后的隐藏层概率）
-        5. 基于正负相位的梯度更新参数
-
-        参数更新公式（最大化对数似然）：
-        ΔW = η · (⟨v₀h₀⟩ - ⟨v₁h₁⟩)
-        Δb_v = η · (v₀ - v₁)
-        Δb_h = η · (h₀ - h₁)
+        2. 正向传播：v₀ → h₀（计算隐藏层激活概率）
+        3. 从 v₀ 出发交替Gibbs采样 k 步：h → v → h，得到 vₖ, hₖ
+        4. 基于正负相位的梯度更新参数
+        PCD 的负相位不从数据出发，而是保存一组固定数量的"幻想粒子"（fantasy particles），
+        每个批次从上一次的粒子状态继续做 k 步Gibbs采样，链不会被重置。
+
+        参数更新公式（最大化对数似然，带动量和L2权重衰减）：
+        grad_W = ⟨v₀h₀⟩ - ⟨vₖhₖ⟩ - λ·W
+        velocity = μ · velocity + η · grad
+        W += velocity
         
         注：⟨v₀h₀⟩ 表示 v₀ 和 h₀ 的外积期望，即数据驱动的正相位
-            ⟨v₁h₁⟩ 表示 v₁ 和 h₁ 的外积期望，即模型生成的负相位
+            ⟨vₖhₖ⟩ 表示 vₖ 和 hₖ 的外积期望，即模型生成的负相位
+
+        训练全程使用float32，所有中间结果写入预先分配的缓冲区，批次循环中不再分配新数组。
+
+        Args:
+            data (ndarray): 训练数据，形状为 (n_samples, ...)，每个样本展平后长度为 n_observe
+            learning_rate (float): 学习率
+            epochs (int): 训练轮数
+            batch_size (int): 批处理大小
+            k (int): 每次参数更新的Gibbs采样步数
+            persistent (bool): 是否使用 PCD
+            n_particles (int): PCD 幻想粒子的数量（默认等于 batch_size）
+            momentum (float): 动量系数
+            weight_decay (float): L2权重衰减系数（只作用于 W）
+            random_state (int): 随机种子
+            verbose (bool): 是否打印每轮的重构误差
+
+        Returns:
+            list: 每轮的平均重构误差（可见层重构概率与数据的均方误差）
         """
-    
-        # 将数据展平为二维数组 [n_samples, n_observe]，确保输入数据符合模型要求
-        data_flat = data.reshape(data.shape[0], -1)  
+        if k < 1:
+            raise ValueError("Gibbs采样步数 k 必须为正整数")
+        rng = np.random.default_rng(random_state)
+        f32 = np.float32
+
+        # 将数据展平为二维数组 [n_samples, n_observe] 并一次性转换为float32（不修改调用者的数组）
+        data_flat = np.ascontiguousarray(data.reshape(data.shape[0], -1), dtype=f32)
+        self.observe_shape = tuple(data.shape[1:]) or (self.n_observe,)
         n_samples = data_flat.shape[0]  # 样本数量
+        if data_flat.shape[1] != self.n_observe:
+            raise ValueError(f"样本长度 {data_flat.shape[1]} 与可见层单元数量 {self.n_observe} 不一致")
+        batch_size = min(batch_size, n_samples)
+        n_particles = n_particles or batch_size
+        V, H = self.n_observe, self.n_hidden
 
-        # 定义训练参数
-        learning_rate = 0.1  # 学习率，控制参数更新的步长
-        
-        epochs = 10  # 训练轮数，整个数据集将被遍历10次
-        
-        batch_size = 100  # 批处理大小，每次更新参数使用的样本数量
+        # 模型参数转换为float32
+        self.W = self.W.astype(f32)
+        self.b_v = self.b_v.astype(f32)
+        self.b_h = self.b_h.astype(f32)
+
+        # 预分配缓冲区
+        v0 = np.empty((batch_size, V), f32)       # 当前批次数据
+        h0 = np.empty((batch_size, H), f32)       # 正相隐藏层概率
+        recon = np.empty((batch_size, V), f32)    # 一步重构概率（用于计算重构误差）
+        m = n_particles if persistent else batch_size
+        v_neg = np.empty((m, V), f32)             # 负相可见层（链的状态）
+        h_neg = np.empty((m, H), f32)             # 负相隐藏层概率
+        h_smp = np.empty((max(m, batch_size), H), f32)  # 隐藏层采样
+        rand_v = np.empty((m, V), f32)            # 可见层采样用的随机数
+        rand_h = np.empty((max(m, batch_size), H), f32)  # 隐藏层采样用的随机数
+        dW = np.empty((V, H), f32)                # 梯度
+        tmp_W = np.empty((V, H), f32)
+        db_v = np.empty(V, f32)
+        db_h = np.empty(H, f32)
+        tmp_v = np.empty(V, f32)
+        tmp_h = np.empty(H, f32)
+        vel_W = np.zeros((V, H), f32)             # 动量
+        vel_v = np.zeros(V, f32)
+        vel_h = np.zeros(H, f32)
 
+        if persistent:
+            # 幻想粒子从随机选取的训练样本开始，之后在整个训练过程中持续演化
+            self.particles = data_flat[rng.choice(n_samples, n_particles, replace=n_particles > n_samples)].copy()
+
+        errors = []
+        order = np.arange(n_samples)
         # 开始训练轮数
         for epoch in range(epochs):
-            # 打乱数据顺序，提高训练稳定性和泛化能力，避免模型学习到特定的样本顺序
-            
-            np.random.shuffle(data_flat) 
-            
+            # 打乱样本顺序（只打乱下标，不修改数据）
+            rng.shuffle(order)
+            error = 0.0
+
             # 使用小批量梯度下降法
-            for i in range(0, n_samples, batch_size): 
-                # 获取当前批次的数据
-                batch = data_flat[i:i + batch_size]  # 使用切片操作从ata_flat中提取从第i行到第i+batch_size行的子数组
-                
-                # 将批次数据转换为 float64 类型，确保数值计算的精度
-                v0 = batch.astype(np.float64)  # 确保数据类型正确
-
-                # 正相传播：从v0计算隐藏层激活概率
-                # 计算可见层对隐藏层的输入：输入层向量v0与权重矩阵self.W的点积，再加上隐藏层偏置self.b_h
-                # 条件概率：P(h_j=1|v) = σ(b_j + Σ_i v_i·W_ij)
-                h0_prob = self._sigmoid(np.dot(v0, self.W) + self.b_h) 
-                
-                # 对隐藏层激活概率进行二值采样，得到隐藏层的状态
-                h0_sample = self._sample_binary(h0_prob) 
-                # 这段代码的作用是借助 self._sample_binary 方法，对 h0_prob 进行二值采样，进而得到 h0_sample。在深度学习领域，当处理二值变量或者进行二值掩码操作时，常常会用到这样的采样。
-
-                # 负相传播：从隐藏层重构可见层，再计算隐藏层概率
-                # 计算隐藏层对可见层的重构输入：隐藏层状态h0_sample与权重矩阵转置self.W.T的点积，再加上可见层偏置self.b_v
-                # 条件概率：P(v_i=1|h) = σ(a_i + Σ_j h_j·W_ij)
-                v1_prob = self._sigmoid(np.dot(h0_sample, self.W.T) + self.b_v)  # 将上述结果传入 Sigmoid 激活函数进行非线性变换，得到最终的概率值 v1_prob
-                
-                # 对可见层重构概率进行二值采样，得到重构的可见层状态
-                v1_sample = self._sample_binary(v1_prob)  # 对可见层进行二值采样
-                
-                # 基于重构的可见层状态，再次计算隐藏层激活概率
-                h1_prob = self._sigmoid(np.dot(v1_sample, self.W) + self.b_h)       # 计算隐藏单元被激活的概率
-
-                # 计算梯度      
-                # 权重矩阵梯度：数据驱动的正相位与模型生成的负相位之差
-                dW = np.dot(v0.T, h0_sample) - np.dot(v1_sample.T, h1_prob)          # 计算权重矩阵的梯度
-                
-                # 可见层偏置梯度：原始数据与重构数据之差
-                db_v = np.sum(v0 - v1_sample, axis=0)                                # 计算可见层偏置的梯度
-                
-                # 隐藏层偏置梯度：原始数据生成的隐藏层状态与重构数据生成的隐藏层状态之差
-                db_h = np.sum(h0_sample - h1_prob, axis=0)                           # 计算隐藏层偏置的梯度
-
-                # 更新参数
-                # 按批次大小归一化梯度，并乘以学习率更新权重矩阵
-                self.W += learning_rate * dW / batch_size                            # 更新权重矩阵
-                
-                # 按批次大小归一化梯度，并乘以学习率更新可见层偏置
-                self.b_v += learning_rate * db_v / batch_size                        # 更新可见层偏置
-                
-                # 按批次大小归一化梯度，并乘以学习率更新隐藏层偏置
-                self.b_h += learning_rate * db_h / batch_size                        # 更新隐藏层偏置
-
-    def sample(self):
-        """从训练好的模型中采样生成新数据（Gibbs采样）
-        通过多次Gibbs采样迭代，模型能够从学习到的数据分布中生成新样本
+            for i in range(0, n_samples, batch_size):
+                idx = order[i:i + batch_size]
+                b = len(idx)
+                bv0, bh0, brecon = v0[:b], h0[:b], recon[:b]
+                np.take(data_flat, idx, axis=0, out=bv0, mode='clip')  # mode='clip' 时直接写入out，不经过临时缓冲
+
+                # 正相传播：P(h_j=1|v) = σ(b_j + Σ_i v_i·W_ij)
+                np.matmul(bv0, self.W, out=bh0)
+                bh0 += self.b_h
+                self._sigmoid_inplace(bh0)
+
+                # 负相：CD-k 从当前批次出发，PCD 从幻想粒子出发，交替Gibbs采样 k 步
+                if persistent:
+                    chain_v, chain_h = self.particles, h_neg
+                    np.matmul(chain_v, self.W, out=chain_h)
+                    chain_h += self.b_h
+                    self._sigmoid_inplace(chain_h)
+                else:
+                    chain_v, chain_h = v_neg[:b], h_neg[:b]
+                    chain_h[...] = bh0
+                n = len(chain_v)
+                for step in range(k):
+                    hs = self._sample_binary_inplace(chain_h, rand_h[:n], h_smp[:n], rng)
+                    # P(v_i=1|h) = σ(a_i + Σ_j h_j·W_ij)
+                    np.matmul(hs, self.W.T, out=chain_v)
+                    chain_v += self.b_v
+                    self._sigmoid_inplace(chain_v)
+                    if step == 0 and not persistent:
+                        brecon[...] = chain_v  # CD 第一步的可见层概率就是重构
+                    self._sample_binary_inplace(chain_v, rand_v[:n], chain_v, rng)
+                    np.matmul(chain_v, self.W, out=chain_h)
+                    chain_h += self.b_h
+                    self._sigmoid_inplace(chain_h)
+
+                if persistent:
+                    # PCD 的负相不经过数据，单独计算一步重构用于监控
+                    hs = self._sample_binary_inplace(bh0, rand_h[:b], h_smp[:b], rng)
+                    np.matmul(hs, self.W.T, out=brecon)
+                    brecon += self.b_v
+                    self._sigmoid_inplace(brecon)
+
+                # 计算梯度（正相按批次大小、负相按链的数量取平均）
+                np.matmul(bv0.T, bh0, out=dW)
+                dW *= 1.0 / b
+                np.matmul(chain_v.T, chain_h, out=tmp_W)
+                tmp_W *= 1.0 / n
+                dW -= tmp_W
+                if weight_decay:
+                    np.multiply(self.W, weight_decay, out=tmp_W)
+                    dW -= tmp_W
+                np.mean(bv0, axis=0, out=db_v)
+                db_v -= np.mean(chain_v, axis=0, out=tmp_v)
+                np.mean(bh0, axis=0, out=db_h)
+                db_h -= np.mean(chain_h, axis=0, out=tmp_h)
+
+                # 带动量的参数更新
+                vel_W *= momentum
+                dW *= learning_rate
+                vel_W += dW
+                self.W += vel_W
+                vel_v *= momentum
+                db_v *= learning_rate
+                vel_v += db_v
+                self.b_v += vel_v
+                vel_h *= momentum
+                db_h *= learning_rate
+                vel_h += db_h
+                self.b_h += vel_h
+
+                # 重构误差
+                np.subtract(bv0, brecon, out=brecon)
+                error += float(np.einsum('ij,ij->', brecon, brecon))
+
+            errors.append(error / (n_samples * V))
+            if verbose:
+                print(f"epoch {epoch + 1}/{epochs}, reconstruction error: {errors[-1]:.6f}")
+        return errors
+
+    def sample(self, n_samples=1, gibbs_steps=1000, burn_in=None, thin=1, init=None, random_state=None):
+        """从训练好的模型中采样生成新数据（并行的块Gibbs采样）
+        
+        同时运行多条马尔可夫链，链的状态保存为一个矩阵 (n_chains, n_observe)，
+        每一步 v -> h -> v 对所有链只做两次矩阵乘法。每条链共运行 gibbs_steps 步，
+        前 burn_in 步丢弃，之后每隔 thin 步收集一次样本；链的数量按需要的样本数自动确定。
+
+        Args:
+            n_samples (int): 需要的样本数量
+            gibbs_steps (int): 每条链的Gibbs采样总步数
+            burn_in (int): 开始收集样本前丢弃的步数（默认等于 gibbs_steps，即每条链只取最终状态）
+            thin (int): 收集样本的间隔步数
+            init (ndarray): 链的初始状态，形状为 (n, ...) 的数据样本（例如训练集的一部分），
+                            链依次从这些样本出发；默认每个像素以50%概率为1
+            random_state (int): 随机种子
+
+        Returns:
+            ndarray: 形状为 (n_samples,) + observe_shape 的0/1样本
         """
-        # 初始化可见层：使用伯努利分布随机生成二值向量（每个像素有50%概率为1）
-        # n_observe是可见层神经元数量（28x28=784）
-        v = np.random.binomial(1, 0.5, self.n_observe)
+        if burn_in is None:
+            burn_in = gibbs_steps
+        if not 0 <= burn_in <= gibbs_steps or thin < 1:
+            raise ValueError("需要满足 0 <= burn_in <= gibbs_steps 且 thin >= 1")
+        rng = np.random.default_rng(random_state)
+        f32 = np.float32
+        W, b_v, b_h = self.W.astype(f32), self.b_v.astype(f32), self.b_h.astype(f32)
 
-        # 进行1000次 Gibbs采样迭代，以逐步趋近真实数据分布，使生成的样本更接近训练数据的分布
-        # 每次迭代包括：v -> h -> v 的完整过程
-        for _ in range(1000):
-            # 基于当前的可见层v，计算隐藏层神经元被激活的概率（前向传播）
-            h_prob = self._sigmoid(np.dot(v, self.W) + self.b_h)
+        per_chain = (gibbs_steps - burn_in) // thin + 1  # 每条链收集的样本数
+        n_chains = -(-n_samples // per_chain)           # 向上取整
+        if init is not None:
+            init = np.asarray(init).reshape(len(init), -1)
+            v = init[np.arange(n_chains) % len(init)].astype(f32)
+        else:
+            v = (rng.random((n_chains, self.n_observe), dtype=f32) < 0.5).astype(f32)
 
-            # 根据激活概率采样得到隐藏层的状态（伯努利采样）
-            h_sample = self._sample_binary(h_prob)
+        h = np.empty((n_chains, self.n_hidden), f32)
+        rand_h = np.empty_like(h)
+        rand_v = np.empty_like(v)
+        samples = np.empty((per_chain, n_chains, self.n_observe), np.int8)
+        collected = 0
+        for step in range(gibbs_steps + 1):
+            if step >= burn_in and (step - burn_in) % thin == 0:
+                samples[collected] = v
+                collected += 1
+            if step == gibbs_steps:
+                break
+            # 所有链同时前向：P(h|v)，并采样
+            np.matmul(v, W, out=h)
+            h += b_h
+            self._sample_binary_inplace(self._sigmoid_inplace(h), rand_h, h, rng)
+            # 所有链同时反向：P(v|h)，并采样
+            np.matmul(h, W.T, out=v)
+            v += b_v
+            self._sample_binary_inplace(self._sigmoid_inplace(v), rand_v, v, rng)
 
-            # 基于隐藏层的采样结果，重新估算可见层的激活概率（反向传播）
-            v_prob = self._sigmoid(np.dot(h_sample, self.W.T) + self.b_v)
+        # 按链排列（同一条链的样本相邻），截取需要的数量并恢复观测形状
+        samples = samples.transpose(1, 0, 2).reshape(-1, self.n_observe)[:n_samples]
+        return samples.reshape((n_samples,) + self.observe_shape)
 
-            # 根据估算的概率采样新的可见层状态
-            v = self._sample_binary(v_prob)
+    def free_energy(self, v):
+        """自由能 F(v) = -b_v·v - Σ_j softplus(b_h_j + v·W_j)，p(v) = exp(-F(v)) / Z"""
+        v = np.asarray(v, dtype=np.float64).reshape(len(v), -1)
+        return -(v @ self.b_v) - np.sum(np.logaddexp(0, v @ self.W + self.b_h), axis=1)
 
-        # 将最终的可见层向量重塑为 28×28 的图像格式
-        return v.reshape(28, 28)
+    def estimate_log_partition(self, n_runs=100, betas=10000, base_data=None, random_state=None):
+        """用退火重要性采样（Annealed Importance Sampling, AIS）估计配分函数 log Z
+        
+        从只有可见层偏置 b_A 的基准模型（配分函数可以解析计算）出发，
+        沿逆温度 β: 0 -> 1 在中间分布 p_β(v) ∝ exp((1-β) b_A·v + β b_v·v + Σ_j softplus(β (v·W_j + b_h_j)))
+        之间做Gibbs转移并累积重要性权重：
+            log w = Σ_k [log p*_{β_k}(v_{k-1}) - log p*_{β_{k-1}}(v_{k-1})]
+            log Z ≈ log Z_A + log mean(w)
+        n_runs 条AIS链组成一个矩阵，每个温度对所有链只做两次矩阵乘法。
+
+        Args:
+            n_runs (int): 并行的AIS链数量
+            betas (int or ndarray): 逆温度个数（在[0, 1]上均匀分布），或自定义的从0递增到1的逆温度序列
+            base_data (ndarray): 用于设置基准模型可见层偏置的数据（取像素均值的对数几率），默认 b_A = 0
+            random_state (int): 随机种子
+
+        Returns:
+            tuple: (log_Z, (log_Z_low, log_Z_high))，后者为 log(mean(w) ± 标准误差) 的区间
+        """
+        rng = np.random.default_rng(random_state)
+        if np.isscalar(betas):
+            betas = np.linspace(0.0, 1.0, int(betas))
+        betas = np.asarray(betas, dtype=np.float64)
+        W = self.W.astype(np.float64)
+        b_v = self.b_v.astype(np.float64)
+        b_h = self.b_h.astype(np.float64)
+        if base_data is not None:
+            p = np.asarray(base_data, dtype=np.float64).reshape(len(base_data), -1).mean(axis=0)
+            p = np.clip(p, 1e-3, 1 - 1e-3)
+            b_a = np.log(p) - np.log1p(-p)
+        else:
+            b_a = np.zeros(self.n_observe)
+        # β=0 时的分布 exp(b_A·v) * 2^n_hidden（每个隐藏单元贡献 softplus(0) = log 2），可见单元相互独立
+        log_Z_a = np.sum(np.logaddexp(0, b_a)) + self.n_hidden * np.log(2)
+
+        def log_p_star(v, beta):
+            return (1 - beta) * (v @ b_a) + beta * (v @ b_v) + np.sum(np.logaddexp(0, beta * (v @ W + b_h)), axis=1)
+
+        # 从基准模型精确采样初始状态
+        v = (rng.random((n_runs, self.n_observe)) < 1.0 / (1.0 + np.exp(-b_a))).astype(np.float64)
+        log_w = np.zeros(n_runs)
+        for prev, beta in zip(betas[:-1], betas[1:]):
+            log_w += log_p_star(v, beta) - log_p_star(v, prev)
+            # 保持 p_β 不变的Gibbs转移
+            h = (rng.random((n_runs, self.n_hidden)) < self._sigmoid(beta * (v @ W + b_h))).astype(np.float64)
+            v = (rng.random((n_runs, self.n_observe))
+                 < self._sigmoid((1 - beta) * b_a + beta * (h @ W.T + b_v))).astype(np.float64)
+
+        # log mean(w)，以及 mean(w) ± 标准误差 的对数
+        shift = log_w.max()
+        w = np.exp(log_w - shift)
+        mean, err = w.mean(), w.std() / np.sqrt(n_runs)
+        log_Z = log_Z_a + shift + np.log(mean)
+        low = log_Z_a + shift + np.log(mean - err) if mean > err else -np.inf
+        high = log_Z_a + shift + np.log(mean + err)
+        self.log_Z = log_Z
+        return log_Z, (low, high)
+
+    def log_likelihood(self, data, log_Z=None):
+        """数据的平均对数似然 mean(-F(v)) - log Z，log_Z 默认使用最近一次AIS的估计"""
+        if log_Z is None:
+            log_Z = getattr(self, 'log_Z', None)
+            if log_Z is None:
+                raise ValueError("请先调用 estimate_log_partition 估计配分函数")
+        return float(np.mean(-self.free_energy(data)) - log_Z)
 
 # 用MNIST 手写数字数据集训练一个（RBM），并从训练好的模型中采样生成一张手写数字图像
 if __name__ == '__main__':
@@ -233,11 +442,12 @@ if __name__ == '__main__':
     # 初始化 RBM 对象：2个隐藏节点，784个可见节点（28×28 图像）
     rbm = RBM(2, img_size)
     # 训练RBM
-    errors = rbm.train(mnist, learning_rate=0.1, epochs=10, batch_size=100)
-    # 生成并可视化样本
+    errors = rbm.train(mnist, learning_rate=0.1, epochs=10, batch_size=100, verbose=True)
+
+    # 从模型中并行采样5张图像（每条链1000步Gibbs采样），形状为 (5, 28, 28)
     samples = rbm.sample(n_samples=5, gibbs_steps=1000)
-    # 使用 MNIST 数据进行训练
-    rbm.train(mnist)
+    s = samples[0]
 
-    # 从模型中采样一张图像
-    s = rbm.sample()
+    # 用AIS估计配分函数，计算训练数据的平均对数似然
+    log_Z, _ = rbm.estimate_log_partition(n_runs=100, base_data=mnist[:10000])
+    print("log Z ≈ {:.2f}, 平均对数似然 ≈ {:.2f}".format(log_Z, rbm.log_likelihood(mnist[:10000])))
@@ -2,6 +2,7 @@
 import os           # 导入操作系统接口，用于文件路径处理和目录操作
 import numpy as np  # 导入数值计算库，用于数组操作和数学计算
 import tensorflow as tf  # 导入深度学习框架，用于构建和训练神经网络
+import symmetry     # 把棋盘转换为行棋方视角
 
 class RL_QG_agent:
     """黑白棋强化学习智能体，基于Q学习和卷积神经网络实现落子策略"""
@@ -17,11 +18,12 @@ class RL_QG_agent:
         self.saver = None         # 模型保存器，用于保存和加载参数
         self.input_states = None  # 网络输入张量（棋盘状态）
         self.Q_values = None      # 网络输出张量（各位置Q值）
+        self.train_op = None      # Q学习训练操作（在init_model中创建）
 
 
-    def init_model(self):
+    def init_model(self, learning_rate=1e-4):
         """
-        构建并初始化卷积神经网络模型
+        构建并初始化卷积神经网络模型及Q学习训练操作
         
         网络结构:
             1. 卷积层1: 32个3x3卷积核(提取局部棋子模式)
@@ -75,28 +77,46 @@ class RL_QG_agent:
         # 64个神经元对应棋盘64个位置，直接输出Q值（无激活函数）
         self.Q_values = tf.layers.dense(inputs=dense, units=64, name="q_values")
 
-        # 初始化所有变量并创建模型保存器
+        # ========== 训练部分：对所选动作的Q值做加权Huber回归 ==========
+        self.actions = tf.placeholder(tf.int32, shape=[None], name="actions")        # 已执行的动作
+        self.targets = tf.placeholder(tf.float32, shape=[None], name="targets")      # TD目标值
+        self.is_weights = tf.placeholder(tf.float32, shape=[None], name="is_weights")  # 重要性采样权重
+        q_taken = tf.reduce_sum(self.Q_values * tf.one_hot(self.actions, 64), axis=1)
+        self.td_errors = self.targets - q_taken
+        losses = tf.losses.huber_loss(self.targets, q_taken, reduction=tf.losses.Reduction.NONE)
+        self.loss = tf.reduce_mean(self.is_weights * losses)
+        self.train_op = tf.train.AdamOptimizer(learning_rate).minimize(self.loss)
+
+        # 初始化所有变量并创建模型保存器（只保存网络参数，与已有检查点格式一致）
         self.sess.run(tf.global_variables_initializer())
-        self.saver = tf.train.Saver()
+        self.saver = tf.train.Saver(tf.trainable_variables())
 
 
-    def place(self, state, enables):
+    def predict(self, states):
         """
-        根据当前棋盘状态和合法落子位置，选择最优落子位置
-        
-        :param state: 当前棋盘状态，形状为(8, 8, 3)的NumPy数组
-                      3个通道分别表示：黑棋位置、白棋位置、当前玩家
+        批量前向传播，返回每个棋盘所有位置的Q值
+
+        网络的输入是行棋方视角的状态（通道0: 行棋方，通道1: 对手，通道2: 空位，
+        见 symmetry.to_mover_view），Q值是对行棋方而言的价值。
+
+        :param states: 形状为(N, 3, 8, 8)（或可reshape为(N, 8, 8, 3)）的行棋方视角棋盘状态
+        :return: 形状为(N, 64)的Q值数组
+        """
+        # 状态预处理：转换为适合网络输入的形状 [N, 8, 8, 3]
+        state_input = np.asarray(states, dtype=np.float32).reshape(-1, 8, 8, 3)
+        return self.sess.run(self.Q_values, feed_dict={self.input_states: state_input})
+
+    @staticmethod
+    def select_action(q_row, enables):
+        """
+        根据单个棋盘的Q值和合法落子位置选择动作
+
+        :param q_row: 形状为(64,)的Q值
         :param enables: 合法落子位置的索引列表（0-63）
         :return: 选择的落子位置索引（0-63）
         """
-        # 状态预处理：转换为适合网络输入的形状 [1, 8, 8, 3]
-        state_input = np.array(state).reshape(1, 8, 8, 3).astype(np.float32)
-        
-        # 前向传播获取所有位置的Q值
-        q_vals = self.sess.run(self.Q_values, feed_dict={self.input_states: state_input})
-        
         # 提取合法位置的Q值
-        legal_q = q_vals[0][enables]  # 形状与enables长度一致
+        legal_q = q_row[enables]  # 形状与enables长度一致
         
         # 处理所有合法Q值为0的特殊情况（随机选择）
         if np.sum(legal_q) == 0:
@@ -107,6 +127,76 @@ class RL_QG_agent:
         best_indices = np.where(legal_q == max_q)[0]  # 在合法动作中找出所有具有最大Q值的动作索引
         return enables[np.random.choice(best_indices)]  # 映射回原始位置
 
+    def place(self, state, enables, color):
+        """
+        根据当前棋盘状态和合法落子位置，选择最优落子位置
+        
+        :param state: 环境返回的棋盘状态，形状为(3, 8, 8)的NumPy数组
+                      3个通道分别表示：黑棋位置、白棋位置、空位
+        :param enables: 合法落子位置的索引列表（0-63）
+        :param color: 行棋方（0 黑棋，1 白棋），状态先转换为行棋方视角再输入网络
+        :return: 选择的落子位置索引（0-63）
+        """
+        # 前向传播获取所有位置的Q值
+        q_vals = self.predict(symmetry.to_mover_view(state, color)[None])
+        return self.select_action(q_vals[0], enables)
+
+    def place_batch(self, states, masks, colors):
+        """
+        一次前向传播为一批棋盘选择落子位置（配合 BatchedReversiEnv 使用）
+
+        :param states: 形状为(N, 3, 8, 8)的棋盘状态（黑棋、白棋、空位），预处理方式与place相同
+        :param masks: 形状为(N, 65)的布尔合法掩码，前64列对应棋盘位置，第64列表示跳过
+        :param colors: 形状为(N,)的行棋方（例如 BatchedReversiEnv.to_play）
+        :return: 形状为(N,)的动作数组，无子可下的棋盘返回64（跳过）
+        """
+        q_vals = self.predict(symmetry.to_mover_view(states, colors))
+
+        # 非法位置的Q值置为负无穷，跳过列仅在没有合法落子时为合法（其Q值取0）
+        masks = np.asarray(masks, dtype=bool)
+        scores = np.full(masks.shape, -np.inf, dtype=np.float32)
+        scores[:, :64] = np.where(masks[:, :64], q_vals, -np.inf)
+        scores[:, 64] = np.where(masks[:, 64], 0.0, -np.inf)
+        return np.argmax(scores, axis=1)
+
+
+    def train_step(self, batch, gamma=0.99):
+        """
+        对一个经验小批量执行一次Q学习更新
+
+        状态和下一状态都以各自行棋方的视角存储（见 symmetry.to_mover_view），
+        下一状态通常由对手行棋，因此采用negamax形式的目标:
+            target = reward                                   (终局)
+            target = reward - gamma * max_{a' 合法} Q(s', a')  (非终局，对手行棋)
+            target = reward + gamma * max_{a' 合法} Q(s', a')  (非终局，对手只能跳过，next_same 为True)
+        对手只能跳过时，s' 是跳过之后仍由本方行棋的局面，a' 取本方的合法落子；
+        跳过动作本身不参与训练。
+
+        :param batch: ReplayBuffer.sample 返回的dict
+        :param gamma: 折扣因子
+        :return: (loss, td_errors)，td_errors 可用于 PrioritizedReplayBuffer.update_priorities
+        """
+        actions = np.asarray(batch['actions'], dtype=np.int64)
+        is_place = actions < 64  # 跳过/认输动作不在网络的64个输出中
+        weights = batch['weights'] * is_place
+
+        # 下一状态的最大合法Q值（一次前向传播）
+        next_q = self.predict(batch['next_states'])
+        next_legal = batch['next_legal']
+        next_max = np.where(next_legal, next_q, -np.inf).max(axis=1)
+        next_max = np.where(next_legal.any(axis=1), next_max, 0.0)  # 只在截断的对局末尾出现
+        sign = np.where(batch.get('next_same', False), 1.0, -1.0)  # 下一状态仍由本方行棋时不取负
+        targets = batch['rewards'] + sign * gamma * np.where(batch['dones'], 0.0, next_max)
+
+        loss, td_errors, _ = self.sess.run(
+            [self.loss, self.td_errors, self.train_op],
+            feed_dict={
+                self.input_states: np.asarray(batch['states'], dtype=np.float32).reshape(-1, 8, 8, 3),
+                self.actions: np.where(is_place, actions, 0),
+                self.targets: targets.astype(np.float32),
+                self.is_weights: weights.astype(np.float32),
+            })
+        return loss, td_errors * is_place
 
     def save_model(self):
         """保存训练好的模型参数到指定目录"""
@@ -118,12 +208,6 @@ class RL_QG_agent:
         # 'parameter.ckpt' 是保存模型参数的文件名
         self.saver.save(self.sess, os.path.join(self.model_dir, 'parameter.ckpt'))
         print("模型已保存至", self.model_dir)
-        
-        try:
-            self.saver.save(self.sess, model_path)
-            self.logger.info("模型已保存至 %s", model_path)
-        except Exception as e:
-            self.logger.error("保存模型时出错: %s", e)
 
 
 
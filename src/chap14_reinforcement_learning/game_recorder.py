@@ -0,0 +1,143 @@
+# 标准库
+import argparse  # 命令行参数（回放工具）
+import os        # 文件路径处理
+
+# 第三方库
+from gym.envs.reversi import bitboard
+from gym.envs.reversi.reversi import ReversiEnv
+
+# 单局记录的二进制格式（所有字段均为1字节无符号整数）:
+#   [着法数 n][黑棋数][白棋数][着法1]...[着法n]
+# 着法 0-63 为落子位置，64 表示跳过；着法从黑棋开始交替记录，
+# 因此一局通常只需要 60 多个字节。
+PASS_CODE = 64
+_HEADER_SIZE = 3
+
+
+class GameRecorder:
+    """
+    紧凑的对局记录器
+
+    每局只保存着法序列和最终比分，在内存中攒够 flush_every 局后再批量追加写入二进制日志，
+    替代逐步调用 env.render() 输出棋盘。需要查看时用 replay_game 重建每一步的棋盘。
+    """
+
+    def __init__(self, path, flush_every=100):
+        """
+        :param path: 日志文件路径（以追加方式写入）
+        :param flush_every: 内存中缓存多少局后写入文件
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self._buffer = bytearray()
+        self._pending = 0
+        self.games = 0  # 已记录的总局数
+
+    def add(self, moves, black_count, white_count):
+        """
+        记录一局对局
+
+        :param moves: 按顺序排列的动作编号（0-63 为落子，ReversiEnv 的跳过动作 65 或 64 记为跳过）
+        :param black_count: 终局黑棋数
+        :param white_count: 终局白棋数
+        """
+        codes = [m if 0 <= m < PASS_CODE else PASS_CODE for m in moves]
+        if len(codes) > 255:
+            raise ValueError('A game can record at most 255 moves, got {}'.format(len(codes)))
+        self._buffer += bytes([len(codes), black_count, white_count])
+        self._buffer += bytes(codes)
+        self._pending += 1
+        self.games += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """把缓存的对局一次性追加写入日志文件"""
+        if not self._buffer:
+            return
+        with open(self.path, 'ab') as f:
+            f.write(self._buffer)
+        self._buffer = bytearray()
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def load_games(path):
+    """
+    读取日志中的所有对局
+
+    :return: 列表，每个元素为 (moves, black_count, white_count)，moves 中 64 表示跳过
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    games = []
+    offset = 0
+    while offset < len(data):
+        n, black_count, white_count = data[offset:offset + _HEADER_SIZE]
+        offset += _HEADER_SIZE
+        games.append((list(data[offset:offset + n]), black_count, white_count))
+        offset += n
+    return games
+
+
+def replay_game(moves):
+    """
+    按着法序列从初始局面重建棋盘
+
+    :param moves: 着法序列（64 表示跳过），从黑棋开始交替
+    :return: 列表，第 i 个元素为第 i 步之后的 (3, 8, 8) 棋盘（第 0 个为初始局面）
+    """
+    bits = [bitboard.INITIAL_BLACK, bitboard.INITIAL_WHITE]
+    boards = [bitboard.to_state(bits[0], bits[1])]
+    color = ReversiEnv.BLACK
+    for move in moves:
+        if move != PASS_CODE:
+            legal = bitboard.legal_moves(bits[color], bits[1 - color])
+            if not (legal >> move) & 1:
+                raise ValueError('Illegal move {} for {} at ply {}'.format(
+                    move, 'black' if color == ReversiEnv.BLACK else 'white', len(boards)))
+            bits[color], bits[1 - color], _ = bitboard.make_move(bits[color], bits[1 - color], move)
+        boards.append(bitboard.to_state(bits[0], bits[1]))
+        color = 1 - color
+    return boards
+
+
+def main():
+    parser = argparse.ArgumentParser(description='回放 GameRecorder 记录的黑白棋对局')
+    parser.add_argument('path', help='对局日志文件')
+    parser.add_argument('--game', type=int, default=None, help='要回放的对局编号（从0开始），默认只列出所有对局')
+    parser.add_argument('--ply', type=int, default=None, help='只显示该步之后的棋盘，默认显示每一步')
+    args = parser.parse_args()
+
+    games = load_games(args.path)
+    if args.game is None:
+        print(f"{os.path.basename(args.path)}: 共 {len(games)} 局")
+        for i, (moves, black_count, white_count) in enumerate(games):
+            print(f"第 {i} 局: {len(moves)} 步, 黑棋 {black_count} - 白棋 {white_count}")
+        return
+
+    moves, black_count, white_count = games[args.game]
+    boards = replay_game(moves)
+    plies = range(len(boards)) if args.ply is None else [args.ply]
+    for ply in plies:
+        if ply == 0:
+            print("初始局面")
+        else:
+            move = moves[ply - 1]
+            player = '黑棋' if ply % 2 == 1 else '白棋'
+            where = '跳过' if move == PASS_CODE else f"({move // 8 + 1}, {move % 8 + 1})"
+            print(f"第 {ply} 步: {player} {where}")
+        print(ReversiEnv.board_to_string(boards[ply]))
+    print(f"比分: 黑棋 {black_count} - 白棋 {white_count}")
+
+
+if __name__ == '__main__':
+    main()
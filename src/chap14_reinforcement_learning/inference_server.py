@@ -0,0 +1,188 @@
+# 标准库
+import collections  # OrderedDict 用于实现LRU置换表
+import queue        # 线程安全的请求队列
+import threading    # 后台批处理线程与缓存锁
+import time         # 计算批处理等待截止时间
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError  # 每个请求的结果占位
+
+# 第三方库
+import numpy as np  # 导入NumPy库，用于高效的数值计算和数组操作
+
+# 本地模块
+import symmetry  # 棋盘对称变换，用于置换表去重
+
+
+class InferenceServer:
+    """
+    RL_QG_agent 的批量推理前端
+
+    多个线程并发调用 place(state, enables, color) 时，请求先进入队列，后台线程最多等待
+    max_wait_ms 毫秒或凑满 max_batch_size 个请求，然后用一次前向传播计算整批Q值，
+    再分别为每个调用者做合法位置上的argmax。
+    已经计算过的棋盘Q值保存在按棋盘哈希索引的LRU置换表中，重复局面直接跳过网络。
+    开启 use_symmetry 时，棋盘先映射到8个对称局面中的规范朝向再查表/计算，
+    互为对称的局面共享同一条缓存。
+    """
+
+    def __init__(self, agent, max_batch_size=64, max_wait_ms=2.0, cache_size=100000, use_symmetry=True):
+        """
+        :param agent: 已初始化（并加载参数）的RL_QG_agent
+        :param max_batch_size: 单次前向传播的最大棋盘数
+        :param max_wait_ms: 第一个请求到达后最多等待多少毫秒再执行
+        :param cache_size: 置换表最多保存的局面数，0表示不缓存
+        :param use_symmetry: 是否按对称规范朝向去重（网络在规范朝向上计算，Q值再映射回原朝向）
+        """
+        self.agent = agent
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.cache_size = cache_size
+        self.use_symmetry = use_symmetry
+
+        self._requests = queue.Queue()
+        self._cache = collections.OrderedDict()  # 棋盘字节串 -> 形状为(64,)的Q值
+        self._cache_lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()  # 多个线程同时首次提交时只启动一个后台线程
+        self.hits = 0    # 置换表命中次数
+        self.misses = 0  # 需要网络计算的次数
+        self.batches = 0 # 已执行的前向传播次数
+
+    @staticmethod
+    def board_key(state):
+        """棋盘的哈希键：0/1 状态按uint8序列化后的字节串"""
+        return np.asarray(state, dtype=np.uint8).tobytes()
+
+    def _cache_get(self, key):
+        with self._cache_lock:
+            q_row = self._cache.get(key)
+            if q_row is not None:
+                self._cache.move_to_end(key)  # 标记为最近使用
+                self.hits += 1
+            return q_row
+
+    def _cache_put(self, key, q_row):
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = q_row
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)  # 淘汰最久未使用的局面
+
+    def clear_cache(self):
+        """清空置换表（模型参数更新后必须调用）"""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _restore(self, q_row, k):
+        """规范朝向下的Q值映射回请求棋盘的朝向"""
+        return q_row if k is None else symmetry.untransform_q(q_row, k)
+
+    def _check_running(self):
+        """第一次提交请求时自动启动后台线程；后台线程意外退出时抛出 RuntimeError"""
+        with self._start_lock:
+            if self._thread is None:
+                self.start()
+            thread = self._thread
+        if not thread.is_alive():
+            raise RuntimeError('InferenceServer worker thread is not running')
+
+    def submit(self, state, enables, color):
+        """
+        提交一个落子请求，立即返回Future，结果为选择的落子位置
+        （后台线程尚未启动时自动启动）
+
+        :param state: 环境返回的棋盘状态（黑棋、白棋、空位）
+        :param enables: 合法落子位置列表
+        :param color: 行棋方（0 黑棋，1 白棋）；状态先转换为行棋方视角，再查表和计算
+        """
+        self._check_running()
+        future = Future()
+        state = symmetry.to_mover_view(state, color)
+        k = None
+        if self.use_symmetry:
+            state, k = symmetry.canonicalize(state)
+        key = self.board_key(state)
+        q_row = self._cache_get(key)
+        if q_row is not None:
+            future.set_result(self.agent.select_action(self._restore(q_row, k), enables))
+        else:
+            self._requests.put((key, state, k, enables, future))
+        return future
+
+    def place(self, state, enables, color):
+        """与RL_QG_agent.place接口相同，可以从多个线程同时调用"""
+        future = self.submit(state, enables, color)
+        while True:
+            try:
+                return future.result(timeout=1.0)
+            except FutureTimeoutError:
+                # 等待期间后台线程退出（例如被 stop 或异常终止）时不再无限阻塞
+                thread = self._thread
+                if thread is None or not thread.is_alive():
+                    if future.done():
+                        return future.result()
+                    raise RuntimeError('InferenceServer worker thread stopped before the request was served')
+
+    def _collect_batch(self, first):
+        """从第一个请求开始收集一批请求，直到凑满批大小或等待超时"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:  # 停止信号，放回队列让主循环处理
+                self._requests.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._requests.get()
+            if first is None:
+                break
+            batch = self._collect_batch(first)
+
+            # 同一批中重复的局面只计算一次
+            unique = collections.OrderedDict()
+            for key, state, _, _, _ in batch:
+                unique.setdefault(key, state)
+            try:
+                q_vals = self.agent.predict(np.stack([np.asarray(s) for s in unique.values()]))
+            except Exception as e:
+                for _, _, _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.misses += len(unique)
+
+            rows = dict(zip(unique.keys(), q_vals))
+            for key, q_row in rows.items():
+                self._cache_put(key, q_row)
+            for key, _, k, enables, future in batch:
+                future.set_result(self.agent.select_action(self._restore(rows[key], k), enables))
+
+    def start(self):
+        """启动后台批处理线程"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """处理完已提交的请求后停止后台线程"""
+        if self._thread is not None:
+            self._requests.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,223 @@
+# 导入必要的库
+import numpy as np  # 导入数值计算库，经验数据全部保存在预分配的数组中
+import symmetry     # 棋盘对称变换，用于采样时的数据增强
+
+STATE_SHAPE = (3, 8, 8)  # 单个棋盘状态的形状（黑棋、白棋、空位三个平面）
+_STATE_BITS = int(np.prod(STATE_SHAPE))
+_PACKED_BYTES = (_STATE_BITS + 7) // 8  # 按位压缩后每个状态占用的字节数（24）
+
+
+def pack_states(states):
+    """(n, 3, 8, 8) 的0/1状态 -> (n, 24) 的uint8按位压缩平面"""
+    flat = np.asarray(states).reshape(len(states), -1) == 1
+    return np.packbits(flat, axis=1, bitorder='little')
+
+
+def unpack_states(packed):
+    """(n, 24) 的uint8按位压缩平面 -> (n, 3, 8, 8) 的float32状态"""
+    bits = np.unpackbits(packed, axis=1, count=_STATE_BITS, bitorder='little')
+    return bits.reshape((len(packed),) + STATE_SHAPE).astype(np.float32)
+
+
+def legal_mask_from_actions(actions_list):
+    """合法动作列表的列表 -> uint64位掩码数组（第i位表示格子i可落子，跳过等特殊动作忽略）"""
+    masks = np.zeros(len(actions_list), dtype=np.uint64)
+    for i, actions in enumerate(actions_list):
+        bits = 0
+        for a in actions:
+            if 0 <= a < 64:
+                bits |= 1 << int(a)
+        masks[i] = bits
+    return masks
+
+
+class ReplayBuffer:
+    """
+    环形经验回放缓冲区
+
+    所有转移 (state, action, reward, next_state, done, next_legal, next_same) 保存在预分配的定长数组中:
+    棋盘的三个0/1平面按位压缩为uint8（每个状态24字节），动作用int16存储，
+    下一状态的合法落子用一个uint64位掩码存储，next_same 标记下一状态是否仍由同一方行棋
+    （对手只能跳过时）。每条转移约64字节，
+    写满后从头覆盖最旧的数据，不会产生逐条的Python对象。
+    开启 augment 时，每次采样会对每个样本随机施加8种棋盘对称变换之一，不额外存储数据。
+    """
+
+    def __init__(self, capacity, augment=False):
+        """
+        :param capacity: 最多保存的转移条数
+        :param augment: 采样时是否做随机对称变换增强
+        """
+        self.capacity = int(capacity)
+        self.augment = augment
+        self.states = np.zeros((self.capacity, _PACKED_BYTES), dtype=np.uint8)
+        self.next_states = np.zeros((self.capacity, _PACKED_BYTES), dtype=np.uint8)
+        self.actions = np.zeros(self.capacity, dtype=np.int16)
+        self.rewards = np.zeros(self.capacity, dtype=np.float32)
+        self.dones = np.zeros(self.capacity, dtype=bool)
+        self.next_legal = np.zeros(self.capacity, dtype=np.uint64)
+        self.next_same = np.zeros(self.capacity, dtype=bool)
+        self.position = 0  # 下一条数据写入的位置
+        self.size = 0      # 当前保存的条数
+
+    def __len__(self):
+        return self.size
+
+    def add_batch(self, states, actions, rewards, next_states, dones, next_legal=None, next_same=None):
+        """
+        批量写入转移（例如一整局自我对弈），返回写入位置的索引数组
+
+        :param states: 形状为(n, 3, 8, 8)的棋盘状态
+        :param actions: 形状为(n,)的动作编号
+        :param rewards: 形状为(n,)的即时奖励
+        :param next_states: 形状为(n, 3, 8, 8)的下一状态
+        :param dones: 形状为(n,)的终局标记
+        :param next_legal: 形状为(n,)的uint64位掩码，下一状态行棋方的合法落子；
+                           默认使用下一状态的所有空位
+        :param next_same: 形状为(n,)的布尔数组，下一状态是否仍由本步的行棋方行棋（对手跳过），默认全为False
+        """
+        n = len(actions)
+        idx = (self.position + np.arange(n)) % self.capacity
+        packed_next = pack_states(next_states)
+        if next_legal is None:
+            # 空位平面（第3个平面）正好占压缩数据的最后8个字节
+            next_legal = packed_next[:, -8:].copy().view('<u8').reshape(n)
+        self.states[idx] = pack_states(states)
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = packed_next
+        self.dones[idx] = dones
+        self.next_legal[idx] = next_legal
+        self.next_same[idx] = False if next_same is None else next_same
+        self.position = int((self.position + n) % self.capacity)
+        self.size = min(self.size + n, self.capacity)
+        return idx
+
+    def add(self, state, action, reward, next_state, done, next_legal=None, next_same=False):
+        """写入单条转移"""
+        if next_legal is not None:
+            next_legal = [next_legal]
+        return self.add_batch(np.asarray(state)[None], [action], [reward], np.asarray(next_state)[None],
+                              [done], next_legal, [next_same])
+
+    def _gather(self, idx):
+        """按索引取出一个小批量，状态解压为float32，合法掩码展开为(n, 64)布尔数组"""
+        legal = np.unpackbits(self.next_legal[idx].astype('<u8').view(np.uint8).reshape(len(idx), 8),
+                              axis=1, bitorder='little').astype(bool)
+        batch = {
+            'states': unpack_states(self.states[idx]),
+            'actions': self.actions[idx],
+            'rewards': self.rewards[idx],
+            'next_states': unpack_states(self.next_states[idx]),
+            'dones': self.dones[idx],
+            'next_legal': legal,
+            'next_same': self.next_same[idx],
+            'indices': idx,
+            'weights': np.ones(len(idx), dtype=np.float32),
+        }
+        if self.augment:
+            batch = symmetry.augment_batch(batch)
+        return batch
+
+    def sample(self, batch_size):
+        """
+        均匀随机采样一个小批量
+
+        :return: dict，包含 states / actions / rewards / next_states / dones / next_legal / next_same / indices / weights
+        """
+        idx = np.random.randint(0, self.size, size=batch_size)
+        return self._gather(idx)
+
+
+class SumTree:
+    """
+    数组实现的求和树，用于按优先级比例采样
+
+    叶子节点保存每条数据的优先级，内部节点保存子树优先级之和。
+    更新和采样都对整批索引做向量化处理，每一层只需要一次NumPy运算。
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.leaf_offset = 1
+        while self.leaf_offset < self.capacity:
+            self.leaf_offset *= 2
+        self.depth = self.leaf_offset.bit_length() - 1
+        self.tree = np.zeros(2 * self.leaf_offset, dtype=np.float64)  # tree[1] 为根节点
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def update(self, indices, priorities):
+        """批量设置叶子的优先级，并逐层向上更新父节点之和"""
+        nodes = np.asarray(indices, dtype=np.int64) + self.leaf_offset
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def get(self, indices):
+        return self.tree[np.asarray(indices, dtype=np.int64) + self.leaf_offset]
+
+    def find(self, values):
+        """对每个累积值 v（0 <= v < total），向量化地自顶向下找到对应的叶子索引"""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values >= left_sum
+            values -= left_sum * go_right
+            nodes = left + go_right
+        return nodes - self.leaf_offset
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    优先经验回放（Prioritized Experience Replay）
+
+    采样概率正比于 priority^alpha，并返回重要性采样权重 (N * P(i))^-beta / max_w 用于修正偏差。
+    新数据以当前最大优先级写入，保证至少被采样一次。
+    """
+
+    def __init__(self, capacity, alpha=0.6, beta=0.4, eps=1e-3, augment=False):
+        """
+        :param capacity: 最多保存的转移条数
+        :param alpha: 优先级指数，0 等价于均匀采样
+        :param beta: 重要性采样修正指数，通常在训练过程中从0.4逐渐增加到1
+        :param eps: 加到TD误差上的小常数，避免优先级为0
+        :param augment: 采样时是否做随机对称变换增强
+        """
+        super().__init__(capacity, augment)
+        self.alpha = alpha
+        self.beta = beta
+        self.eps = eps
+        self.tree = SumTree(self.capacity)
+        self.max_priority = 1.0
+
+    def add_batch(self, states, actions, rewards, next_states, dones, next_legal=None, next_same=None):
+        idx = super().add_batch(states, actions, rewards, next_states, dones, next_legal, next_same)
+        self.tree.update(idx, np.full(len(idx), self.max_priority ** self.alpha))
+        return idx
+
+    def sample(self, batch_size):
+        """
+        分层按优先级采样：把 [0, total) 等分为 batch_size 段，每段内均匀取一个值
+        """
+        segment = self.tree.total / batch_size
+        values = (np.arange(batch_size) + np.random.rand(batch_size)) * segment
+        idx = self.tree.find(values)
+        idx = np.minimum(idx, self.size - 1)  # 防止浮点误差落到未使用的叶子上
+
+        probs = self.tree.get(idx) / self.tree.total
+        weights = (self.size * probs) ** (-self.beta)
+        batch = self._gather(idx)
+        batch['weights'] = (weights / weights.max()).astype(np.float32)
+        return batch
+
+    def update_priorities(self, indices, td_errors):
+        """根据新的TD误差更新被采样数据的优先级"""
+        priorities = np.abs(td_errors) + self.eps
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
@@ -1 +1,2 @@
 from gym.envs.reversi.reversi import ReversiEnv # 从OpenAI Gym的Reversi（黑白棋）环境实现中导入核心环境类
+from gym.envs.reversi.batched import BatchedReversiEnv # 多盘并行的自我对弈环境（位棋盘向量化实现）
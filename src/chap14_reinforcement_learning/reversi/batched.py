@@ -0,0 +1,126 @@
+"""
+Batched self-play Reversi
+
+BatchedReversiEnv 把 N 盘对局保存为两个 uint64 位棋盘数组，一次 step 调用用向量化的
+移位运算同时推进所有对局，结束的对局会自动重置。适合大规模自我对弈生成训练数据。
+"""
+
+import numpy as np
+from gym import error
+from gym.envs.reversi import bitboard
+
+
+class BatchedReversiEnv(object):
+    """
+    N 盘并行的黑白棋自我对弈环境（8x8）。
+
+    动作编号: 0 ~ 63 为棋盘位置（x * 8 + y），64 为跳过（pass）。
+    为了与 ReversiEnv 兼容，65（ReversiEnv 的 pass 编号）也按跳过处理。
+    legal_mask() 的第 i 列与动作 i 一一对应，只有在没有可落子位置时跳过才合法。
+    """
+    BLACK = 0
+    WHITE = 1
+    PASS = bitboard.NUM_SQUARES
+
+    def __init__(self, num_envs, illegal_place_mode='raise'):
+        """
+        参数:
+            num_envs: 并行对局数 N
+            illegal_place_mode: 处理非法落子的方式，'lose'(该局判负)或'raise'(抛出异常)
+        """
+        assert isinstance(num_envs, int) and num_envs >= 1, 'Invalid number of envs: {}'.format(num_envs)
+        assert illegal_place_mode in ['lose', 'raise']
+        self.num_envs = num_envs
+        self.board_size = bitboard.BOARD_SIZE
+        self.illegal_place_mode = illegal_place_mode
+        self.reset()
+
+    def reset(self):
+        """重置所有对局，返回形状为 (N, 3, 8, 8) 的状态"""
+        self.black = np.full(self.num_envs, bitboard.INITIAL_BLACK, dtype=np.uint64)
+        self.white = np.full(self.num_envs, bitboard.INITIAL_WHITE, dtype=np.uint64)
+        self.to_play = np.full(self.num_envs, BatchedReversiEnv.BLACK, dtype=np.int8)
+        self._update_moves()
+        return self.states()
+
+    def _update_moves(self):
+        black_to_play = self.to_play == BatchedReversiEnv.BLACK
+        own = np.where(black_to_play, self.black, self.white)
+        opp = np.where(black_to_play, self.white, self.black)
+        self.moves = bitboard.legal_moves(own, opp)
+        self.opponent_moves = bitboard.legal_moves(opp, own)
+
+    def states(self):
+        """形状为 (N, 3, 8, 8) 的 float32 状态（通道 0: 黑棋，通道 1: 白棋，通道 2: 空位）"""
+        d = self.board_size
+        planes = np.empty((self.num_envs, 3, d * d), dtype=np.float32)
+        planes[:, 0] = bitboard.unpack(self.black)
+        planes[:, 1] = bitboard.unpack(self.white)
+        planes[:, 2] = 1.0 - planes[:, 0] - planes[:, 1]
+        return planes.reshape(self.num_envs, 3, d, d)
+
+    def legal_mask(self):
+        """形状为 (N, 65) 的布尔数组，第 64 列表示只能跳过"""
+        mask = np.empty((self.num_envs, BatchedReversiEnv.PASS + 1), dtype=bool)
+        mask[:, :BatchedReversiEnv.PASS] = bitboard.unpack(self.moves)
+        mask[:, BatchedReversiEnv.PASS] = self.moves == 0
+        return mask
+
+    def scores(self):
+        """(black_count, white_count)，各为形状 (N,) 的 int64 数组"""
+        return bitboard.popcount(self.black), bitboard.popcount(self.white)
+
+    def step(self, actions):
+        """
+        所有对局同时走一步。
+
+        参数:
+            actions: 形状为 (N,) 的整数数组，每盘当前行棋方的动作
+        返回:
+            states (np.ndarray): (N, 3, 8, 8)，已结束的对局为重置后的初始局面
+            rewards (np.ndarray): (N,) float32，对刚刚行棋的一方: 赢 1，输 -1，平局或未结束 0
+            dones (np.ndarray): (N,) bool，本步是否结束了该局
+            info (dict): 'winner' 为 (N,) int8（1 黑胜，-1 白胜，0 平局或未结束），
+                         'black_count' / 'white_count' 为重置前的棋子数
+        """
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+        is_pass = actions >= BatchedReversiEnv.PASS
+        squares = np.where(is_pass, 0, actions)
+        move = np.where(is_pass, np.uint64(0), bitboard.square_bit(squares))
+
+        # 合法性: 落子必须在合法位置集合内，跳过只在无子可下时合法
+        legal = np.where(is_pass, self.moves == 0, (self.moves & move) != 0)
+        illegal = ~legal
+        if illegal.any() and self.illegal_place_mode == 'raise':
+            raise error.Error('Illegal actions in envs {}'.format(np.flatnonzero(illegal).tolist()))
+        move = np.where(illegal, np.uint64(0), move)
+
+        black_to_play = self.to_play == BatchedReversiEnv.BLACK
+        own = np.where(black_to_play, self.black, self.white)
+        opp = np.where(black_to_play, self.white, self.black)
+        flipped = bitboard.flips(own, opp, move)
+        own = own | move | flipped
+        opp = opp & ~flipped
+        self.black = np.where(black_to_play, own, opp)
+        self.white = np.where(black_to_play, opp, own)
+        self.to_play = 1 - self.to_play
+        self._update_moves()
+
+        # 双方都无子可下时对局结束（棋盘下满也属于这种情况）
+        finished = (self.moves == 0) & (self.opponent_moves == 0)
+        black_count, white_count = self.scores()
+        winner = np.sign(black_count - white_count).astype(np.int8)
+        # 非法落子直接判负
+        winner = np.where(illegal, np.where(black_to_play, -1, 1), winner).astype(np.int8)
+        dones = finished | illegal
+        winner[~dones] = 0
+        mover_sign = np.where(black_to_play, 1, -1)
+        rewards = (winner * mover_sign).astype(np.float32)
+        info = {'winner': winner, 'black_count': black_count, 'white_count': white_count}
+
+        if dones.any():
+            self.black[dones] = bitboard.INITIAL_BLACK
+            self.white[dones] = bitboard.INITIAL_WHITE
+            self.to_play[dones] = BatchedReversiEnv.BLACK
+            self._update_moves()
+        return self.states(), rewards, dones, info
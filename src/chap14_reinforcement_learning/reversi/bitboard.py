@@ -0,0 +1,254 @@
+"""
+Bitboard core for 8x8 Reversi
+
+棋盘用两个 64 位整数表示（黑棋一个、白棋一个），第 i 位对应格子 i = x * 8 + y，
+与 ReversiEnv 的动作编号一致。合法落子和翻转计算都通过"移位 + 掩码"完成，
+一次查询只需要几十次整数运算，而不是逐格遍历 (3, d, d) 的数组。
+
+所有核心函数既接受 Python int（单盘），也接受 dtype 为 uint64 的 NumPy 数组（多盘并行），
+两种情况下走的是同一套代码。
+"""
+
+import numpy as np
+
+BOARD_SIZE = 8
+NUM_SQUARES = BOARD_SIZE ** 2
+
+FULL = (1 << NUM_SQUARES) - 1      # 64 位全 1
+NOT_COL_0 = 0xfefefefefefefefe     # 去掉第 0 列（向右移动后防止跨行回绕）
+NOT_COL_7 = 0x7f7f7f7f7f7f7f7f     # 去掉第 7 列（向左移动后防止跨行回绕）
+
+# 8 个方向: (移位量, 是否左移, 移位后的掩码)
+# 行方向 dx 对应 ±8 位，列方向 dy 对应 ±1 位
+_DIRECTIONS = []
+for _dx in (-1, 0, 1):
+    for _dy in (-1, 0, 1):
+        if _dx == 0 and _dy == 0:
+            continue
+        _delta = _dx * BOARD_SIZE + _dy
+        _mask = FULL
+        if _dy == 1:
+            _mask &= NOT_COL_0
+        elif _dy == -1:
+            _mask &= NOT_COL_7
+        _DIRECTIONS.append((abs(_delta), _delta > 0, _mask))
+
+# NumPy 版本的方向表，用于 uint64 数组（批量棋盘）
+_DIRECTIONS_U64 = [(np.uint64(amount), left, np.uint64(mask)) for amount, left, mask in _DIRECTIONS]
+_FULL_U64 = np.uint64(FULL)
+
+# 初始局面（与 ReversiEnv._reset 一致）: 黑棋在 (4,3)(3,4)，白棋在 (3,3)(4,4)
+INITIAL_BLACK = (1 << (4 * BOARD_SIZE + 3)) | (1 << (3 * BOARD_SIZE + 4))
+INITIAL_WHITE = (1 << (3 * BOARD_SIZE + 3)) | (1 << (4 * BOARD_SIZE + 4))
+
+
+def _tables(b):
+    """根据输入类型选择方向表和全 1 掩码"""
+    if isinstance(b, np.ndarray):
+        return _DIRECTIONS_U64, _FULL_U64
+    return _DIRECTIONS, FULL
+
+
+def _shift(b, amount, left, mask):
+    if left:
+        return (b << amount) & mask
+    return (b >> amount) & mask
+
+
+def square_bit(square):
+    """格子编号 -> 只有该位为 1 的位棋盘"""
+    if isinstance(square, np.ndarray):
+        return np.uint64(1) << square.astype(np.uint64)
+    return 1 << int(square)
+
+
+def neighbours(b):
+    """与 b 中任意棋子相邻（8 个方向）的格子"""
+    directions, _ = _tables(b)
+    result = b & 0
+    for amount, left, mask in directions:
+        result |= _shift(b, amount, left, mask)
+    return result
+
+
+def legal_moves(own, opp, empty=None):
+    """
+    计算当前玩家所有合法落子位置。
+
+    参数:
+        own: 当前玩家的位棋盘
+        opp: 对手的位棋盘
+        empty: 候选空位，默认为所有空格；传入边界空位(frontier)可以缩小候选范围
+    返回:
+        合法落子位置组成的位棋盘
+    """
+    directions, full = _tables(own)
+    if empty is None:
+        empty = ~(own | opp) & full
+    moves = own & 0
+    for amount, left, mask in directions:
+        # 从己方棋子出发，沿该方向延伸连续的对手棋子（最多 6 个）
+        x = _shift(own, amount, left, mask) & opp
+        for _ in range(5):
+            x |= _shift(x, amount, left, mask) & opp
+        # 连续对手棋子之后的空位即为合法落子点
+        moves |= _shift(x, amount, left, mask) & empty
+    return moves
+
+
+def flips(own, opp, move):
+    """
+    计算在 move（单个位）落子后会被翻转的对手棋子。
+
+    参数:
+        own: 当前玩家的位棋盘
+        opp: 对手的位棋盘
+        move: 落子位置的位棋盘（square_bit 的结果）；为 0 时表示不落子
+    返回:
+        需要翻转的棋子组成的位棋盘，为 0 表示该位置不能翻转任何棋子
+    """
+    directions, _ = _tables(own)
+    flipped = own & 0
+    for amount, left, mask in directions:
+        # 从落子点出发的一段连续对手棋子
+        x = _shift(move, amount, left, mask) & opp
+        run = x
+        for _ in range(5):
+            x = _shift(x, amount, left, mask) & opp
+            run |= x
+        # 这段棋子之后紧跟己方棋子时才会被夹住
+        captured = (_shift(run, amount, left, mask) & own) != 0
+        flipped |= run * captured
+    return flipped
+
+
+def make_move(own, opp, square):
+    """
+    在 square 落子并翻转对手棋子（不检查合法性）。
+
+    返回:
+        (own, opp, flipped): 落子后双方的位棋盘以及被翻转的棋子
+    """
+    move = square_bit(square)
+    flipped = flips(own, opp, move)
+    return own | move | flipped, opp & ~flipped, flipped
+
+
+def popcount(b):
+    """统计位棋盘中 1 的个数"""
+    if isinstance(b, np.ndarray):
+        if hasattr(np, 'bitwise_count'):  # NumPy >= 2.0
+            return np.bitwise_count(b).astype(np.int64)
+        return unpack(b).sum(axis=-1, dtype=np.int64)
+    if hasattr(b, 'bit_count'):  # Python >= 3.10
+        return b.bit_count()
+    return bin(b).count('1')
+
+
+def squares(b):
+    """位棋盘 -> 按从小到大排列的格子编号列表"""
+    result = []
+    while b:
+        low = b & -b
+        result.append(low.bit_length() - 1)
+        b ^= low
+    return result
+
+
+def unpack(b):
+    """uint64 位棋盘数组，形状 (...) -> 形状 (..., 64) 的 0/1 uint8 数组，第 i 列对应格子 i"""
+    raw = np.ascontiguousarray(b, dtype='<u8').view(np.uint8).reshape(np.shape(b) + (8,))
+    return np.unpackbits(raw, axis=-1, bitorder='little')
+
+
+def to_planes(b):
+    """位棋盘 -> 形状为 (8, 8) 的 0/1 浮点数组"""
+    raw = np.frombuffer(int(b).to_bytes(8, 'little'), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder='little').reshape(BOARD_SIZE, BOARD_SIZE).astype(np.float64)
+
+
+def from_plane(plane):
+    """形状为 (8, 8) 的 0/1 数组 -> 位棋盘"""
+    packed = np.packbits(np.asarray(plane).reshape(-1) == 1, bitorder='little')
+    return int.from_bytes(packed.tobytes(), 'little')
+
+
+def to_state(black, white):
+    """
+    位棋盘 -> ReversiEnv 使用的 (3, 8, 8) 状态张量
+    （通道 0: 黑棋，通道 1: 白棋，通道 2: 空位）
+    """
+    state = np.empty((3, BOARD_SIZE, BOARD_SIZE))
+    state[0] = to_planes(black)
+    state[1] = to_planes(white)
+    state[2] = 1.0 - state[0] - state[1]
+    return state
+
+
+def from_state(state):
+    """(3, 8, 8) 状态张量 -> (black, white) 位棋盘"""
+    return from_plane(state[0]), from_plane(state[1])
+
+
+def game_finished(black, white):
+    """
+    与 ReversiEnv.game_finished 语义一致:
+    返回 1 表示黑棋获胜，-1 表示白棋获胜，0 表示尚未结束
+    """
+    return result_from_counts(popcount(black), popcount(white))
+
+
+def result_from_counts(black_score, white_score, num_squares=NUM_SQUARES):
+    """只根据双方棋子数判定胜负，语义同 game_finished"""
+    if black_score == 0:
+        return -1
+    if white_score == 0:
+        return 1
+    if black_score + white_score == num_squares:
+        return 1 if black_score >= num_squares / 2 else -1
+    return 0
+
+
+def check_parity(n_games=200, seed=0):
+    """
+    在随机对局上逐步比较位棋盘实现与 ReversiEnv 中基于数组的参考实现，
+    包括合法落子列表、落子后的棋盘以及终局判定。发现不一致时抛出 AssertionError。
+
+    返回:
+        int: 总共比较的局面数
+    """
+    from gym.envs.reversi.reversi import ReversiEnv
+
+    rng = np.random.RandomState(seed)
+    positions = 0
+    for _ in range(n_games):
+        board = to_state(INITIAL_BLACK, INITIAL_WHITE)
+        bits = [INITIAL_BLACK, INITIAL_WHITE]
+        color = ReversiEnv.BLACK
+        passes = 0
+        while passes < 2:
+            positions += 1
+            expected = ReversiEnv.get_possible_actions(board, color)
+            moves = squares(legal_moves(bits[color], bits[1 - color]))
+            if not moves:
+                moves = [NUM_SQUARES + 1]
+            assert sorted(set(expected)) == moves, (expected, moves)
+            assert np.array_equal(board, to_state(bits[0], bits[1]))
+            assert ReversiEnv.game_finished(board) == game_finished(bits[0], bits[1])
+
+            action = moves[rng.randint(len(moves))]
+            if action == NUM_SQUARES + 1:
+                passes += 1
+            else:
+                passes = 0
+                for square in range(NUM_SQUARES):
+                    assert ReversiEnv.valid_place(board, square, color) == bool(
+                        (legal_moves(bits[color], bits[1 - color]) >> square) & 1)
+                ReversiEnv.make_place(board, action, color)
+                bits[color], bits[1 - color], _ = make_move(bits[color], bits[1 - color], action)
+            color = 1 - color
+    return positions
+
+
+if __name__ == '__main__':
+    print("bitboard / 数组实现一致，共比较 {} 个局面".format(check_parity()))
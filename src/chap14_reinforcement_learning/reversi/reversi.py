@@ -9,10 +9,16 @@ from gym import spaces
 import numpy as np
 from gym import error
 from gym.utils import seeding
+from gym.envs.reversi import bitboard
+from gym.envs.reversi import search
  #这段代码定义了一个随机策略函数 random_policy，用于在黑白棋（Reversi/Othello）游戏中为当前玩家随机选择一个合法的落子动作（包括“跳过”动作）
 def make_random_policy(np_random):
     def random_policy(state, player_color):
-        possible_places = ReversiEnv.get_possible_actions(state, player_color)
+        if state.shape[-1] == bitboard.BOARD_SIZE:
+            bits = bitboard.from_state(state)
+            possible_places = bitboard.squares(bitboard.legal_moves(bits[player_color], bits[1 - player_color]))
+        else:
+            possible_places = ReversiEnv.get_possible_actions(state, player_color)
         # 没有可落子位置，返回"pass"动作
         if len(possible_places) == 0:
             d = state.shape[-1]#动态获取棋盘的边长
@@ -30,18 +36,29 @@ class ReversiEnv(gym.Env):
     WHITE = 1
     metadata = {"render.modes": ["ansi","human"]}
 
-    def __init__(self, player_color, opponent, observation_type, illegal_place_mode, board_size):
+    def __init__(self, player_color, opponent, observation_type, illegal_place_mode, board_size, backend=None):
         """
         参数:
             player_color: 代理(玩家)的棋子颜色，'black'或'white'
-            opponent: 对手策略，可以是'random'或自定义策略函数
+            opponent: 对手策略，可以是'random'、'search'(alpha-beta搜索)或自定义策略函数
             observation_type: 状态编码方式，目前仅支持'numpy3c'
             illegal_place_mode: 处理非法落子的方式，'lose'(自动输)或'raise'(抛出异常)
             board_size: 棋盘大小，默认8x8
+            backend: 规则引擎，'bitboard'(64位位棋盘，仅支持8x8)或'numpy'(逐格遍历数组)，
+                     默认8x8棋盘使用'bitboard'，其他尺寸使用'numpy'
         """
         assert isinstance(board_size, int) and board_size >= 1, 'Invalid board size: {}'.format(board_size)
         self.board_size = board_size
 
+        if backend is None:
+            backend = 'bitboard' if board_size == bitboard.BOARD_SIZE else 'numpy'
+        assert backend in ['bitboard', 'numpy']
+        if backend == 'bitboard' and board_size != bitboard.BOARD_SIZE:
+            raise error.Error('The bitboard backend only supports 8x8 boards, not {}'.format(board_size))
+        self.backend = backend
+        self._state = None
+        self._bits = None
+
         # 将颜色字符串映射为内部表示
         colormap = {
             'black': ReversiEnv.BLACK,
@@ -66,11 +83,10 @@ class ReversiEnv(gym.Env):
         # One action for each board position and resign and pass
         #这段代码主要用于 初始化强化学习环境（如游戏环境）的动作空间（action_space）和观察空间（observation_space），并完成环境的初始设置
         self.action_space = spaces.Discrete(self.board_size ** 2 + 2)
+        self._seed()  # reset 时对手可能需要先行落子，因此先创建对手策略
         observation = self.reset()
         self.observation_space = spaces.Box(np.zeros(observation.shape), np.ones(observation.shape))
 
-        self._seed()
-
     # 设置环境的随机数种子
     def _seed(self, seed=None):
         self.np_random, seed = seeding.np_random(seed)
@@ -80,6 +96,8 @@ class ReversiEnv(gym.Env):
             if self.opponent == 'random':
                 self.opponent_policy = make_random_policy(self.np_random)
                 print("################################################################")
+            elif self.opponent == 'search':
+                self.opponent_policy = search.make_search_policy()
             else:
                 raise error.Error('Unrecognized opponent policy {}'.format(self.opponent))# 如果不是可识别的对手策略，抛出错误
         else:
@@ -87,28 +105,106 @@ class ReversiEnv(gym.Env):
 
         return [seed]
 
+    @property
+    def state(self):
+        """(3, d, d) 状态张量。bitboard 后端下按需从位棋盘构建，棋盘变化后才重新生成"""
+        if self._state is None:
+            self._state = bitboard.to_state(self._bits[0], self._bits[1])
+        return self._state
+
+    @state.setter
+    def state(self, board):
+        if self.backend == 'bitboard':
+            self._bits = list(bitboard.from_state(board))
+            self._state = None
+        else:
+            self._state = board
+        self._sync_counters()
+
+    @property
+    def black_count(self):
+        """黑棋数量（增量维护，O(1)）"""
+        return self.disc_counts[ReversiEnv.BLACK]
+
+    @property
+    def white_count(self):
+        """白棋数量（增量维护，O(1)）"""
+        return self.disc_counts[ReversiEnv.WHITE]
+
+    def _sync_counters(self):
+        """根据当前棋盘重新计算棋子数、边界空位和合法落子缓存（只在 reset 或直接设置 state 时调用）"""
+        if self.backend == 'bitboard':
+            self.disc_counts = [bitboard.popcount(self._bits[0]), bitboard.popcount(self._bits[1])]
+            occupied = self._bits[0] | self._bits[1]
+            # 边界空位(frontier): 与任意棋子相邻的空格，合法落子只可能出现在这里
+            self.frontier = bitboard.neighbours(occupied) & ~occupied & bitboard.FULL
+            self._legal_moves = [None, None]  # 每种颜色的合法落子位棋盘，落子后失效
+        else:
+            self.disc_counts = [int(np.sum(self._state[0] == 1)), int(np.sum(self._state[1] == 1))]
+
     def _reset(self):
         # init board setting
-        self.state = np.zeros((3, self.board_size, self.board_size))
-        self.state[2, :, :] = 1.0
-        self.state[2, 3:5, 3:5] = 0
-        self.state[0, 4, 3] = 1
-        self.state[0, 3, 4] = 1
-        self.state[1, 3, 3] = 1
-        self.state[1, 4, 4] = 1
+        if self.backend == 'bitboard':
+            self.state = bitboard.to_state(bitboard.INITIAL_BLACK, bitboard.INITIAL_WHITE)
+        else:
+            board = np.zeros((3, self.board_size, self.board_size))
+            board[2, :, :] = 1.0
+            board[2, 3:5, 3:5] = 0
+            board[0, 4, 3] = 1
+            board[0, 3, 4] = 1
+            board[1, 3, 3] = 1
+            board[1, 4, 4] = 1
+            self.state = board
         self.to_play = ReversiEnv.BLACK
-        self.possible_actions = ReversiEnv.get_possible_actions(self.state, self.to_play)
+        self.possible_actions = self._possible_actions(self.to_play)
         self.done = False
 
         # Let the opponent play if it's not the agent's turn
         if self.player_color != self.to_play:# 如果当前不是玩家回合(由对手回合)
-            a = self.opponent_policy(self.state)
-            ReversiEnv.make_place(self.state, a, ReversiEnv.BLACK)
+            a = self.opponent_policy(self.state, ReversiEnv.BLACK)
+            self._make_place(a, ReversiEnv.BLACK)
             self.to_play = ReversiEnv.WHITE
         return self.state
 
+    # 以下方法根据 backend 分派到位棋盘或数组实现
+    def _legal_bits(self, player_color):
+        """当前局面下 player_color 的合法落子位棋盘，同一局面只计算一次"""
+        if self._legal_moves[player_color] is None:
+            self._legal_moves[player_color] = bitboard.legal_moves(
+                self._bits[player_color], self._bits[1 - player_color], self.frontier)
+        return self._legal_moves[player_color]
+
+    def _possible_actions(self, player_color):
+        if self.backend == 'numpy':
+            return ReversiEnv.get_possible_actions(self.state, player_color)
+        return bitboard.squares(self._legal_bits(player_color)) or [self.board_size ** 2 + 1]
+
+    def _valid_place(self, action, player_color):
+        if self.backend == 'numpy':
+            return ReversiEnv.valid_place(self.state, action, player_color)
+        return bool((self._legal_bits(player_color) >> int(action)) & 1)
+
+    def _make_place(self, action, player_color):
+        if self.backend == 'numpy':
+            ReversiEnv.make_place(self.state, action, player_color)
+            self.disc_counts = [int(np.sum(self._state[0] == 1)), int(np.sum(self._state[1] == 1))]
+            return
+        own, opp, flipped = bitboard.make_move(self._bits[player_color], self._bits[1 - player_color], action)
+        self._bits[player_color], self._bits[1 - player_color] = own, opp
+        self._state = None
+
+        # 只根据这一步的落子点和翻转数更新计数与边界空位
+        n_flipped = bitboard.popcount(flipped)
+        self.disc_counts[player_color] += n_flipped + 1
+        self.disc_counts[1 - player_color] -= n_flipped
+        self.frontier = (self.frontier | bitboard.neighbours(bitboard.square_bit(action))) & ~(own | opp) & bitboard.FULL
+        self._legal_moves = [None, None]
+
+    def _game_finished(self):
+        return bitboard.result_from_counts(self.disc_counts[0], self.disc_counts[1], self.board_size ** 2)
+
     def _step(self, action):
-         """
+        """
         执行一个落子动作，并更新环境状态。
     
         参数:
@@ -133,10 +229,10 @@ class ReversiEnv(gym.Env):
             return self.state, 0., True, {'state': self.state}
         if color == 0:  #  黑色棋子是 0
             if ReversiEnv.pass_place(self.board_size, action):
-                pass
+                self.possible_actions = self._possible_actions(1)
             elif ReversiEnv.resign_place(self.board_size, action):
                 return self.state, -1, True, {'state': self.state}
-            elif not ReversiEnv.valid_place(self.state, action, self.player_color):
+            elif not self._valid_place(action, self.player_color):
                 if self.illegal_place_mode == 'raise':
                     raise
                 elif self.illegal_place_mode == 'lose':
@@ -146,15 +242,15 @@ class ReversiEnv(gym.Env):
                 else:
                     raise error.Error('Unsupported illegal place action: {}'.format(self.illegal_place_mode))
             else:
-                ReversiEnv.make_place(self.state, action, self.player_color)
-                self.possible_actions = ReversiEnv.get_possible_actions(self.state, 1)
+                self._make_place(action, self.player_color)
+                self.possible_actions = self._possible_actions(1)
 
         else:       # # Opponent play  白色棋子 是 1
             if ReversiEnv.pass_place(self.board_size, action):
-                pass
+                self.possible_actions = self._possible_actions(0)
             elif ReversiEnv.resign_place(self.board_size, action):
                 return self.state, 1, True, {'state': self.state}
-            elif not ReversiEnv.valid_place(self.state, action, 1 - self.player_color):
+            elif not self._valid_place(action, 1 - self.player_color):
                 if self.illegal_place_mode == 'raise':
                     raise
                 elif self.illegal_place_mode == 'lose':
@@ -164,11 +260,11 @@ class ReversiEnv(gym.Env):
                 else:
                     raise error.Error('Unsupported illegal place action: {}'.format(self.illegal_place_mode))
             else:
-                ReversiEnv.make_place(self.state, action , 1 - self.player_color)
-                self.possible_actions = ReversiEnv.get_possible_actions(self.state, 0 )
+                self._make_place(action, 1 - self.player_color)
+                self.possible_actions = self._possible_actions(0)
 
 
-        reward = ReversiEnv.game_finished(self.state)
+        reward = self._game_finished()
         if self.player_color == ReversiEnv.WHITE:
             reward = - reward
         self.done = reward != 0
@@ -183,33 +279,31 @@ class ReversiEnv(gym.Env):
     def _render(self, mode='human', close=False):  #渲染函数，用于将当前棋盘状态可视化输出到终端或字符串中
         if close:
             return
-        board = self.state
+        text = ReversiEnv.board_to_string(self.state)
         outfile = StringIO() if mode == 'ansi' else sys.stdout
+        outfile.write(text)  # 整个棋盘拼好后一次写出
+
+        if mode != 'human':
+            return outfile
 
-        outfile.write(' ' * 7)
-        for j in range(board.shape[1]):
-            outfile.write(' ' +  str(j + 1) + '  | ')
-        outfile.write('\n')
-        outfile.write(' ' * 5)
-        outfile.write('-' * (board.shape[1] * 6 - 1))# 根据列数计算分隔线长度
-        outfile.write('\n')
-        for i in range(board.shape[1]):
-            outfile.write(' ' +  str(i + 1) + '  |')
-            for j in range(board.shape[1]):
+    @staticmethod
+    def board_to_string(board):
+        """把 (3, d, d) 的棋盘格式化为文本（O: 空位，B: 黑棋，W: 白棋）"""
+        d = board.shape[1]
+        lines = [' ' * 7 + ''.join(' ' + str(j + 1) + '  | ' for j in range(d))]
+        lines.append(' ' * 5 + '-' * (d * 6 - 1))# 根据列数计算分隔线长度
+        for i in range(d):
+            cells = []
+            for j in range(d):
                 if board[2, i, j] == 1:
-                    outfile.write('  O  ')
+                    cells.append('  O  ')
                 elif board[0, i, j] == 1:
-                    outfile.write('  B  ')
+                    cells.append('  B  ')
                 else:
-                    outfile.write('  W  ')
-                outfile.write('|')
-            outfile.write('\n')
-            outfile.write(' ' )
-            outfile.write('-' * (board.shape[1] * 7 - 1))
-            outfile.write('\n')
-
-        if mode != 'human':
-            return outfile
+                    cells.append('  W  ')
+            lines.append(' ' + str(i + 1) + '  |' + '|'.join(cells) + '|')
+            lines.append(' ' + '-' * (d * 7 - 1))
+        return '\n'.join(lines) + '\n'
 
     # @staticmethod
     # def pass_place(board_size, action):
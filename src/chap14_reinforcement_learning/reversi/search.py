@@ -0,0 +1,167 @@
+"""
+Alpha-beta search player for Reversi
+
+基于位棋盘的 negamax alpha-beta 搜索：迭代加深 + 置换表 + 走法排序，每步有固定的时间预算。
+局面以 (own, opp) 两个整数在递归中传递，落子就是计算新的两个整数、回溯时直接丢弃，
+不需要复制或还原棋盘数组。可以作为 ReversiEnv 的对手策略，也可以用作评估时的基准对手。
+"""
+
+import time
+import numpy as np
+from gym.envs.reversi import bitboard
+
+# 经典的黑白棋位置权重：角最有价值，角旁边的 X / C 格最危险
+_WEIGHTS = np.array([
+    [100, -20, 10,  5,  5, 10, -20, 100],
+    [-20, -50, -2, -2, -2, -2, -50, -20],
+    [ 10,  -2,  1,  1,  1,  1,  -2,  10],
+    [  5,  -2,  1,  0,  0,  1,  -2,   5],
+    [  5,  -2,  1,  0,  0,  1,  -2,   5],
+    [ 10,  -2,  1,  1,  1,  1,  -2,  10],
+    [-20, -50, -2, -2, -2, -2, -50, -20],
+    [100, -20, 10,  5,  5, 10, -20, 100],
+]).reshape(-1)
+
+# 按权重分组的掩码: [(权重, 该权重所有格子组成的位棋盘)]
+_WEIGHT_MASKS = [(int(w), sum(1 << int(sq) for sq in np.flatnonzero(_WEIGHTS == w)))
+                 for w in np.unique(_WEIGHTS) if w != 0]
+# 走法排序使用的格子优先级（权重高的格子先搜索）
+_SQUARE_PRIORITY = [-int(w) for w in _WEIGHTS]
+
+_EXACT, _LOWER, _UPPER = 0, 1, 2
+_WIN_SCORE = 10000  # 终局分数的放大倍数，保证任何终局结果都比静态评估更重要
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+class AlphaBetaSearch(object):
+    """
+    迭代加深的 alpha-beta 搜索器。
+
+    参数:
+        time_limit: 每步搜索的时间预算（秒）
+        max_depth: 最大搜索深度
+        tt_size: 置换表最多保存的局面数，超过后清空
+    """
+
+    def __init__(self, time_limit=0.1, max_depth=60, tt_size=1000000):
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.tt_size = tt_size
+        self.tt = {}  # (own, opp) -> (depth, flag, value, best_square)
+        self.nodes = 0
+        self._deadline = None
+
+    @staticmethod
+    def evaluate(own, opp, own_moves, opp_moves):
+        """静态评估（对 own 一方）：位置权重 + 行动力"""
+        score = 0
+        for weight, mask in _WEIGHT_MASKS:
+            score += weight * (bitboard.popcount(own & mask) - bitboard.popcount(opp & mask))
+        return score + 5 * (bitboard.popcount(own_moves) - bitboard.popcount(opp_moves))
+
+    @staticmethod
+    def _final_score(own, opp):
+        diff = bitboard.popcount(own) - bitboard.popcount(opp)
+        return diff * _WIN_SCORE
+
+    def _negamax(self, own, opp, depth, alpha, beta, passed):
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.time() > self._deadline:
+            raise _SearchTimeout()
+
+        alpha_orig = alpha
+        key = (own, opp)
+        entry = self.tt.get(key)
+        tt_move = None
+        if entry is not None:
+            tt_depth, flag, value, tt_move = entry
+            if tt_depth >= depth:
+                if flag == _EXACT:
+                    return value
+                if flag == _LOWER:
+                    alpha = max(alpha, value)
+                elif flag == _UPPER:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        moves = bitboard.legal_moves(own, opp)
+        if not moves:
+            if passed:  # 双方都无子可下，对局结束
+                return self._final_score(own, opp)
+            return -self._negamax(opp, own, depth, -beta, -alpha, True)
+        if depth == 0:
+            return self.evaluate(own, opp, moves, bitboard.legal_moves(opp, own))
+
+        ordered = sorted(bitboard.squares(moves), key=_SQUARE_PRIORITY.__getitem__)
+        if tt_move is not None and (moves >> tt_move) & 1:
+            ordered.remove(tt_move)
+            ordered.insert(0, tt_move)
+
+        best_value = -float('inf')
+        best_square = ordered[0]
+        for square in ordered:
+            move = 1 << square
+            flipped = bitboard.flips(own, opp, move)
+            # 落子后轮到对手：新局面为 (opp 去掉被翻转的棋子, own 加上落子和翻转的棋子)
+            value = -self._negamax(opp ^ flipped, own | move | flipped, depth - 1, -beta, -alpha, False)
+            if value > best_value:
+                best_value, best_square = value, square
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= alpha_orig:
+            flag = _UPPER
+        elif best_value >= beta:
+            flag = _LOWER
+        else:
+            flag = _EXACT
+        self.tt[key] = (depth, flag, best_value, best_square)
+        return best_value
+
+    def search(self, own, opp):
+        """
+        为 own 一方搜索最佳落子。
+
+        返回:
+            (square, value, depth): 最佳格子编号（无子可下时为 None）、搜索值、完成的最大深度
+        """
+        moves = bitboard.legal_moves(own, opp)
+        if not moves:
+            return None, 0, 0
+        if len(self.tt) > self.tt_size:
+            self.tt.clear()
+
+        self._deadline = time.time() + self.time_limit
+        empties = bitboard.NUM_SQUARES - bitboard.popcount(own | opp)
+        best_square = bitboard.squares(moves)[0]
+        best_value, completed = 0, 0
+        for depth in range(1, min(self.max_depth, empties) + 1):
+            try:
+                value = self._negamax(own, opp, depth, -float('inf'), float('inf'), False)
+            except _SearchTimeout:
+                break
+            best_square = self.tt[(own, opp)][3]
+            best_value, completed = value, depth
+        return best_square, best_value, completed
+
+
+def make_search_policy(time_limit=0.1, max_depth=60):
+    """
+    生成与 make_random_policy 接口相同的搜索策略: policy(state, player_color) -> action
+    """
+    searcher = AlphaBetaSearch(time_limit=time_limit, max_depth=max_depth)
+
+    def search_policy(state, player_color):
+        bits = bitboard.from_state(state)
+        square, _, _ = searcher.search(bits[player_color], bits[1 - player_color])
+        if square is None:
+            return state.shape[-1] ** 2 + 1  # pass动作
+        return square
+
+    search_policy.searcher = searcher
+    return search_policy
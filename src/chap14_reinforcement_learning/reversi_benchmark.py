@@ -0,0 +1,224 @@
+# 标准库
+import argparse  # 命令行参数
+import json      # 输出机器可读的测试报告
+import platform  # 记录Python版本
+import time      # 计时
+
+# 第三方库
+import numpy as np  # 导入NumPy库，用于高效的数值计算和数组操作
+from gym.envs.reversi import bitboard
+from gym.envs.reversi.batched import BatchedReversiEnv
+from gym.envs.reversi.reversi import ReversiEnv
+
+# 从初始局面出发的perft节点数（标准参考值，跳过算作一步，双方都无子可下的终局算作一个叶子）
+PERFT_REFERENCE = {
+    1: 4,
+    2: 12,
+    3: 56,
+    4: 244,
+    5: 1396,
+    6: 8200,
+    7: 55092,
+    8: 390216,
+    9: 3005288,
+    10: 24571284,
+}
+
+
+def perft_bitboard(own, opp, depth, passed=False):
+    """位棋盘后端的perft：统计depth步之内的叶子节点数（最后一层直接数合法落子）"""
+    moves = bitboard.legal_moves(own, opp)
+    if not moves:
+        if passed or depth == 1:
+            return 1
+        return perft_bitboard(opp, own, depth - 1, True)
+    if depth == 1:
+        return bitboard.popcount(moves)
+    nodes = 0
+    while moves:
+        move = moves & -moves
+        moves ^= move
+        flipped = bitboard.flips(own, opp, move)
+        nodes += perft_bitboard(opp ^ flipped, own | move | flipped, depth - 1)
+    return nodes
+
+
+def perft_numpy(board, color, depth, passed=False):
+    """数组后端的perft：使用ReversiEnv中逐格遍历的静态方法"""
+    d = board.shape[-1]
+    actions = sorted(set(ReversiEnv.get_possible_actions(board, color)))
+    if actions == [d ** 2 + 1]:
+        if passed or depth == 1:
+            return 1
+        return perft_numpy(board, 1 - color, depth - 1, True)
+    if depth == 1:
+        return len(actions)
+    nodes = 0
+    for action in actions:
+        child = ReversiEnv.make_place(board.copy(), action, color)
+        nodes += perft_numpy(child, 1 - color, depth - 1)
+    return nodes
+
+
+def bench_perft(backend, max_depth):
+    """逐层计算perft并与参考值比较"""
+    results = []
+    for depth in range(1, max_depth + 1):
+        start = time.perf_counter()
+        if backend == 'bitboard':
+            nodes = perft_bitboard(bitboard.INITIAL_BLACK, bitboard.INITIAL_WHITE, depth)
+        else:
+            board = bitboard.to_state(bitboard.INITIAL_BLACK, bitboard.INITIAL_WHITE)
+            nodes = perft_numpy(board, ReversiEnv.BLACK, depth)
+        seconds = time.perf_counter() - start
+        expected = PERFT_REFERENCE.get(depth)
+        results.append({
+            'depth': depth,
+            'nodes': nodes,
+            'expected': expected,
+            'ok': expected is None or nodes == expected,
+            'seconds': seconds,
+            'nodes_per_second': nodes / seconds if seconds > 0 else None,
+        })
+    return results
+
+
+def _random_game_bitboard(rng):
+    bits = [bitboard.INITIAL_BLACK, bitboard.INITIAL_WHITE]
+    color, passes, plies = ReversiEnv.BLACK, 0, 0
+    while passes < 2:
+        moves = bitboard.squares(bitboard.legal_moves(bits[color], bits[1 - color]))
+        if moves:
+            square = moves[rng.randint(len(moves))]
+            bits[color], bits[1 - color], _ = bitboard.make_move(bits[color], bits[1 - color], square)
+            passes = 0
+        else:
+            passes += 1
+        color = 1 - color
+        plies += 1
+    return plies
+
+
+def _random_game_numpy(rng):
+    board = bitboard.to_state(bitboard.INITIAL_BLACK, bitboard.INITIAL_WHITE)
+    pass_action = board.shape[-1] ** 2 + 1
+    color, passes, plies = ReversiEnv.BLACK, 0, 0
+    while passes < 2:
+        moves = sorted(set(ReversiEnv.get_possible_actions(board, color)))
+        if moves != [pass_action]:
+            ReversiEnv.make_place(board, moves[rng.randint(len(moves))], color)
+            passes = 0
+        else:
+            passes += 1
+        color = 1 - color
+        plies += 1
+    return plies
+
+
+def bench_playouts(backend, n_games, seed=0):
+    """随机对局吞吐量（局/秒、步/秒）；batched 后端一次推进 n_games 盘对局"""
+    rng = np.random.RandomState(seed)
+    start = time.perf_counter()
+    if backend == 'batched':
+        env = BatchedReversiEnv(n_games)
+        games, plies = 0, 0
+        while games < n_games:
+            mask = env.legal_mask()
+            actions = (rng.rand(*mask.shape) * mask).argmax(axis=1)
+            _, _, dones, _ = env.step(actions)
+            games += int(dones.sum())
+            plies += n_games
+    else:
+        play = _random_game_bitboard if backend == 'bitboard' else _random_game_numpy
+        games = n_games
+        plies = sum(play(rng) for _ in range(n_games))
+    seconds = time.perf_counter() - start
+    return {
+        'games': games,
+        'plies': plies,
+        'seconds': seconds,
+        'games_per_second': games / seconds,
+        'plies_per_second': plies / seconds,
+    }
+
+
+def _random_positions(n, seed=0):
+    """通过随机对局生成n个局面及其合法掩码和行棋方"""
+    env = BatchedReversiEnv(n)
+    rng = np.random.RandomState(seed)
+    for _ in range(rng.randint(5, 40)):
+        mask = env.legal_mask()
+        env.step((rng.rand(*mask.shape) * mask).argmax(axis=1))
+    return env.states(), env.legal_mask(), env.to_play.copy()
+
+
+def bench_agent(batch_sizes, n_boards, seed=0):
+    """RL_QG_agent 落子吞吐量：批大小为1时调用place，否则调用place_batch"""
+    try:
+        from RL_QG_agent import RL_QG_agent
+        agent = RL_QG_agent()
+        agent.init_model()
+    except Exception as e:  # 没有安装TensorFlow 1.x 时跳过
+        return {'skipped': '{}: {}'.format(type(e).__name__, e)}
+
+    states, masks, colors = _random_positions(n_boards, seed)
+    results = []
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, n_boards, batch_size):
+            if batch_size == 1:
+                enables = list(np.flatnonzero(masks[i, :64])) or [65]
+                if enables != [65]:
+                    agent.place(states[i], enables, colors[i])
+            else:
+                agent.place_batch(states[i:i + batch_size], masks[i:i + batch_size], colors[i:i + batch_size])
+        seconds = time.perf_counter() - start
+        results.append({
+            'batch_size': batch_size,
+            'boards': n_boards,
+            'seconds': seconds,
+            'boards_per_second': n_boards / seconds,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='黑白棋规则引擎与智能体性能测试，输出JSON报告')
+    parser.add_argument('--backends', default='bitboard,numpy', help='参与perft和随机对局测试的后端')
+    parser.add_argument('--perft-depth', type=int, default=6, help='bitboard后端perft的最大深度')
+    parser.add_argument('--numpy-perft-depth', type=int, default=4, help='numpy后端perft的最大深度')
+    parser.add_argument('--games', type=int, default=200, help='随机对局局数')
+    parser.add_argument('--batched-games', type=int, default=4096, help='batched后端并行对局数')
+    parser.add_argument('--batch-sizes', default='1,16,64,256', help='RL_QG_agent测试的批大小')
+    parser.add_argument('--agent-boards', type=int, default=1024, help='RL_QG_agent测试的局面数')
+    parser.add_argument('--skip-agent', action='store_true', help='不测试RL_QG_agent')
+    parser.add_argument('--output', default=None, help='报告写入的文件（默认打印到标准输出）')
+    args = parser.parse_args()
+
+    backends = [b for b in args.backends.split(',') if b]
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'perft': {},
+        'playouts': {},
+    }
+    for backend in backends:
+        depth = args.perft_depth if backend == 'bitboard' else args.numpy_perft_depth
+        report['perft'][backend] = bench_perft(backend, depth)
+        report['playouts'][backend] = bench_playouts(backend, args.games)
+    report['playouts']['batched'] = bench_playouts('batched', args.batched_games)
+    if not args.skip_agent:
+        batch_sizes = [int(b) for b in args.batch_sizes.split(',') if b]
+        report['agent_place'] = bench_agent(batch_sizes, args.agent_boards)
+    report['perft_ok'] = all(r['ok'] for results in report['perft'].values() for r in results)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,12 +5,12 @@ import random
 # 第三方库
 # 导入OpenAI Gym库，提供标准化的强化学习环境接口
 import gym
-# 导入NumPy库，用于高效的数值计算和数组操作
-import numpy as np
 
 # 本地模块
 # 导入自定义的强化学习智能体类
 from RL_QG_agent import RL_QG_agent
+# 导入对局记录器，替代逐步渲染棋盘
+from game_recorder import GameRecorder
 
 # 创建黑白棋环境实例（8x8标准棋盘）
 env = gym.make('Reversi8x8-v0')  # 使用Gym接口创建特定环境
@@ -22,6 +22,10 @@ agent.load_model()  # 加载已训练的模型参数，加速学习过程
 
 # 设置训练参数
 max_epochs = 100  # 总共进行的训练局数，每局是完整的游戏
+RENDER = False    # 是否每步渲染棋盘（逐格输出到终端很慢，默认关闭）
+
+# 每局的着法序列记录到二进制日志中，需要查看时运行: python game_recorder.py reversi_games.bin --game 0
+recorder = GameRecorder('reversi_games.bin')
 
 # 训练主循环
 for i_episode in range(max_epochs):
@@ -29,6 +33,7 @@ for i_episode in range(max_epochs):
     # observation: 3x8x8的张量，包含游戏状态信息
     # 3个通道分别表示: 黑棋位置、白棋位置、当前玩家
     observation = env.reset()
+    moves = []  # 本局的着法序列
     
     # 单局游戏循环（最多100步，防止无限循环）
     for t in range(100):
@@ -36,7 +41,8 @@ for i_episode in range(max_epochs):
         action = [1, 2]  # action[0]: 落子位置(0-63)或特殊操作, action[1]: 棋子颜色(0=黑, 1=白)
 
         ################### 黑棋回合（使用随机策略） ###################
-        env.render()  # 可视化当前棋盘状态，便于观察训练过程
+        if RENDER:
+            env.render()  # 可视化当前棋盘状态，便于观察训练过程
         enables = env.possible_actions  # 获取当前合法的落子位置列表
 
         # 处理无合法动作的情况
@@ -57,9 +63,11 @@ for i_episode in range(max_epochs):
         # done: 游戏是否结束
         # info: 包含额外信息的字典（如获胜方）
         observation, reward, done, info = env.step(action)
+        moves.append(action_)
 
         ################### 白棋回合（使用智能体策略） ###################
-        env.render()  # 再次可视化棋盘状态
+        if RENDER:
+            env.render()  # 再次可视化棋盘状态
         enables = env.possible_actions  # 获取白棋合法落子位置
 
         # 处理无合法动作的情况
@@ -72,13 +80,15 @@ for i_episode in range(max_epochs):
             # observation: 当前环境观测
             # enables: 合法动作列表
             # 返回: 选择的动作索引
-            action_ = agent.place(observation, enables)
+            action_ = agent.place(observation, enables, 1)  # 智能体执白棋
         
         # 构建完整动作
         action[0] = action_  # 设置落子位置
         action[1] = 1  # 设置棋子颜色为白色
         
-        # 执行白棋动作，更新环境状态
+        # 执行白棋动作，更新环境状态（黑棋已经结束对局时该步不会生效，也不记录）
+        if not done:
+            moves.append(action_)
         observation, reward, done, info = env.step(action)
 
         # 检查游戏是否结束
@@ -87,7 +97,7 @@ for i_episode in range(max_epochs):
             print(f"第 {i_episode+1} 局游戏在 {t+1} 步后结束")
             
             # 计算双方得分
-            black_score = len(np.where(env.state[0, :, :] == 1)[0])  # 统计黑棋数量
+            black_score = env.black_count  # 黑棋数量（环境增量维护，无需重新扫描棋盘）
             total_tiles = env.board_size ** 2  # 棋盘总格子数 (8x8=64)
             
             # 判断胜负
@@ -99,12 +109,15 @@ for i_episode in range(max_epochs):
                 print("平局！")
             
             # 打印详细比分
-            white_score = total_tiles - black_score
+            white_score = env.white_count
             print(f"比分: 黑棋 {black_score} - 白棋 {white_score}")
             
             break  # 结束当前游戏，开始下一局
 
+    recorder.add(moves, env.black_count, env.white_count)  # 攒够一批后批量写入日志
+
 # 清理环境资源
+recorder.close()
 env.close()
 print(f"训练完成！共进行了 {max_epochs} 局游戏")
 print(f"训练完成！共进行了 {max_epochs} 局游戏")
@@ -0,0 +1,234 @@
+# 标准库
+import multiprocessing as mp  # 多进程，每个进程独立运行一个环境和一份策略网络
+import os                     # 文件路径处理，用于监视检查点文件
+import queue                  # 队列超时异常
+
+# 第三方库
+import numpy as np  # 导入NumPy库，用于高效的数值计算和数组操作
+from gym.envs.reversi import bitboard  # 按棋子数判定胜负的规则
+
+# 本地模块
+from replay_buffer import PrioritizedReplayBuffer, legal_mask_from_actions  # 主进程中的经验存储
+from symmetry import to_mover_view  # 状态按行棋方视角存储
+
+BLACK = 0  # 黑棋编号，与ReversiEnv.BLACK一致（白棋为1）
+
+
+def play_game(env, agent, rng, epsilon=0.1, max_plies=128):
+    """
+    用同一个智能体执行黑白双方，完成一局自我对弈
+
+    :param env: gym.make('Reversi8x8-v0') 创建的环境
+    :param agent: 已初始化的RL_QG_agent
+    :param rng: np.random.RandomState，用于epsilon-贪心探索
+    :param epsilon: 随机落子的概率
+    :param max_plies: 单局最多步数（防止双方连续跳过导致死循环）
+    :return: dict，包含按步排列的 states / actions / rewards / next_states / dones / next_legal / next_same 数组，
+             states 为行棋方视角（通道0: 行棋方，通道1: 对手），next_states 为下一步行棋方的视角，
+             reward 是对行棋一方而言的终局结果（赢 1，输 -1），
+             next_legal 是下一状态行棋方合法落子的uint64位掩码；
+             对手只能跳过时，next_same 为True，next_states / next_legal 取跳过之后轮到本方的局面
+    """
+    base = env.unwrapped
+    pass_action = base.board_size ** 2 + 1  # "跳过"动作编号
+    observation = env.reset()
+
+    states, actions, movers, next_states, next_enables = [], [], [], [], []
+    color = BLACK
+    passes = 0
+    black_reward = 0
+    for _ in range(max_plies):
+        enables = env.possible_actions
+        if not enables or enables == [pass_action]:
+            action = pass_action
+        elif rng.rand() < epsilon:
+            action = enables[rng.randint(len(enables))]
+        else:
+            action = agent.place(observation, enables, color)
+
+        # 状态以行棋方视角存储，下一状态以下一步行棋方（对手）的视角存储
+        states.append(to_mover_view(np.asarray(observation, dtype=np.uint8), color))
+        observation, reward, done, info = env.step([action, color])
+        actions.append(action)
+        movers.append(color)
+        next_states.append(to_mover_view(np.asarray(observation, dtype=np.uint8), 1 - color))
+        next_enables.append(env.possible_actions)
+
+        # 环境返回的奖励是相对env.player_color的，统一换算成黑棋视角
+        black_reward = reward if base.player_color == BLACK else -reward
+        passes = passes + 1 if action == pass_action else 0
+        if done:
+            break
+        if passes == 2:
+            # 双方都无子可下：按棋子数判定胜负，规则与环境一致（平局判黑棋胜）
+            black_count = int(np.sum(base.state[0] == 1))
+            white_count = int(np.sum(base.state[1] == 1))
+            black_reward = bitboard.result_from_counts(black_count, white_count, black_count + white_count)
+            break
+        color = 1 - color
+
+    n = len(actions)
+    rewards = np.zeros(n, dtype=np.float32)
+    dones = np.zeros(n, dtype=bool)
+    next_same = np.zeros(n, dtype=bool)
+    if n > 0:
+        # 终局奖励放在最后一步落子上（双方连续跳过结束时，末尾的跳过转移不参与训练，
+        # 如果奖励只放在跳过上，最后一步落子会自举到0，被当成平局学习），
+        # 之后的跳过转移同样标记为终局；奖励符号取决于该步的行棋方
+        placed = [i for i, a in enumerate(actions) if a < base.board_size ** 2]
+        last = placed[-1] if placed else n - 1
+        for i in range(last, n):
+            rewards[i] = black_reward if movers[i] == BLACK else -black_reward
+            dones[i] = True
+        # 落子后对手只能跳过（对局未结束）：下一个决策点仍属于本方，
+        # 用跳过之后的局面（本方视角）和本方的合法落子作为下一状态，训练时按 +gamma 自举
+        for i in range(n - 1):
+            if actions[i] != pass_action and actions[i + 1] == pass_action and not dones[i]:
+                next_states[i] = next_states[i + 1]
+                next_enables[i] = next_enables[i + 1]
+                next_same[i] = True
+    return {
+        'states': np.stack(states),
+        'actions': np.asarray(actions, dtype=np.int16),
+        'rewards': rewards,
+        'next_states': np.stack(next_states),
+        'dones': dones,
+        'next_legal': legal_mask_from_actions(next_enables),
+        'next_same': next_same,
+    }
+
+
+def _checkpoint_mtime(model_dir):
+    """返回检查点索引文件的修改时间，尚未保存过模型时返回None"""
+    path = os.path.join(model_dir, 'checkpoint')
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def _worker(worker_id, game_queue, stop_event, epsilon, max_plies, seed):
+    """
+    自我对弈工作进程：独立的环境 + 冻结的策略副本，检查点更新后重新加载参数
+    """
+    # 在子进程内导入，保证每个进程拥有自己的TensorFlow会话和环境
+    import gym
+    from RL_QG_agent import RL_QG_agent
+
+    rng = np.random.RandomState(seed)
+    env = gym.make('Reversi8x8-v0')
+    agent = RL_QG_agent()
+    agent.init_model()
+    loaded_mtime = None
+
+    while not stop_event.is_set():
+        # 每局开始前检查是否有新的检查点
+        mtime = _checkpoint_mtime(agent.model_dir)
+        if mtime is not None and mtime != loaded_mtime:
+            try:
+                agent.load_model()
+                loaded_mtime = mtime
+            except Exception as e:  # 检查点可能正在写入，下一局再试
+                print("工作进程 {} 加载模型失败: {}".format(worker_id, e))
+
+        game = play_game(env, agent, rng, epsilon, max_plies)
+        while not stop_event.is_set():
+            try:
+                game_queue.put(game, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+    env.close()
+
+
+class SelfPlayPool:
+    """
+    多进程自我对弈数据生成器
+
+    启动K个工作进程，每个进程运行自己的ReversiEnv和一份冻结的RL_QG_agent，
+    以整局为单位把转移数据通过队列发送回主进程，由collect写入经验存储。
+    训练进程调用agent.save_model()后，各工作进程会在下一局开始前重新加载参数。
+    """
+
+    def __init__(self, num_workers=None, epsilon=0.1, max_plies=128, queue_size=256, seed=0):
+        """
+        :param num_workers: 工作进程数，默认等于CPU核数
+        :param epsilon: 工作进程中随机落子的概率
+        :param max_plies: 单局最多步数
+        :param queue_size: 队列中最多缓存的对局数（生产速度过快时阻塞工作进程）
+        :param seed: 随机种子，第k个工作进程使用seed + k
+        """
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.epsilon = epsilon
+        self.max_plies = max_plies
+        self.seed = seed
+        # TensorFlow不支持fork后继续使用，统一使用spawn启动子进程
+        self._ctx = mp.get_context('spawn')
+        self._queue = self._ctx.Queue(maxsize=queue_size)
+        self._stop_event = self._ctx.Event()
+        self._workers = []
+
+    def start(self):
+        """启动所有工作进程"""
+        for k in range(self.num_workers):
+            p = self._ctx.Process(
+                target=_worker,
+                args=(k, self._queue, self._stop_event, self.epsilon, self.max_plies, self.seed + k),
+                daemon=True,
+            )
+            p.start()
+            self._workers.append(p)
+        return self
+
+    def collect(self, store, min_transitions, timeout=None):
+        """
+        从队列中取出对局并写入经验存储，直到至少写入min_transitions条转移
+
+        :param store: 提供add_batch(states, actions, rewards, next_states, dones, next_legal, next_same)的经验存储
+        :param min_transitions: 本次至少写入的转移条数
+        :param timeout: 等待单局数据的最长秒数，超时则提前返回
+        :return: 实际写入的转移条数
+        """
+        added = 0
+        while added < min_transitions:
+            try:
+                game = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            store.add_batch(game['states'], game['actions'], game['rewards'],
+                            game['next_states'], game['dones'], game['next_legal'], game['next_same'])
+            added += len(game['actions'])
+        return added
+
+    def stop(self):
+        """通知所有工作进程退出并等待其结束"""
+        self._stop_event.set()
+        for p in self._workers:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+        self._workers = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+if __name__ == '__main__':
+    from RL_QG_agent import RL_QG_agent
+
+    agent = RL_QG_agent()
+    agent.init_model()
+    store = PrioritizedReplayBuffer(capacity=2000000, augment=True)
+    with SelfPlayPool() as pool:
+        for iteration in range(1000):
+            n = pool.collect(store, min_transitions=2000)
+            for _ in range(50):
+                batch = store.sample(256)
+                loss, td_errors = agent.train_step(batch)
+                store.update_priorities(batch['indices'], td_errors)
+            print(f"第 {iteration + 1} 轮: 新增 {n} 条转移，当前共 {len(store)} 条，loss {loss:.4f}")
+            if (iteration + 1) % 10 == 0:
+                agent.save_model()  # 工作进程会在下一局开始前加载新参数
@@ -0,0 +1,118 @@
+# 导入必要的库
+import numpy as np  # 导入数值计算库，所有对称变换都通过预先计算的索引置换表完成
+
+BOARD_SIZE = 8
+NUM_SQUARES = BOARD_SIZE ** 2
+
+
+def _build_permutations():
+    """
+    构建8x8棋盘二面体群D4的8个对称变换（4种旋转 x 是否水平翻转）
+
+    PERMUTATIONS[k][i] 表示变换k后第i个格子取自原棋盘的哪个格子，
+    即 transformed_flat = flat[..., PERMUTATIONS[k]]；
+    INVERSE[k] 为其逆置换，原棋盘上的动作a在变换后的棋盘上对应 INVERSE[k][a]。
+    """
+    grid = np.arange(NUM_SQUARES).reshape(BOARD_SIZE, BOARD_SIZE)
+    perms = []
+    for flip in (False, True):
+        base = grid[:, ::-1] if flip else grid
+        for rot in range(4):
+            perms.append(np.rot90(base, rot).reshape(-1))
+    perms = np.array(perms, dtype=np.int64)
+    inverse = np.argsort(perms, axis=1)
+    return perms, inverse
+
+
+PERMUTATIONS, INVERSE = _build_permutations()
+NUM_SYMMETRIES = len(PERMUTATIONS)
+
+
+def transform_state(state, k):
+    """对(..., C, 8, 8)的状态施加第k个对称变换"""
+    state = np.asarray(state)
+    flat = state.reshape(state.shape[:-2] + (NUM_SQUARES,))
+    return flat[..., PERMUTATIONS[k]].reshape(state.shape)
+
+
+def canonicalize(state):
+    """
+    把单个棋盘映射到规范朝向：8个对称局面中按位压缩后字节序最小的一个
+
+    :param state: 形状为(C, 8, 8)的0/1状态
+    :return: (canonical_state, k)，canonical_state = transform_state(state, k)
+    """
+    state = np.asarray(state)
+    flat = state.reshape(state.shape[0], NUM_SQUARES) == 1
+    variants = flat[:, PERMUTATIONS].transpose(1, 0, 2)  # (8, C, 64)
+    packed = np.packbits(variants.reshape(NUM_SYMMETRIES, -1), axis=1)
+    keys = [row.tobytes() for row in packed]
+    k = min(range(NUM_SYMMETRIES), key=keys.__getitem__)
+    return variants[k].reshape(state.shape).astype(state.dtype), k
+
+
+def canonical_key(state):
+    """规范朝向下的棋盘哈希键，8个对称局面得到相同的键"""
+    canonical, k = canonicalize(state)
+    return np.asarray(canonical, dtype=np.uint8).tobytes(), k
+
+
+def transform_actions(actions, k):
+    """
+    原棋盘上的动作编号 -> 第k个对称变换后棋盘上的动作编号（0-63之外的特殊动作保持不变）
+
+    actions 与 k 可以是同形状的数组（每个样本各自的变换）。
+    """
+    actions = np.asarray(actions)
+    is_place = (actions >= 0) & (actions < NUM_SQUARES)
+    mapped = INVERSE[k, np.where(is_place, actions, 0)]
+    return np.where(is_place, mapped, actions).astype(actions.dtype)
+
+
+def untransform_q(q_row, k):
+    """规范朝向下的Q值(..., 64) -> 原棋盘朝向下的Q值"""
+    return np.asarray(q_row)[..., INVERSE[k]]
+
+
+def to_mover_view(states, colors):
+    """
+    绝对颜色的状态（通道0: 黑棋，通道1: 白棋，通道2: 空位）-> 行棋方视角的状态
+    （通道0: 行棋方，通道1: 对手，通道2: 空位），与位棋盘核心的 own/opp 约定一致。
+    白棋行棋时交换前两个通道，黑棋行棋时保持不变。
+
+    :param states: 形状为(3, 8, 8)或(N, 3, 8, 8)的状态
+    :param colors: 行棋方（0 黑棋，1 白棋），单个整数或形状为(N,)的数组
+    :return: 与 states 形状相同的新数组
+    """
+    states = np.asarray(states)
+    colors = np.asarray(colors)
+    if states.ndim == 3:
+        return states[[1, 0, 2]] if int(colors) == 1 else states.copy()
+    order = np.where((colors == 1)[:, None], [1, 0, 2], [0, 1, 2])  # (N, 3)
+    return np.take_along_axis(states, order[:, :, None, None], axis=1)
+
+
+def augment_batch(batch, rng=np.random):
+    """
+    为小批量中的每个样本随机选择一个对称变换，向量化地变换状态、动作和合法掩码
+
+    :param batch: ReplayBuffer.sample 返回的dict（states / next_states 形状为(B, 3, 8, 8)，
+                  next_legal 形状为(B, 64)）
+    :return: 新的dict，额外包含每个样本使用的变换编号 'symmetry'
+    """
+    n = len(batch['actions'])
+    k = rng.randint(0, NUM_SYMMETRIES, size=n)
+    perms = PERMUTATIONS[k]  # (B, 64)
+
+    def _permute(states):
+        flat = states.reshape(n, -1, NUM_SQUARES)
+        out = np.take_along_axis(flat, perms[:, None, :], axis=2)
+        return out.reshape(states.shape)
+
+    augmented = dict(batch)
+    augmented['states'] = _permute(batch['states'])
+    augmented['next_states'] = _permute(batch['next_states'])
+    augmented['next_legal'] = np.take_along_axis(batch['next_legal'], perms, axis=1)
+    augmented['actions'] = transform_actions(batch['actions'], k)
+    augmented['symmetry'] = k
+    return augmented